@@ -1,11 +1,14 @@
+from contextlib import contextmanager
 from datetime import datetime
 import math
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional, Union
-import sys
-sys.path.append("./flows")
-from config import get_mongo_db
+
+from flows.config import API_IO_RETRIES, MONGO_CLIENT_CACHE, get_mongo_db
+from flows.kpi_store import read_kpi, read_windows
+from flows.resilience import CircuitOpenError, io_call, is_transient, retry_budget
+from flows.windows import WINDOWS
 
 
 # Modèles
@@ -44,8 +47,42 @@ class Distribution(BaseModel):
     montant_min: float
     montant_max: float
     ecart_type: float
+    p90: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+    quantiles: Optional[str] = None
+
+
+class CubeRow(BaseModel):
+    jour: Optional[str] = None
+    semaine: Optional[str] = None
+    mois: Optional[str] = None
+    annee: Optional[str] = None
+    pays: Optional[str] = None
+    produit: Optional[str] = None
+    annee_inscription: Optional[int] = None
+    nb_achats: int
+    ca_total: float
+    panier_moyen: Optional[float] = None
+    ecart_type: Optional[float] = None
+
+
+class Fenetre(BaseModel):
+    granularite: str
+    periode: str
+    pays: str
+    nb_achats: int
+    ca_total: float
+    nb_achats_fenetre: Optional[float] = None
+    ca_fenetre: Optional[float] = None
+    ecart_pct: Optional[float] = None
 
 
+class HistogrammeMontant(BaseModel):
+    borne_min: Optional[float] = None
+    borne_max: Optional[float] = None
+    nb_achats: int
+
 
 app = FastAPI(
     title="Data Lake API",
@@ -71,6 +108,67 @@ def clean_data(data: list) -> list:
     return data
 
 
+@contextmanager
+def http_errors(service: str):
+    """
+        Map the errors of a read to HTTP responses
+
+        400 for bad parameters, 503 while the circuit breaker of the
+        service is open or once its transient errors outlast the retries
+    """
+    try:
+        yield
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        if is_transient(e):
+            raise HTTPException(status_code=503, detail=f"{service} indisponible")
+        raise
+
+
+def run_query(query) -> list:
+    """
+        Run a MongoDB read for an endpoint
+
+        At most API_IO_RETRIES quick retries, and an immediate 503 while
+        the MongoDB circuit breaker is open
+    """
+    db = get_mongo_db()
+    try:
+        with http_errors("MongoDB"):
+            data = io_call("mongo", lambda: query(db), retries=API_IO_RETRIES)
+    finally:
+        # client créé pour cet appel (MONGO_CLIENT_CACHE=false) : libérer son pool
+        if not MONGO_CLIENT_CACHE:
+            db.client.close()
+
+    if not data:
+        raise HTTPException(status_code=404, detail="Aucune donnée trouvée")
+
+    return data
+
+
+def fetch_kpi(
+    collection_name: str,
+    sort: Optional[str],
+    limit: Optional[int],
+    debut: Optional[str] = None,
+    fin: Optional[str] = None
+) -> list:
+    """
+        Read a KPI: summary document point read, or indexed sort / limit
+    """
+    return run_query(lambda db: read_kpi(db, collection_name, sort, limit, debut, fin))
+
+
+SORT_QUERY = Query(None, description="Champ indexé de tri, préfixé par - pour un tri décroissant (ex: -ca_total)")
+LIMIT_QUERY = Query(None, ge=1, description="Nombre maximum de lignes")
+DEBUT_QUERY = Query(None, description="Première période incluse (YYYY-MM-DD, YYYY-MM pour les mois)")
+FIN_QUERY = Query(None, description="Dernière période incluse (YYYY-MM-DD, YYYY-MM pour les mois)")
+
+
 
 @app.get("/", tags=["Home"])
 def read_root():
@@ -85,78 +183,130 @@ def read_root():
             "/api/volumes_jour",
             "/api/volumes_mois",
             "/api/croissance",
-            "/api/distribution"
+            "/api/distribution",
+            "/api/histogramme_montant",
+            "/api/fenetres",
+            "/api/cube"
         ]
     }
 
 
 @app.get("/api/ca_par_pays", response_model=list[CAParPays], tags=["KPIs"])
-def get_ca_par_pays():
+def get_ca_par_pays(sort: Optional[str] = SORT_QUERY, limit: Optional[int] = LIMIT_QUERY):
     """
         Get the revenue by country
     """
-    db = get_mongo_db()
-    data = list(db["kpi_ca_par_pays"].find({}, {"_id": 0}))
-    
-    if not data:
-        raise HTTPException(status_code=404, detail="Aucune donnée trouvée")
-    
-    return clean_data(data)
+    return fetch_kpi("kpi_ca_par_pays", sort, limit)
 
 
 @app.get("/api/volumes_jour", response_model=list[VolumesJour], tags=["KPIs"])
-def get_volumes_jour():
+def get_volumes_jour(
+    sort: Optional[str] = SORT_QUERY,
+    limit: Optional[int] = LIMIT_QUERY,
+    debut: Optional[str] = DEBUT_QUERY,
+    fin: Optional[str] = FIN_QUERY
+):
     """ 
         Get the purchase volumes by day
     """
-    db = get_mongo_db()
-    data = list(db["kpi_volumes_jour"].find({}, {"_id": 0}))
-    
-    if not data:
-        raise HTTPException(status_code=404, detail="Aucune donnée trouvée")
-    
-    return clean_data(data)
+    return fetch_kpi("kpi_volumes_jour", sort, limit, debut, fin)
 
 
 @app.get("/api/volumes_mois", response_model=list[VolumesMois], tags=["KPIs"])
-def get_volumes_mois():
+def get_volumes_mois(
+    sort: Optional[str] = SORT_QUERY,
+    limit: Optional[int] = LIMIT_QUERY,
+    debut: Optional[str] = DEBUT_QUERY,
+    fin: Optional[str] = FIN_QUERY
+):
     """
         Get the purchase volumes by month
     """
-    db = get_mongo_db()
-    data = list(db["kpi_volumes_mois"].find({}, {"_id": 0}))
-    
-    if not data:
-        raise HTTPException(status_code=404, detail="Aucune donnée trouvée")
-    
-    return clean_data(data)
+    return fetch_kpi("kpi_volumes_mois", sort, limit, debut, fin)
 
 
 @app.get("/api/croissance", response_model=list[Croissance], tags=["KPIs"])
-def get_croissance():
+def get_croissance(sort: Optional[str] = SORT_QUERY, limit: Optional[int] = LIMIT_QUERY):
     """
         Get the growth KPIs
     """
-    db = get_mongo_db()
-    data = list(db["kpi_croissance"].find({}, {"_id": 0}))
-    
-    if not data:
-        raise HTTPException(status_code=404, detail="Aucune donnée trouvée")
-    
-    return clean_data(data)
+    return fetch_kpi("kpi_croissance", sort, limit)
 
 
 @app.get("/api/distribution", response_model=list[Distribution], tags=["KPIs"])
-def get_distribution():
+def get_distribution(sort: Optional[str] = SORT_QUERY, limit: Optional[int] = LIMIT_QUERY):
     """
         Get the distribution KPIs
     """
-    db = get_mongo_db()
-    data = list(db["kpi_distribution"].find({}, {"_id": 0}))
-    
-    if not data:
+    return fetch_kpi("kpi_distribution", sort, limit)
+
+
+@app.get("/api/histogramme_montant", response_model=list[HistogrammeMontant], tags=["KPIs"])
+def get_histogramme_montant(sort: Optional[str] = SORT_QUERY, limit: Optional[int] = LIMIT_QUERY):
+    """
+        Get the histogram of purchase amounts
+    """
+    return fetch_kpi("kpi_histogramme_montant", sort, limit)
+
+
+@app.get("/api/fenetres", response_model=list[Fenetre], tags=["KPIs"])
+def get_fenetres(
+    window: str = Query(..., description=f"Fenêtre : {', '.join(WINDOWS)}"),
+    pays: Optional[str] = Query(None, description="Pays séparés par des virgules (total de tous les pays par défaut)"),
+    sort: Optional[str] = SORT_QUERY,
+    limit: Optional[int] = LIMIT_QUERY,
+    debut: Optional[str] = DEBUT_QUERY,
+    fin: Optional[str] = FIN_QUERY
+):
+    """
+        Get rolling averages and lagged comparisons by period and country
+    """
+    countries = pays.split(",") if pays else None
+    return run_query(lambda db: read_windows(db, window, countries, sort, limit, debut, fin))
+
+
+@app.get("/api/cube", response_model=list[CubeRow], response_model_exclude_unset=True, tags=["Cube"])
+def get_cube(
+    dimensions: str = Query("pays", description="Dimensions séparées par des virgules (jour, semaine, mois, annee, pays, produit, annee_inscription)"),
+    pays: Optional[str] = Query(None, description="Filtre, valeurs séparées par des virgules"),
+    produit: Optional[str] = None,
+    annee_inscription: Optional[str] = None,
+    mois: Optional[str] = None,
+    annee: Optional[str] = None,
+    date_debut: Optional[str] = Query(None, description="YYYY-MM-DD"),
+    date_fin: Optional[str] = Query(None, description="YYYY-MM-DD")
+):
+    """
+        Roll-up of the Gold cube on any combination of dimensions
+    """
+    filters = {
+        name: value.split(",")
+        for name, value in {
+            "pays": pays,
+            "produit": produit,
+            "annee_inscription": annee_inscription,
+            "mois": mois,
+            "annee": annee
+        }.items()
+        if value
+    }
+    dims = [dim for dim in dimensions.split(",") if dim]
+
+    # pandas / pyarrow chargés à la première requête sur le cube seulement
+    from flows.cube import load_cube, rollup
+
+    # lectures MinIO avec les nouveaux essais de l'API : échec rapide
+    with http_errors("MinIO"), retry_budget(API_IO_RETRIES):
+        try:
+            cube = load_cube()
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Cube non disponible")
+        result = rollup(cube, dims, filters, date_debut, date_fin)
+
+    if result.empty:
         raise HTTPException(status_code=404, detail="Aucune donnée trouvée")
-    
+
+    data = result.astype(object).where(result.notna(), None).to_dict(orient="records")
     return clean_data(data)
 
 
@@ -1,10 +1,6 @@
 import streamlit as st
-import sys
-from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).parent / "tabs"))
-
-from tabs import home, ca_par_pays, volumes, croissance, distribution, minio_data
+from dashboard.tabs import home, ca_par_pays, volumes, croissance, distribution, minio_data, analyse_cube
 
 st.set_page_config(
     page_title="Dashboard KPIs",
@@ -20,6 +16,8 @@ tabs = st.tabs([
     "Volumes",
     "Croissance",
     "Distribution",
+    "Cube",
+    "MinIO Data",
 ])
 
 with tabs[0]:
@@ -36,3 +34,9 @@ with tabs[3]:
 
 with tabs[4]:
     distribution.show()
+
+with tabs[5]:
+    analyse_cube.show()
+
+with tabs[6]:
+    minio_data.show()
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+# Sous-échantillonnage des séries temporelles avant envoi au navigateur :
+# une courbe n'a pas besoin de plus de points que de pixels en largeur.
+# Les points gardés sont des lignes du jeu de données (pas de moyenne),
+# donc pics et creux restent exacts.
+METHODS = ("lttb", "minmax")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets : indices des n_out points qui gardent
+    la forme visuelle de la courbe.
+
+    Premier et dernier points conservés ; entre les deux, un point par
+    bucket, celui qui forme le plus grand triangle avec le point retenu
+    dans le bucket précédent et la moyenne du bucket suivant.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:stop] - y[a])
+            - (x[a] - x[start:stop]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Min / max par bucket : indices du minimum et du maximum de chaque
+    bucket de positions consécutives ((n_out - 2) // 2 buckets), plus les
+    extrémités. Entièrement vectorisé.
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+
+    n_buckets = max(1, (n_out - 2) // 2)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    buckets = np.repeat(np.arange(n_buckets), np.diff(edges))
+
+    # tri par bucket puis par valeur : min en tête, max en fin de bucket
+    order = np.lexsort((y, buckets))
+    mins = order[edges[:-1]]
+    maxs = order[edges[1:] - 1]
+
+    return np.unique(np.concatenate(([0], mins, maxs, [n - 1])))
+
+
+def _numeric_x(values: pd.Series) -> np.ndarray:
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(float)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    return np.arange(len(values), dtype=float)
+
+
+def downsample(df: pd.DataFrame, x: str, y: str, max_points: int, method: str = "lttb") -> pd.DataFrame:
+    """
+    Lignes de df à tracer pour la courbe y(x), au plus max_points.
+
+    Les points où y est vide sont retirés seulement si la série est
+    sous-échantillonnée.
+
+    Args:
+        method: "lttb" (forme de la courbe) ou "minmax" (pics et creux de
+            chaque bucket, pour les séries très bruitées)
+    """
+    if method not in METHODS:
+        raise ValueError(f"Méthode inconnue : {method} ({', '.join(METHODS)})")
+    if len(df) <= max_points:
+        return df
+
+    df = df[df[y].notna()]
+    if not df[x].is_monotonic_increasing:
+        df = df.sort_values(x)
+
+    values = df[y].to_numpy(dtype=float)
+    if method == "lttb":
+        indices = lttb_indices(_numeric_x(df[x]), values, max_points)
+    else:
+        indices = minmax_indices(values, max_points)
+
+    return df.iloc[indices]
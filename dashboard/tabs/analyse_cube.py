@@ -0,0 +1,35 @@
+import streamlit as st
+import plotly.express as px
+import pandas as pd
+from dashboard.utils import get_snapshot, paginated_table, snapshot_caption
+from flows.cube import rollup
+
+
+DIMENSIONS = ["mois", "semaine", "annee", "jour", "pays", "produit", "annee_inscription"]
+
+
+def show():
+    st.header("Analyse multidimensionnelle")
+    snapshot_caption()
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        dimensions = st.multiselect("Dimensions", DIMENSIONS, default=["mois", "pays"])
+    with col2:
+        mesure = st.selectbox("Mesure", ["ca_total", "nb_achats", "panier_moyen", "ecart_type"])
+    
+    # roll-up local sur le cube du snapshot, sans appel à l'API
+    cube, time_cube = get_snapshot("cube_achats")
+    df_cube = rollup(cube, dimensions) if not cube.empty else cube
+    st.metric("Cube Gold (snapshot)", f"{time_cube:.0f}ms")
+    
+    st.divider()
+    
+    if not df_cube.empty:
+        if len(dimensions) >= 1:
+            x = dimensions[0]
+            color = dimensions[1] if len(dimensions) >= 2 else None
+            fig = px.bar(df_cube, x=x, y=mesure, color=color, title=f"{mesure} par {', '.join(dimensions)}")
+            st.plotly_chart(fig, use_container_width=True)
+        
+        paginated_table(df_cube, key="cube")
@@ -1,37 +1,18 @@
 import streamlit as st
-import plotly.express as px
 import pandas as pd
-import sys
-from pathlib import Path
-
-sys.path.insert(0, str(Path(__file__).parent.parent))
-from utils import fetch_data, get_minio_data
+from dashboard.utils import get_snapshot, line_chart, paginated_table, snapshot_caption
 
 
 def show():
     st.header("Croissance")
-    df_croissance, time_mongo = fetch_data("/api/croissance")
-    _, time_minio = get_minio_data("gold", "kpi_croissance")
+    snapshot_caption()
+    df_croissance, time_snapshot = get_snapshot("croissance")
     
-    col1, col2 = st.columns(2)
-    with col1:
-        st.metric("MongoDB", f"{time_mongo:.0f}ms")
-    with col2:
-        st.metric("MinIO", f"{time_minio:.0f}ms")
+    st.metric("Snapshot", f"{time_snapshot:.0f}ms")
     
     st.divider()
     
     if not df_croissance.empty:
-
-        if 'mois' in df_croissance.columns:
-            df_croissance['mois'] = pd.to_datetime(df_croissance['mois'], errors='coerce')
-        
-    
-
-            fig = px.line(df_croissance, x="mois", y="croissance_pct",
-                         title="Taux de Croissance")
-            st.plotly_chart(fig, use_container_width=True)
-        
-    
+        line_chart(df_croissance, "mois", "croissance_pct", "Taux de Croissance")
         
-        st.dataframe(df_croissance, use_container_width=True)
+        paginated_table(df_croissance, key="croissance")
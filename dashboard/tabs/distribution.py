@@ -1,24 +1,15 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-import sys
-from pathlib import Path
-
-
-sys.path.insert(0, str(Path(__file__).parent.parent))
-from utils import fetch_data, get_minio_data
+from dashboard.utils import get_snapshot, snapshot_caption
 
 
 def show():
     st.header("Distributions Statistiques")
-    df_dist, time_mongo = fetch_data("/api/distribution")
-    _, time_minio = get_minio_data("gold", "kpi_distribution")
+    snapshot_caption()
+    df_dist, time_snapshot = get_snapshot("distribution")
     
-    col1, col2 = st.columns(2)
-    with col1:
-        st.metric("MongoDB", f"{time_mongo:.0f}ms")
-    with col2:
-        st.metric("MinIO", f"{time_minio:.0f}ms")
+    st.metric("Snapshot", f"{time_snapshot:.0f}ms")
     
     st.divider()
     
@@ -37,4 +28,22 @@ def show():
             st.metric("Montant Min", f"{df_dist['montant_min'].iloc[0]:.2f}€")
             st.metric("Montant Max", f"{df_dist['montant_max'].iloc[0]:.2f}€")
         
+        if "p90" in df_dist.columns:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("P90", f"{df_dist['p90'].iloc[0]:.2f}€")
+            with col2:
+                st.metric("P95", f"{df_dist['p95'].iloc[0]:.2f}€")
+            with col3:
+                st.metric("P99", f"{df_dist['p99'].iloc[0]:.2f}€")
+
+        if "quantiles" in df_dist.columns and df_dist["quantiles"].iloc[0] != "exact":
+            st.caption("Médiane et percentiles estimés (t-digest) : run Gold incrémental ou hors mémoire")
+        
         st.dataframe(df_dist, use_container_width=True)
+    
+    df_hist, _ = get_snapshot("histogramme_montant")
+    
+    if not df_hist.empty:
+        fig = px.bar(df_hist, x="tranche", y="nb_achats", title="Répartition des montants")
+        st.plotly_chart(fig, use_container_width=True)
@@ -1,9 +1,5 @@
 import streamlit as st
-import sys
-from pathlib import Path
-
-sys.path.insert(0, str(Path(__file__).parent.parent))
-from utils import fetch_data, get_minio_data
+from dashboard.utils import fetch_data, get_minio_data, get_snapshot
 
 
 def measure_api_time() -> float:
@@ -17,11 +13,16 @@ def measure_minio_time() -> float:
     return time_taken
 
 
+def measure_snapshot_time() -> float:
+    _, time_taken = get_snapshot("ca_par_pays")
+    return time_taken
+
+
 def show():
     st.header("Accueil")
     
     if st.button("Calculer les temps"):
-        col1, col2 = st.columns(2)
+        col1, col2, col3 = st.columns(3)
         
         with col1:
             st.subheader("MongoDB")
@@ -32,3 +33,8 @@ def show():
             st.subheader("MinIO")
             minio_time = measure_minio_time()
             st.metric("Temps de refresh", f"{minio_time:.2f}ms")
+        
+        with col3:
+            st.subheader("Snapshot")
+            snapshot_time = measure_snapshot_time()
+            st.metric("Temps de refresh", f"{snapshot_time:.2f}ms")
@@ -1,14 +1,20 @@
 import streamlit as st
-import sys
-from pathlib import Path
-
-
-sys.path.insert(0, str(Path(__file__).parent.parent))
-from utils import get_minio_data
+from dashboard.utils import get_manifest, get_minio_data, paginated_table
 
 
 def show():
     st.header("Exploration des données MinIO")
+
+    st.subheader("Catalogue des jeux de données")
+    bucket_manifest = st.radio("Bucket", ["gold", "silver"], horizontal=True)
+    catalogue, time_manifest = get_manifest(bucket_manifest)
+    if catalogue.empty:
+        st.info("Aucun manifest : lancez le pipeline pour le créer")
+    else:
+        st.caption(f"Lu depuis _manifest/ en {time_manifest:.0f}ms")
+        st.dataframe(catalogue.dropna(axis=1, how="all"), use_container_width=True)
+
+    st.divider()
     
     selected_bucket = "gold"
     df, time_minio = get_minio_data(selected_bucket, "")
@@ -33,7 +39,7 @@ def show():
         
 
         st.subheader("Aperçu des données")
-        st.dataframe(df, use_container_width=True)
+        paginated_table(df, key="minio")
         
 
         st.subheader("Filtrage des données")
@@ -46,7 +52,7 @@ def show():
                 selected_value = st.multiselect(f"Valeurs de {selected_column}:", unique_values)
                 if selected_value:
                     df_filtered = df[df[selected_column].isin(selected_value)]
-                    st.dataframe(df_filtered, use_container_width=True)
+                    paginated_table(df_filtered, key="minio_filtre")
         
 
         csv = df.to_csv(index=False)
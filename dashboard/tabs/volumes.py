@@ -1,84 +1,35 @@
 import streamlit as st
-import plotly.express as px
 import pandas as pd
-import sys
-from pathlib import Path
+from dashboard.utils import get_snapshot, line_chart, paginated_table, snapshot_caption
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
-from utils import fetch_data, get_minio_data
+
+def show_volumes(dataset: str, x: str, title: str):
+    """Courbe et table d'un jeu de volumes du snapshot."""
+    df, time_snapshot = get_snapshot(dataset)
+    st.metric("Snapshot", f"{time_snapshot:.0f}ms")
+    
+    st.divider()
+    
+    if not df.empty:
+        line_chart(df, x, "nb_achats", title)
+        paginated_table(df, key=dataset)
 
 
 def show():
     """Affiche l'onglet Volumes avec sous-onglets."""
     st.header("Volumes")
+    snapshot_caption()
     
     sub_tabs = st.tabs(["Par Jour", "Par Mois", "Par An"])
     
     with sub_tabs[0]:
         st.subheader("Volumes par Jour")
-        df_jour, time_mongo = fetch_data("/api/volumes_jour")
-        _, time_minio = get_minio_data("gold", "kpi_volumes_jour")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric("MongoDB", f"{time_mongo:.0f}ms")
-        with col2:
-            st.metric("MinIO", f"{time_minio:.0f}ms")
-        
-        st.divider()
-        
-        if not df_jour.empty:
-            if 'jour' in df_jour.columns:
-                df_jour['jour'] = pd.to_datetime(df_jour['jour'], errors='coerce')
-            
-            fig = px.line(df_jour, x="jour", y="nb_achats", 
-                         title="Nombre d'achats par jour")
-            st.plotly_chart(fig, use_container_width=True)
-            st.dataframe(df_jour, use_container_width=True)
+        show_volumes("volumes_jour", "jour", "Nombre d'achats par jour")
     
     with sub_tabs[1]:
         st.subheader("Volumes par Mois")
-        df_mois, time_mongo = fetch_data("/api/volumes_mois")
-        _, time_minio = get_minio_data("gold", "kpi_volumes_mois")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric("MongoDB", f"{time_mongo:.0f}ms")
-        with col2:
-            st.metric("MinIO", f"{time_minio:.0f}ms")
-        
-        st.divider()
-        
-        if not df_mois.empty:
-
-            if 'mois' in df_mois.columns:
-                df_mois['mois'] = pd.to_datetime(df_mois['mois'], errors='coerce')
-            
-            fig = px.line(df_mois, x="mois", y="nb_achats",
-                        title="Nombre d'achats par mois")
-            st.plotly_chart(fig, use_container_width=True)
-            st.dataframe(df_mois, use_container_width=True)
+        show_volumes("volumes_mois", "mois", "Nombre d'achats par mois")
     
     with sub_tabs[2]:
         st.subheader("Volumes par an")
-        df_jour, time_mongo = fetch_data("/api/volumes_jour")
-        _, time_minio = get_minio_data("gold", "kpi_volumes_jour")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric("MongoDB", f"{time_mongo:.0f}ms")
-        with col2:
-            st.metric("MinIO", f"{time_minio:.0f}ms")
-        
-        st.divider()
-        
-        if not df_jour.empty:
-            if 'jour' in df_jour.columns:
-                df_jour['jour'] = pd.to_datetime(df_jour['jour'], errors='coerce')
-                df_annuel = df_jour.groupby(df_jour['jour'].dt.year)['nb_achats'].sum().reset_index()
-                df_annuel.columns = ['annee', 'nb_achats']
-                
-                fig = px.line(df_annuel, x="annee", y="nb_achats",
-                           title="Nombre d'achats par année")
-                st.plotly_chart(fig, use_container_width=True)
-                st.dataframe(df_annuel, use_container_width=True)
+        show_volumes("volumes_annee", "annee", "Nombre d'achats par année")
@@ -1,13 +1,17 @@
 import streamlit as st
 import pandas as pd
+import plotly.express as px
 import requests
 from io import BytesIO
-import sys
-from pathlib import Path
+import math
 import time
 
-sys.path.append("./flows")
-from config import get_minio_client
+from dashboard.downsampling import downsample
+from flows.config import DASHBOARD_CHART_POINTS, DASHBOARD_PAGE_SIZE, get_minio_client
+from flows.manifest import load_manifest
+from flows.object_cache import read_parquet_cached
+from flows.resilience import io_call, read_object
+from flows.snapshot import current_version, read_manifest, read_snapshot
 
 API_URL = "http://localhost:5000"
 
@@ -27,24 +31,131 @@ def fetch_data(endpoint: str) -> tuple[pd.DataFrame, float]:
     return pd.DataFrame(), elapsed
 
 
-def get_minio_data(bucket: str, prefix: str) -> tuple[pd.DataFrame, float]:
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _load_snapshot(name: str, version: str) -> pd.DataFrame:
+    # une seule copie par processus et par version, partagée par les sessions
+    return read_snapshot(name, version)
+
+
+def get_snapshot(name: str) -> tuple[pd.DataFrame, float]:
+    """
+    Jeu de données du snapshot partagé (publié à chaque run du pipeline).
+
+    Aucune requête API ni MinIO : la charge du backend ne dépend pas du
+    nombre de sessions. Le DataFrame renvoyé est partagé, il ne doit pas
+    être modifié en place.
+    """
+    start = time.time()
+    version = current_version()
+    if version is None:
+        st.warning("Aucun snapshot publié : lancez le pipeline (flows/pipeline.py) ou flows/snapshot.py")
+        return pd.DataFrame(), (time.time() - start) * 1000
+
+    df = _load_snapshot(name, version)
+    return df, (time.time() - start) * 1000
+
+
+def snapshot_caption() -> None:
+    """Afficher la date du snapshot courant."""
+    version = current_version()
+    if version is not None:
+        st.caption(f"Snapshot du {read_manifest(version)['created_at']}")
+
+
+def line_chart(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    title: str,
+    max_points: int = DASHBOARD_CHART_POINTS,
+    method: str = "lttb"
+) -> None:
+    """
+    Courbe sous-échantillonnée côté serveur (voir downsampling.py) : le
+    navigateur reçoit au plus max_points points quelle que soit la longueur
+    de l'historique. Les colonnes sont passées en tableaux NumPy, encodés en
+    binaire par Plotly plutôt qu'en listes JSON.
+    """
+    points = downsample(df, x, y, max_points, method)
+    fig = px.line(x=points[x].to_numpy(), y=points[y].to_numpy(), labels={"x": x, "y": y}, title=title)
+    st.plotly_chart(fig, use_container_width=True)
+    if len(points) < len(df):
+        st.caption(f"{len(points)} points affichés sur {len(df)} ({method})")
+
+
+def paginated_table(df: pd.DataFrame, key: str, page_size: int = DASHBOARD_PAGE_SIZE) -> None:
+    """
+    Table triée et découpée en pages côté serveur : seule la page courante
+    est envoyée au navigateur (sérialisée en Arrow par st.dataframe).
+
+    Args:
+        key: Préfixe unique des widgets de la table
+    """
+    if len(df) <= page_size:
+        st.dataframe(df, use_container_width=True, hide_index=True)
+        return
+
+    n_pages = math.ceil(len(df) / page_size)
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        sort = st.selectbox("Trier par", df.columns, key=f"{key}_sort")
+    with col2:
+        descending = st.toggle("Décroissant", key=f"{key}_desc")
+    with col3:
+        page = st.number_input(f"Page (sur {n_pages})", min_value=1, max_value=n_pages, value=1, key=f"{key}_page")
+
+    start = (page - 1) * page_size
+    rows = df.sort_values(sort, ascending=not descending, kind="stable") if sort else df
+    st.dataframe(rows.iloc[start:start + page_size], use_container_width=True, hide_index=True)
+    st.caption(f"Lignes {start + 1} à {min(start + page_size, len(df))} sur {len(df)}")
+
+
+def get_manifest(bucket: str) -> tuple[pd.DataFrame, float]:
+    """
+    Statistiques des objets Parquet d'un bucket lues dans son manifest :
+    un petit objet JSON par objet Parquet, sans télécharger les données.
+    """
+    start = time.time()
+    try:
+        objects = load_manifest(bucket)["objects"]
+    except Exception:
+        objects = {}
+
+    rows = []
+    for name, entry in sorted(objects.items()):
+        row = {
+            "objet": name,
+            "lignes": entry["rows"],
+            "colonnes": len(entry["columns"]),
+            "taille_ko": round(entry["bytes"] / 1024, 1),
+            "schema": entry["schema_hash"],
+            "écrit le": entry["written_at"],
+        }
+        for column, stats in entry["stats"].items():
+            row[f"{column} min"] = stats["min"]
+            row[f"{column} max"] = stats["max"]
+        rows.append(row)
+
+    return pd.DataFrame(rows), (time.time() - start) * 1000
+
+
+def get_minio_data(bucket: str, prefix: str, columns: list[str] | None = None) -> tuple[pd.DataFrame, float]:
     start = time.time()
     try:
         client = get_minio_client()
-        objects = list(client.list_objects(bucket, prefix=prefix, recursive=True))
+        objects = io_call("minio", lambda: list(client.list_objects(bucket, prefix=prefix, recursive=True)))
         
         dataframes = []
         for obj in objects:
             if obj.object_name.endswith(('.parquet', '.csv', '.json')):
                 try:
-                    data = client.get_object(bucket, obj.object_name)
-                    
                     if obj.object_name.endswith('.parquet'):
-                        df = pd.read_parquet(BytesIO(data.read()))
+                        # cache local partagé entre sessions, lu en memory-map
+                        df = read_parquet_cached(bucket, obj.object_name, columns=columns)
                     elif obj.object_name.endswith('.csv'):
-                        df = pd.read_csv(BytesIO(data.read()))
+                        df = pd.read_csv(BytesIO(read_object(bucket, obj.object_name)))
                     elif obj.object_name.endswith('.json'):
-                        df = pd.read_json(BytesIO(data.read()))
+                        df = pd.read_json(BytesIO(read_object(bucket, obj.object_name)))
                     
                     dataframes.append(df)
                     
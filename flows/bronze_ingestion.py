@@ -1,11 +1,15 @@
-from io import BytesIO
 from pathlib import Path
 
+import pyarrow as pa
 from prefect import flow, task
 
-from config import BUCKET_BRONZE, BUCKET_SOURCES, get_minio_client
+from .caching import put_if_changed
+from .config import BUCKET_BRONZE, BUCKET_SOURCES
+from .handoff import stash
+from .resilience import ensure_bucket, read_object, upload_file
+from .schemas import read_csv_with_schema
 
-@task(name="upload_to_sources", retries=2)
+@task(name="upload_to_sources")
 def upload_csv_to_souces(file_path: str, object_name: str) -> str:
     """
     Upload local CSV file to MinIO sources bucket.
@@ -18,16 +22,12 @@ def upload_csv_to_souces(file_path: str, object_name: str) -> str:
         Object name in MinIO
     """
 
-    client = get_minio_client()
-
-    if not client.bucket_exists(BUCKET_SOURCES):
-        client.make_bucket(BUCKET_SOURCES)
-
-    client.fput_object(BUCKET_SOURCES, object_name, file_path)
+    ensure_bucket(BUCKET_SOURCES)
+    upload_file(BUCKET_SOURCES, object_name, file_path)
     print(f"Uploaded {object_name} to {BUCKET_SOURCES}")
     return object_name
 
-@task(name="copy_to_bronze", retries=2)
+@task(name="copy_to_bronze")
 def copy_to_bronze_layer(object_name: str) -> str:
     """
     Copy data from sources to bronze bucket (raw data lake layer).
@@ -39,32 +39,29 @@ def copy_to_bronze_layer(object_name: str) -> str:
         Object name in bronze layer
     """
 
-    client = get_minio_client()
-
-    if not client.bucket_exists(BUCKET_BRONZE):
-        client.make_bucket(BUCKET_BRONZE)
-    
-    response = client.get_object(BUCKET_SOURCES, object_name)
-    data = response.read()
-    response.close()
-    response.release_conn()
-
-    client.put_object(
-        BUCKET_BRONZE,
-        object_name,
-        BytesIO(data),
-        length=len(data)
-    )
-    print(f"Copied {object_name} to {BUCKET_BRONZE}")
+    data = read_object(BUCKET_SOURCES, object_name)
+
+    if put_if_changed(BUCKET_BRONZE, object_name, data, "text/csv"):
+        print(f"Copied {object_name} to {BUCKET_BRONZE}")
     return object_name
 
+@task(name="parse_bronze")
+def parse_bronze(file_path: str, dataset_name: str) -> pa.Table:
+    """
+    Parse an ingested CSV with the declared schema of its dataset, for the
+    Silver flow of the same pipeline run (same bytes as the Bronze object).
+    """
+    return read_csv_with_schema(file_path, dataset_name)
+
 @flow(name="Bronze Ingestion Flow")
-def bronze_ingestion_flow(data_dir: str = "./data/sources") -> dict:
+def bronze_ingestion_flow(data_dir: str = "./data/sources", keep_tables: bool = False) -> dict:
     """
     Main flow: Upload CSV files to sources and copy to bronze layer.
 
     Args:
         data_dir: Directory containing source CSV files
+        keep_tables: Also parse the CSVs into Arrow tables, handed off under
+            "handoff" (key of handoff.py)
 
     Returns:
         Dictionary with ingested file names
@@ -80,10 +77,17 @@ def bronze_ingestion_flow(data_dir: str = "./data/sources") -> dict:
     bronze_clients = copy_to_bronze_layer(clients_name)
     bronze_achats = copy_to_bronze_layer(achats_name)
 
-    return {
+    result = {
         "clients": bronze_clients,
         "achats": bronze_achats
     }
+    if keep_tables:
+        result["handoff"] = stash({
+            "clients": parse_bronze(clients_file, "clients"),
+            "achats": parse_bronze(achats_file, "achats")
+        })
+
+    return result
 
 if __name__ == "__main__":
     result = bronze_ingestion_flow()
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from minio.error import S3Error
+
+from .config import CACHE_MAX_BYTES, get_minio_client
+from .resilience import ensure_bucket, io_call, put_bytes, read_object, upload_file
+
+FINGERPRINTS_OBJECT = "_fingerprints.json"
+CONTENT_HASH_HEADER = "x-amz-meta-content-hash"
+
+
+def _source_hash() -> str:
+    """Hash of the pipeline source code: any change invalidates the caches."""
+    digest = hashlib.sha256()
+    for path in sorted(Path(__file__).parent.glob("*.py")):
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+CODE_VERSION = os.getenv("PIPELINE_CODE_VERSION") or _source_hash()
+
+
+def _stat(bucket: str, object_name: str):
+    client = get_minio_client()
+    try:
+        return io_call("minio", lambda: client.stat_object(bucket, object_name))
+    except S3Error as e:
+        if e.code in ("NoSuchKey", "NoSuchBucket"):
+            return None
+        raise
+
+
+def get_etag(bucket: str, object_name: str) -> str | None:
+    """ETag of a MinIO object, or None if it does not exist."""
+    stat = _stat(bucket, object_name)
+    return stat.etag if stat else None
+
+
+def fingerprint(inputs: list[tuple[str, str]], *extra) -> str | None:
+    """
+    Fingerprint of a computation: code version + ETags of its inputs.
+
+    Args:
+        inputs: (bucket, object_name) of every upstream object
+        extra: Other parameters that change the result
+
+    Returns:
+        str | None: Hex digest, or None if an input is missing
+    """
+    parts = [CODE_VERSION]
+    for bucket, object_name in inputs:
+        etag = get_etag(bucket, object_name)
+        if etag is None:
+            return None
+        parts.append(f"{bucket}/{object_name}@{etag}")
+    parts.extend(str(value) for value in extra)
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def etag_cache_key(bucket: str, param: str = "object_name"):
+    """
+    Build a Prefect cache_key_fn for a task reading one MinIO object.
+
+    The key changes when the object (ETag), the code or any other
+    parameter of the task changes. Missing objects are never cached.
+    """
+    def cache_key(context, parameters: dict) -> str | None:
+        extra = [f"{name}={value!r}" for name, value in sorted(parameters.items()) if name != param]
+        return fingerprint([(bucket, parameters[param])], context.task.name, *extra)
+
+    return cache_key
+
+
+def load_fingerprints(bucket: str) -> dict:
+    """Fingerprints of the last successful runs writing to a bucket."""
+    try:
+        return json.loads(read_object(bucket, FINGERPRINTS_OBJECT))
+    except S3Error as e:
+        if e.code in ("NoSuchKey", "NoSuchBucket"):
+            return {}
+        raise
+
+
+def is_up_to_date(bucket: str, name: str, key: str | None) -> bool:
+    """
+    True if the last run named name in bucket had the same fingerprint and
+    every object it wrote is still there, unmodified (same ETag).
+    """
+    if key is None:
+        return False
+    last_run = load_fingerprints(bucket).get(name)
+    # ancien format (clé seule) : sorties inconnues, on recalcule
+    if not isinstance(last_run, dict) or last_run["key"] != key:
+        return False
+    return all(get_etag(bucket, object_name) == etag for object_name, etag in last_run["outputs"].items())
+
+
+def save_fingerprint(bucket: str, name: str, key: str | None, outputs: list[str] = ()) -> None:
+    """
+    Record the fingerprint of a successful run and the ETags of the
+    objects it wrote in bucket.
+    """
+    if key is None:
+        return
+    fingerprints = load_fingerprints(bucket)
+    fingerprints[name] = {"key": key, "outputs": {object_name: get_etag(bucket, object_name) for object_name in outputs}}
+    data = json.dumps(fingerprints, indent=2).encode("utf-8")
+    put_if_changed(bucket, FINGERPRINTS_OBJECT, data, "application/json")
+
+
+def json_payload(data: dict, volatile: tuple[str, ...] = ()) -> tuple[bytes, bytes]:
+    """
+    JSON document to upload, and the bytes identifying its content for
+    put_if_changed: the same document without its volatile fields
+    (timestamps), so that regenerating it alone does not rewrite it.
+    """
+    payload = json.dumps(data, indent=2).encode("utf-8")
+    stable = {name: value for name, value in data.items() if name not in volatile}
+    return payload, json.dumps(stable, sort_keys=True).encode("utf-8")
+
+
+def put_if_changed(
+    bucket: str,
+    object_name: str,
+    data: bytes,
+    content_type: str = "application/octet-stream",
+    content_key: bytes | None = None
+) -> bool:
+    """
+    Upload an object only if its content differs from the stored one.
+
+    The SHA-256 of the content is stored as user metadata, which also
+    works for multipart uploads whose ETag is not a content hash.
+
+    Args:
+        content_key: Bytes hashed instead of data (see json_payload)
+
+    Returns:
+        bool: True if the object was written
+    """
+    ensure_bucket(bucket)
+
+    content_hash = hashlib.sha256(data if content_key is None else content_key).hexdigest()
+    stat = _stat(bucket, object_name)
+    if stat is not None and stat.metadata.get(CONTENT_HASH_HEADER) == content_hash:
+        print(f"{object_name} inchangé, pas de réécriture")
+        return False
+
+    put_bytes(bucket, object_name, data, content_type, {"content-hash": content_hash})
+    return True
+
+
+def put_file_if_changed(bucket: str, object_name: str, path: Path, content_type: str = "application/octet-stream") -> bool:
+    """
+    Same as put_if_changed for a local file, hashed and uploaded in chunks
+    so that it never has to fit in memory. Large files are uploaded in
+    resumable parts (see resilience.upload_file).
+
+    Returns:
+        bool: True if the object was written
+    """
+    ensure_bucket(bucket)
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    content_hash = digest.hexdigest()
+
+    stat = _stat(bucket, object_name)
+    if stat is not None and stat.metadata.get(CONTENT_HASH_HEADER) == content_hash:
+        print(f"{object_name} inchangé, pas de réécriture")
+        return False
+
+    upload_file(bucket, object_name, path, content_type, {"content-hash": content_hash}, content_hash)
+    return True
+
+
+def evict_local_cache(max_bytes: int = CACHE_MAX_BYTES) -> int:
+    """
+    Size-bounded eviction of the persisted task results.
+
+    Prefect expires cache entries after CACHE_EXPIRATION; this also keeps
+    the local result storage under max_bytes, removing the least recently
+    used files first.
+
+    Returns:
+        int: Number of files removed
+    """
+    from prefect.settings import PREFECT_LOCAL_STORAGE_PATH
+
+    return evict_lru(Path(PREFECT_LOCAL_STORAGE_PATH.value()), max_bytes)
+
+
+def evict_lru(directory: Path, max_bytes: int, keep: set[Path] = frozenset()) -> int:
+    """
+    Remove the least recently used files of directory until it fits in
+    max_bytes. Files in keep (just written, about to be read) and
+    downloads in progress (*.tmp) are never removed.
+    """
+    if not directory.exists():
+        return 0
+
+    files = [path for path in directory.rglob("*") if path.is_file()]
+    total = sum(path.stat().st_size for path in files)
+    files = [path for path in files if path.suffix != ".tmp" and path not in keep]
+    files.sort(key=lambda path: path.stat().st_atime)
+
+    removed = 0
+    for path in files:
+        if total <= max_bytes:
+            break
+        total -= path.stat().st_size
+        path.unlink(missing_ok=True)
+        removed += 1
+
+    return removed
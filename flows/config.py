@@ -1,13 +1,28 @@
+from __future__ import annotations
+
 import os
+import tempfile
+from datetime import timedelta
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from dotenv import load_dotenv
-from minio import Minio
+# minio et pymongo ne sont importés qu'à la création du premier client :
+# importer la configuration reste léger pour l'API et les flows courts
+if TYPE_CHECKING:
+    from minio import Minio
+    from pymongo.mongo_client import MongoClient
 
-from pymongo.mongo_client import MongoClient
-from pymongo.server_api import ServerApi
+# Fichier .env du répertoire courant ou de la racine du dépôt : python-dotenv
+# (~9 ms, l'essentiel du temps d'import de la configuration) n'est importé
+# que si ce fichier existe, pas quand l'environnement est fourni directement
+ENV_FILE = next(
+    (path for path in (Path.cwd() / ".env", Path(__file__).resolve().parent.parent / ".env") if path.is_file()),
+    None
+)
+if ENV_FILE is not None:
+    from dotenv import load_dotenv
 
-load_dotenv()
+    load_dotenv(ENV_FILE)
 
 # MinIO configuration
 MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "localhost:9000")
@@ -18,6 +33,14 @@ MINIO_SECURE = os.getenv("MINIO_SECURE", "False").lower() == "true"
 # MongoDB configuration
 MONGO_URI = os.getenv("MONGO_URI")
 MONGO_DB = os.getenv("MONGO_DB", "datalake")
+# Un seul MongoClient (et son pool de connexions) partagé par le processus.
+# false (un client par appel) ne sert que de point de comparaison au test de charge
+MONGO_CLIENT_CACHE = os.getenv("MONGO_CLIENT_CACHE", "True").lower() == "true"
+# Volumes jour / mois stockés en documents-buckets (un document par mois
+# ou par année, mesures en tableaux) au lieu d'un document par période
+MONGO_VOLUMES_BUCKETS = os.getenv("MONGO_VOLUMES_BUCKETS", "False").lower() == "true"
+# Délai max pour trouver un serveur MongoDB (30 s par défaut dans pymongo)
+MONGO_TIMEOUT_MS = int(os.getenv("MONGO_TIMEOUT_MS", "5000"))
 
 # Database configuration
 SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", "./data/database/analytics.db")
@@ -25,6 +48,52 @@ SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", "./data/database/analytics.db")
 # Prefect configuration
 PREFECT_API_URL = os.getenv("PREFECT_API_URL", "http://localhost:4200/api")
 
+# Silver configuration
+SILVER_WORKERS = int(os.getenv("SILVER_WORKERS", os.cpu_count() or 1))
+
+# Cache configuration
+CACHE_EXPIRATION = timedelta(hours=int(os.getenv("CACHE_EXPIRATION_HOURS", "24")))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_MB", "2048")) * 1024 * 1024
+
+# Cache local des objets MinIO (Parquet lus en memory-map)
+OBJECT_CACHE_DIR = Path(os.getenv("OBJECT_CACHE_DIR", Path.home() / ".cache" / "datalake"))
+OBJECT_CACHE_MAX_BYTES = int(os.getenv("OBJECT_CACHE_MAX_MB", "4096")) * 1024 * 1024
+
+# Snapshot partagé des jeux de données du dashboard (fichiers Arrow)
+SNAPSHOT_DIR = Path(os.getenv("SNAPSHOT_DIR", Path.home() / ".cache" / "datalake_snapshot"))
+# Délai avant suppression d'une version remplacée : une session qui vient de
+# lire le pointeur CURRENT a le temps d'ouvrir ses fichiers
+SNAPSHOT_GRACE_SECONDS = int(os.getenv("SNAPSHOT_GRACE_SECONDS", "300"))
+# Points max par courbe du dashboard (~ largeur du graphique en pixels) et
+# lignes par page de table : les séries plus longues sont sous-échantillonnées
+DASHBOARD_CHART_POINTS = int(os.getenv("DASHBOARD_CHART_POINTS", "1200"))
+DASHBOARD_PAGE_SIZE = int(os.getenv("DASHBOARD_PAGE_SIZE", "100"))
+
+# Taille des row groups Parquet (granularité des lectures par plage et du filtrage)
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "128000"))
+
+# Budget mémoire de Gold : au-delà, exécution hors mémoire avec fichiers de débordement
+GOLD_MEMORY_BUDGET = int(float(os.getenv("GOLD_MEMORY_BUDGET_MB", "2048")) * 1024 * 1024)
+SPILL_DIR = Path(os.getenv("SPILL_DIR", tempfile.gettempdir()))
+
+# Appels MinIO / MongoDB : nouvelles tentatives par opération (backoff
+# exponentiel avec jitter) et disjoncteur par service
+IO_RETRIES = int(os.getenv("IO_RETRIES", "4"))
+API_IO_RETRIES = int(os.getenv("API_IO_RETRIES", "1"))
+IO_BACKOFF_BASE = float(os.getenv("IO_BACKOFF_BASE_SECONDS", "0.2"))
+IO_BACKOFF_MAX = float(os.getenv("IO_BACKOFF_MAX_SECONDS", "10"))
+IO_BREAKER_THRESHOLD = int(os.getenv("IO_BREAKER_THRESHOLD", "5"))
+IO_BREAKER_RESET = float(os.getenv("IO_BREAKER_RESET_SECONDS", "30"))
+
+# Uploads de fichiers en parties reprenables au-delà de cette taille (min 5 Mo)
+MULTIPART_PART_SIZE = max(int(os.getenv("MULTIPART_PART_MB", "64")), 5) * 1024 * 1024
+
+# Micro-batch : intervalle de scrutation du bucket sources (secondes)
+MICROBATCH_INTERVAL = float(os.getenv("MICROBATCH_INTERVAL_SECONDS", "5"))
+
+# Montants stockés en décimal exact (decimal128) dans les Parquet au lieu de float64
+MONTANT_DECIMAL = os.getenv("MONTANT_DECIMAL", "False").lower() == "true"
+
 # Buckets
 BUCKET_SOURCES = "sources"
 BUCKET_BRONZE = "bronze"
@@ -33,6 +102,8 @@ BUCKET_GOLD = "gold"
 
 def get_minio_client() -> Minio:
     """Initialize and return a MinIO client."""
+    from minio import Minio
+
     return Minio(
         MINIO_ENDPOINT,
         access_key=MINIO_ACCESS_KEY,
@@ -40,9 +111,20 @@ def get_minio_client() -> Minio:
         secure=MINIO_SECURE
     )
 
+_mongo_client = None
+
 def get_mongo_client() -> MongoClient:
-    """Connexion à MongoDB Atlas."""
-    return MongoClient(MONGO_URI, server_api=ServerApi('1'))
+    """Connexion à MongoDB Atlas (partagée par le processus sauf si MONGO_CLIENT_CACHE=false)."""
+    global _mongo_client
+    from pymongo.mongo_client import MongoClient
+    from pymongo.server_api import ServerApi
+
+    if not MONGO_CLIENT_CACHE:
+        return MongoClient(MONGO_URI, server_api=ServerApi('1'), serverSelectionTimeoutMS=MONGO_TIMEOUT_MS)
+
+    if _mongo_client is None:
+        _mongo_client = MongoClient(MONGO_URI, server_api=ServerApi('1'), serverSelectionTimeoutMS=MONGO_TIMEOUT_MS)
+    return _mongo_client
 
 def get_mongo_db():
     """Récupérer la base de données MongoDB."""
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from .caching import get_etag
+from .config import BUCKET_GOLD
+from .object_cache import read_parquet_cached
+
+# Cube Gold : grain et mesures additives
+CUBE_OBJECT = "cube_achats.parquet"
+CUBE_DIMENSIONS = ["jour", "pays", "produit", "annee_inscription"]
+MEASURES = ["nb_achats", "ca_total", "ca_carre"]
+
+# Niveaux de temps dérivés de jour (fréquence de période pandas)
+TIME_LEVELS = {"semaine": "W", "mois": "M", "annee": "Y"}
+DIMENSIONS = CUBE_DIMENSIONS + list(TIME_LEVELS)
+
+_loaded = {"etag": None, "cube": None}
+
+
+def load_cube() -> pd.DataFrame:
+    """Cube Gold gardé en mémoire tant que son ETag ne change pas."""
+    etag = get_etag(BUCKET_GOLD, CUBE_OBJECT)
+    if etag is None:
+        raise FileNotFoundError(f"{BUCKET_GOLD}/{CUBE_OBJECT}")
+
+    if _loaded["etag"] != etag:
+        _loaded["cube"] = read_parquet_cached(BUCKET_GOLD, CUBE_OBJECT)
+        _loaded["etag"] = etag
+
+    return _loaded["cube"]
+
+
+def rollup(
+    cube: pd.DataFrame,
+    dimensions: list[str],
+    filters: dict | None = None,
+    date_debut: str | None = None,
+    date_fin: str | None = None
+) -> pd.DataFrame:
+    """
+    Agréger le cube sur n'importe quel sous-ensemble de dimensions.
+
+    Args:
+        cube: Cube au grain (jour, pays, produit, annee_inscription)
+        dimensions: Dimensions conservées (voir DIMENSIONS), [] pour le total
+        filters: Dimension -> valeurs acceptées
+        date_debut: Premier jour inclus (YYYY-MM-DD)
+        date_fin: Dernier jour inclus (YYYY-MM-DD)
+
+    Returns:
+        pd.DataFrame: nb_achats, ca_total, panier_moyen et ecart_type par groupe
+    """
+    filters = filters or {}
+    unknown = (set(dimensions) | set(filters)) - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Dimensions inconnues : {sorted(unknown)}")
+
+    df = cube
+    if date_debut:
+        df = df[df["jour"] >= pd.Timestamp(date_debut)]
+    if date_fin:
+        df = df[df["jour"] <= pd.Timestamp(date_fin)]
+
+    # Niveaux de temps calculés seulement s'ils sont demandés
+    levels = {
+        level: df["jour"].dt.to_period(freq).astype(str)
+        for level, freq in TIME_LEVELS.items()
+        if level in dimensions or level in filters
+    }
+    if levels:
+        df = df.assign(**levels)
+
+    for col, values in filters.items():
+        df = df[df[col].astype(str).isin([str(value) for value in values])]
+
+    if dimensions:
+        result = df.groupby(dimensions, dropna=False, observed=True)[MEASURES].sum().reset_index()
+    else:
+        result = pd.DataFrame({measure: [df[measure].sum()] for measure in MEASURES})
+
+    n = result["nb_achats"].astype("float64")
+    variance = (result["ca_carre"] - result["ca_total"] ** 2 / n) / (n - 1)
+    result["panier_moyen"] = (result["ca_total"] / n).round(2)
+    result["ecart_type"] = np.sqrt(variance.clip(lower=0)).round(2)
+    result["ca_total"] = result["ca_total"].round(2)
+
+    return result.drop(columns="ca_carre")
@@ -1,21 +1,53 @@
-from io import BytesIO
+from datetime import datetime
+import calendar
+import json
+import time
+import numpy as np
 import pandas as pd
 
+from minio.error import S3Error
 from prefect import flow, task
 
-from config import BUCKET_SILVER, BUCKET_GOLD, get_minio_client
-
-
-@task(name="read_from_silver")
-def read_parquet_from_silver(object_name: str) -> pd.DataFrame:
-    """Lire un fichier Parquet depuis le bucket Silver."""
-    client = get_minio_client()
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .caching import etag_cache_key, evict_local_cache, fingerprint, get_etag, is_up_to_date, json_payload, put_file_if_changed, put_if_changed, save_fingerprint
+from .config import BUCKET_SILVER, BUCKET_GOLD, CACHE_EXPIRATION, PARQUET_ROW_GROUP_SIZE, get_minio_client
+from .cube import CUBE_DIMENSIONS, CUBE_OBJECT, MEASURES
+from .handoff import load, stash
+from .manifest import column_range, object_entry, record_object, upstream_etags
+from .object_cache import cached_path, read_metadata_cached, read_parquet_cached
+from .out_of_core import cleanup, estimate_memory, exceeds_budget, init_spill, iter_partitions, select_row_groups, spill
+from .quality import iter_chunks
+from .resilience import io_call, read_object
+from .schemas import to_arrow, to_pandas, to_parquet
+from .sketches import histogram, init_sketch, is_compressed, quantile, std, update_sketch
+from .windows import WINDOWS_OBJECT, compute_windows
+
+# Objets d'état Gold (mode incrémental)
+GOLD_STATE = "state_gold.json"
+AGG_STATE = CUBE_OBJECT
+SKETCH_MONTANT = "sketch_montant.json"
+FACT_INCREMENTS = "fact_achats_increments/"
+
+# id_client est considéré dense si max(id) < facteur * nombre de clients
+DENSE_LOOKUP_FACTOR = 4
+
+
+@task(
+    name="read_from_silver",
+    cache_key_fn=etag_cache_key(BUCKET_SILVER),
+    cache_expiration=CACHE_EXPIRATION,
+    persist_result=True
+)
+def read_parquet_from_silver(object_name: str, filters: list | None = None, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Lire un fichier Parquet depuis le bucket Silver.
 
-    response = client.get_object(BUCKET_SILVER, object_name)
-    df = pd.read_parquet(BytesIO(response.read()))
-    response.close()
-    response.release_conn()
-    return df
+    Avec columns ou filters, seuls les column chunks et row groups utiles
+    sont téléchargés (lecture par plages HTTP) si l'objet n'est pas en cache.
+    """
+    return read_parquet_cached(BUCKET_SILVER, object_name, columns=columns, filters=filters)
 
 
 @task(name="create_dim_clients")
@@ -28,62 +60,270 @@ def create_dim_clients(clients_df: pd.DataFrame) -> pd.DataFrame:
     return dim
 
 
+def date_key(dates: pd.Series) -> pd.Series:
+    """Clé de substitution entière du jour (AAAAMMJJ) référencée par fact_achats."""
+    key = dates.dt.year * 10000 + dates.dt.month * 100 + dates.dt.day
+    return key.astype("Int32")
+
+
 @task(name="create_dim_temps")
-def create_dim_temps(achats_df: pd.DataFrame) -> pd.DataFrame:
-    """Créer la table dimension temps."""
+def create_dim_temps(date_min: pd.Timestamp, date_max: pd.Timestamp) -> pd.DataFrame:
+    """
+    Créer la table dimension temps : un calendrier au grain jour.
 
-    dates = achats_df["date_achat"].dropna().unique()
-    
-    dim = pd.DataFrame({"date": pd.to_datetime(dates)})
-    dim = dim.drop_duplicates().sort_values("date")
-    
+    Le calendrier couvre tous les jours de date_min à date_max, sa taille
+    ne dépend donc que de la période et pas du nombre d'achats.
+    """
+    if pd.isna(date_min) or pd.isna(date_max):
+        return pd.DataFrame(columns=["id_temps", "date", "annee", "mois", "jour", "semaine", "jour_semaine"])
 
-    dim["annee"] = dim["date"].dt.year
-    dim["mois"] = dim["date"].dt.month
-    dim["jour"] = dim["date"].dt.day
-    dim["semaine"] = dim["date"].dt.isocalendar().week
-    dim["jour_semaine"] = dim["date"].dt.day_name()
+    dates = pd.Series(pd.date_range(date_min.normalize(), date_max.normalize(), freq="D"))
+
+    dim = pd.DataFrame({
+        "id_temps": date_key(dates),
+        "date": dates,
+        "annee": dates.dt.year.astype("int16"),
+        "mois": dates.dt.month.astype("int8"),
+        "jour": dates.dt.day.astype("int8"),
+        "semaine": dates.dt.isocalendar().week.astype("int8").to_numpy(),
+        "jour_semaine": pd.Categorical.from_codes(dates.dt.dayofweek, categories=list(calendar.day_name))
+    })
 
     return dim
 
 
+# Colonnes clients lues par build_client_lookup (lecture projetée)
+CLIENT_LOOKUP_COLUMNS = ["id_client", "pays", "date_inscription"]
+
+
+def build_client_lookup(clients_df: pd.DataFrame) -> dict:
+    """
+    Préparer les attributs clients à diffuser vers chaque chunk / partition.
+
+    Les attributs (pays, annee_inscription) sont encodés en catégories.
+    Si id_client est dense, la ligne de chaque client est rangée dans un
+    tableau indexé directement par id_client, sinon on passe par une table
+    de hachage (pd.Index).
+    """
+    # int64 : les id_client réduits (int16...) déborderaient sur max + 1
+    ids = clients_df["id_client"].to_numpy().astype(np.int64)
+    attributes = {
+        "pays": pd.Categorical(clients_df["pays"]),
+        "annee_inscription": pd.Categorical(clients_df["date_inscription"].dt.year.astype("Int16"))
+    }
+
+    lookup = {"attributes": attributes, "dense": False, "ids": pd.Index(ids)}
+
+    if len(ids) and ids.min() >= 0 and ids.max() < DENSE_LOOKUP_FACTOR * len(ids):
+        table = np.full(ids.max() + 1, -1, dtype=np.int64)
+        table[ids] = np.arange(len(ids))
+        lookup.update(dense=True, table=table)
+
+    return lookup
+
+
+def enrich_with_clients(achats_df: pd.DataFrame, lookup: dict) -> pd.DataFrame:
+    """Ajouter pays et annee_inscription à un chunk d'achats, sans merge."""
+    ids = achats_df["id_client"].to_numpy()
+
+    if lookup["dense"]:
+        table = lookup["table"]
+        valid = ~pd.isna(ids)
+        positions = np.where(valid, ids, -1).astype(np.int64)
+        valid &= (positions >= 0) & (positions < len(table))
+        rows = np.full(len(ids), -1, dtype=np.int64)
+        rows[valid] = table[positions[valid]]
+    else:
+        rows = lookup["ids"].get_indexer(ids)
+
+    # copie superficielle : les colonnes d'achats ne sont pas dupliquées
+    fact = achats_df.copy(deep=False)
+    for col, values in lookup["attributes"].items():
+        codes = np.where(rows >= 0, values.codes[rows], -1)
+        fact[col] = pd.Categorical.from_codes(codes, categories=values.categories)
+    return fact
+
+
+def build_fact(achats_df: pd.DataFrame, lookup: dict) -> pd.DataFrame:
+    """Lignes de faits d'un lot d'achats : attributs clients et clé temps."""
+    fact = enrich_with_clients(achats_df, lookup)
+    fact["id_temps"] = date_key(fact["date_achat"])
+    return fact
+
+
 @task(name="create_fact_achats")
 def create_fact_achats(achats_df: pd.DataFrame, clients_df: pd.DataFrame) -> pd.DataFrame:
-    """Créer la table de faits en joignant achats et clients."""
-    fact = achats_df.merge(
-        clients_df[["id_client", "pays"]], 
-        on="id_client", 
-        how="left"
-    )
+    """Créer la table de faits en enrichissant achats avec les attributs du client."""
+    return build_fact(achats_df, build_client_lookup(clients_df))
+
+
+def sorted_categories(values: pd.Series) -> pd.Series:
+    """Catégorielle aux catégories triées, quel que soit l'ordre du dictionnaire Parquet."""
+    values = values.astype("category")
+    return values.cat.reorder_categories(sorted(values.cat.categories))
+
+
+@task(name="aggregate_achats")
+def aggregate_achats(fact_achats: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cube des achats au grain (jour, pays, produit, annee_inscription).
+
+    Mesures additives : nb_achats, ca_total et ca_carre (somme des carrés),
+    de sorte que moyenne et variance restent calculables après fusion ou
+    agrégation sur n'importe quel sous-ensemble de dimensions. Le cube sert
+    aussi d'état pour le mode incrémental.
+    """
+    df = pd.DataFrame({
+        "jour": fact_achats["date_achat"].dt.normalize(),
+        "pays": sorted_categories(fact_achats["pays"]),
+        "produit": sorted_categories(fact_achats["produit"]),
+        "annee_inscription": fact_achats["annee_inscription"].astype("Int16"),
+        "id_achat": fact_achats["id_achat"],
+        "montant": fact_achats["montant"],
+        "montant_carre": fact_achats["montant"] ** 2
+    })
+
+    state = df.groupby(CUBE_DIMENSIONS, dropna=False, observed=True).agg(
+        nb_achats=("id_achat", "count"),
+        ca_total=("montant", "sum"),
+        ca_carre=("montant_carre", "sum")
+    ).reset_index()
+
+    return state
 
-    return fact
 
+@task(name="merge_aggregates")
+def merge_aggregates(previous: pd.DataFrame | None, delta: pd.DataFrame) -> pd.DataFrame:
+    """Fusionner un delta dans le cube existant."""
+    if previous is None or previous.empty:
+        return delta
+
+    # catégories de l'historique et du delta réunies
+    merged = pd.concat([previous, delta], ignore_index=True)
+    for col in ("pays", "produit"):
+        merged[col] = merged[col].astype(object).astype("category")
+    merged["annee_inscription"] = merged["annee_inscription"].astype("Int16")
+
+    return merged.groupby(CUBE_DIMENSIONS, dropna=False, observed=True).agg(
+        nb_achats=("nb_achats", "sum"),
+        ca_total=("ca_total", "sum"),
+        ca_carre=("ca_carre", "sum")
+    ).reset_index()
+
+
+def reaggregate(parts: pd.DataFrame) -> pd.DataFrame:
+    """Sommer les mesures de morceaux de cube ayant les mêmes dimensions."""
+    return parts.groupby(CUBE_DIMENSIONS, dropna=False, observed=True).agg(
+        **{measure: (measure, "sum") for measure in MEASURES}
+    ).reset_index()
+
+
+def finalize_cube(parts: list[pd.DataFrame]) -> pd.DataFrame:
+    """Assembler des partitions de cube disjointes et rétablir les types du cube."""
+    cube = pd.concat(parts, ignore_index=True)
+    for col in ("pays", "produit"):
+        cube[col] = cube[col].astype("category")
+    cube["annee_inscription"] = cube["annee_inscription"].astype("Int16")
+
+    return cube.sort_values(CUBE_DIMENSIONS, ignore_index=True)
+
+
+@task(name="process_achats_out_of_core")
+def process_achats_out_of_core(
+    clients_df: pd.DataFrame,
+    estimated_bytes: int,
+    min_id_achat: int | None = None,
+    previous_sketch: dict | None = None
+) -> dict:
+    """
+    Faits, cube et sketch des achats Silver sans les charger en entier.
+
+    Les row groups Silver sont lus un par un depuis le cache disque. Chaque
+    lot est enrichi (table clients diffusée), ajouté au fichier de faits
+    local et pré-agrégé au grain du cube. Les agrégats partiels sont
+    répartis par hachage des dimensions dans des fichiers de débordement
+    (SPILL_DIR), puis chaque partition est agrégée séparément : la mémoire
+    est bornée par un lot et une partition.
+
+    Returns:
+        dict: cube, sketch, nb_achats, id_min, id_max et fact_path (fichier
+            de faits local, dans spill_state["directory"])
+    """
+    path = cached_path(BUCKET_SILVER, "achats.parquet")
+    parquet = pq.ParquetFile(path, memory_map=True)
+    lookup = build_client_lookup(clients_df)
+
+    state = init_spill(estimated_bytes)
+    print(f"Gold hors mémoire : {estimated_bytes / 1e6:.0f} Mo estimés, {state['n_partitions']} partitions dans {state['directory']}")
+
+    result = {
+        "sketch": previous_sketch or init_sketch(),
+        "nb_achats": 0,
+        "id_min": None,
+        "id_max": None,
+        "fact_path": state["directory"] / "fact_achats.parquet",
+        "spill_state": state
+    }
+    writer = None
+
+    try:
+        for batch in parquet.iter_batches(row_groups=select_row_groups(parquet.metadata, min_id_achat)):
+            achats = to_pandas(pa.Table.from_batches([batch]))
+            if min_id_achat is not None:
+                achats = achats[achats["id_achat"] > min_id_achat]
+            if achats.empty:
+                continue
+
+            fact = build_fact(achats, lookup)
+            table = to_arrow(fact)
+            if writer is None:
+                writer = pq.ParquetWriter(result["fact_path"], table.schema)
+            writer.write_table(table.cast(writer.schema), row_group_size=PARQUET_ROW_GROUP_SIZE)
+
+            spill(state, aggregate_achats.fn(fact), CUBE_DIMENSIONS)
+            result["sketch"] = update_sketch(result["sketch"], fact["montant"].to_numpy())
+
+            ids = fact["id_achat"]
+            result["nb_achats"] += len(fact)
+            low, high = int(ids.min()), int(ids.max())
+            result["id_min"] = low if result["id_min"] is None else min(low, result["id_min"])
+            result["id_max"] = high if result["id_max"] is None else max(high, result["id_max"])
+
+        if writer is not None:
+            writer.close()
+
+        parts = [reaggregate(part) for part in iter_partitions(state)]
+        result["cube"] = finalize_cube(parts) if parts else None
+    except BaseException:
+        cleanup(state)
+        raise
+
+    return result
 
 
 @task(name="kpi_volumes_par_periode")
-def kpi_volumes_par_periode(fact_achats: pd.DataFrame) -> dict:
-    """KPI: Volumes et CA par jour, semaine, mois."""
-    df = fact_achats.copy()
+def kpi_volumes_par_periode(agg_achats: pd.DataFrame) -> dict:
+    """KPI: Volumes et CA par jour, semaine, mois (depuis l'état agrégé)."""
+    df = agg_achats.groupby("jour").agg(
+        nb_achats=("nb_achats", "sum"),
+        ca_total=("ca_total", "sum")
+    ).reset_index()
     
     # Par jours
-    df["jour"] = df["date_achat"].dt.date
-    volumes_jour = df.groupby("jour").agg(
-        nb_achats=("id_achat", "count"),
-        ca_total=("montant", "sum")
-    ).reset_index()
+    volumes_jour = df.assign(jour=df["jour"].dt.date)
     
     # Par semaine
-    df["semaine"] = df["date_achat"].dt.to_period("W").astype(str)
+    df["semaine"] = df["jour"].dt.to_period("W").astype(str)
     volumes_semaine = df.groupby("semaine").agg(
-        nb_achats=("id_achat", "count"),
-        ca_total=("montant", "sum")
+        nb_achats=("nb_achats", "sum"),
+        ca_total=("ca_total", "sum")
     ).reset_index()
     
     # Par mois
-    df["mois"] = df["date_achat"].dt.to_period("M").astype(str)
+    df["mois"] = df["jour"].dt.to_period("M").astype(str)
     volumes_mois = df.groupby("mois").agg(
-        nb_achats=("id_achat", "count"),
-        ca_total=("montant", "sum")
+        nb_achats=("nb_achats", "sum"),
+        ca_total=("ca_total", "sum")
     ).reset_index()
     
     
@@ -95,15 +335,14 @@ def kpi_volumes_par_periode(fact_achats: pd.DataFrame) -> dict:
 
 
 @task(name="kpi_ca_par_pays")
-def kpi_ca_par_pays(fact_achats: pd.DataFrame) -> pd.DataFrame:
-    """KPI: Chiffre d'affaires par pays."""
-    kpi = fact_achats.groupby("pays").agg(
-        nb_achats=("id_achat", "count"),
-        ca_total=("montant", "sum"),
-        panier_moyen=("montant", "mean")
+def kpi_ca_par_pays(agg_achats: pd.DataFrame) -> pd.DataFrame:
+    """KPI: Chiffre d'affaires par pays (depuis l'état agrégé)."""
+    kpi = agg_achats.groupby("pays", observed=True).agg(
+        nb_achats=("nb_achats", "sum"),
+        ca_total=("ca_total", "sum")
     ).reset_index()
     
-    kpi["panier_moyen"] = kpi["panier_moyen"].round(2)
+    kpi["panier_moyen"] = (kpi["ca_total"] / kpi["nb_achats"]).round(2)
 
     return kpi
 
@@ -120,85 +359,323 @@ def kpi_croissance(volumes_mois: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+@task(name="kpi_fenetres")
+def kpi_fenetres(agg_achats: pd.DataFrame) -> pd.DataFrame:
+    """KPI: Moyennes glissantes et comparaisons décalées par pays (voir windows.WINDOWS)."""
+    return compute_windows(agg_achats)
+
+
+@task(name="build_montant_sketch")
+def build_montant_sketch(fact_achats: pd.DataFrame, previous: dict | None = None) -> dict:
+    """
+    Construire (ou compléter) le sketch statistique des montants.
+
+    Args:
+        fact_achats: Achats à intégrer (table complète ou delta du jour)
+        previous: Sketch déjà calculé sur l'historique
+
+    Returns:
+        dict: Sketch mergeable (moments, t-digest, histogramme)
+    """
+    state = previous or init_sketch()
+    for chunk in iter_chunks(fact_achats):
+        state = update_sketch(state, chunk["montant"].to_numpy())
+
+    return state
+
+
+# Quantiles des montants publiés par kpi_distribution
+DISTRIBUTION_QUANTILES = {"montant_median": 0.5, "p90": 0.90, "p95": 0.95, "p99": 0.99}
+
+
 @task(name="kpi_distribution")
-def kpi_distribution(fact_achats: pd.DataFrame) -> pd.DataFrame:
-    """KPI: Distribution statistique des montants."""
-    montants = fact_achats["montant"]
-    
+def kpi_distribution(sketch: dict, montants: pd.Series | None = None) -> pd.DataFrame:
+    """
+    KPI: Distribution statistique des montants, à partir du sketch.
+
+    Args:
+        sketch: Sketch des montants (moments exacts, t-digest)
+        montants: Tous les montants, quand le run complet les a en
+            mémoire : quantiles exacts. Sinon (run incrémental ou hors
+            mémoire) ils sont estimés par le t-digest.
+
+    Returns:
+        pd.DataFrame: Une ligne ; la colonne quantiles vaut "exact" ou
+            "t-digest" (estimation)
+    """
+    if montants is not None:
+        values = montants.dropna().to_numpy(dtype="float64")
+        quantiles = {name: float(np.quantile(values, q)) for name, q in DISTRIBUTION_QUANTILES.items()}
+        methode = "exact"
+    else:
+        quantiles = {name: quantile(sketch, q) for name, q in DISTRIBUTION_QUANTILES.items()}
+        methode = "t-digest" if is_compressed(sketch) else "exact"
+
     stats = pd.DataFrame([{
-        "nb_achats": len(montants),
-        "montant_moyen": round(montants.mean(), 2),
-        "montant_median": round(montants.median(), 2),
-        "montant_min": round(montants.min(), 2),
-        "montant_max": round(montants.max(), 2),
-        "ecart_type": round(montants.std(), 2)
+        "nb_achats": sketch["count"],
+        "montant_moyen": round(sketch["mean"], 2),
+        "montant_median": round(quantiles["montant_median"], 2),
+        "montant_min": round(sketch["min"], 2),
+        "montant_max": round(sketch["max"], 2),
+        "ecart_type": round(std(sketch), 2),
+        "p90": round(quantiles["p90"], 2),
+        "p95": round(quantiles["p95"], 2),
+        "p99": round(quantiles["p99"], 2),
+        "quantiles": methode
     }])
     
     return stats
 
 
-@task(name="write_to_gold")
-def write_to_gold(df: pd.DataFrame, object_name: str) -> str:
-    """Écrire un DataFrame dans le bucket Gold."""
-    client = get_minio_client()
+@task(name="kpi_histogramme_montant")
+def kpi_histogramme_montant(sketch: dict) -> pd.DataFrame:
+    """KPI: Histogramme des montants par tranche."""
+    return pd.DataFrame(histogram(sketch))
 
 
-    if not client.bucket_exists(BUCKET_GOLD):
-        client.make_bucket(BUCKET_GOLD)
+@task(name="write_json_to_gold")
+def write_json_to_gold(data: dict, object_name: str, volatile: tuple[str, ...] = ()) -> str:
+    """
+    Écrire un objet JSON (état de sketch) dans le bucket Gold, seulement
+    s'il a changé sans compter ses champs volatils (dates de mise à jour).
+    """
+    payload, content_key = json_payload(data, volatile)
+    put_if_changed(BUCKET_GOLD, object_name, payload, "application/json", content_key)
 
-    data = df.to_parquet(index=False)
+    return object_name
 
 
-    client.put_object(
-        BUCKET_GOLD,
-        object_name,
-        BytesIO(data),
-        length=len(data)
-    )
+@task(name="write_to_gold")
+def write_to_gold(df: pd.DataFrame, object_name: str, upstream: dict | None = None) -> str:
+    """
+    Écrire un DataFrame dans le bucket Gold (seulement s'il a changé) et
+    l'enregistrer dans le manifest Gold avec ses objets Silver d'origine.
+    """
+    start = time.perf_counter()
+    data = to_parquet(df, row_group_size=PARQUET_ROW_GROUP_SIZE)
+    serialized = time.perf_counter()
+    written = put_if_changed(BUCKET_GOLD, object_name, data)
+    timings = {"serialize": serialized - start, "upload": time.perf_counter() - serialized}
+    record_object(BUCKET_GOLD, object_name, data, upstream, timings, written)
 
     return object_name
 
 
+@task(name="read_from_gold")
+def read_parquet_from_gold(object_name: str) -> pd.DataFrame | None:
+    """Lire un fichier Parquet du bucket Gold (None s'il n'existe pas)."""
+    try:
+        return read_parquet_cached(BUCKET_GOLD, object_name)
+    except FileNotFoundError:
+        return None
+
+
+@task(name="read_json_from_gold")
+def read_json_from_gold(object_name: str) -> dict | None:
+    """Lire un objet JSON du bucket Gold (None s'il n'existe pas)."""
+    try:
+        return json.loads(read_object(BUCKET_GOLD, object_name))
+    except S3Error as e:
+        if e.code == "NoSuchKey":
+            return None
+        raise
+
+
+@task(name="clear_gold_prefix")
+def clear_gold_prefix(prefix: str) -> int:
+    """Supprimer les objets Gold d'un préfixe (incréments devenus obsolètes)."""
+    client = get_minio_client()
+
+    if not io_call("minio", lambda: client.bucket_exists(BUCKET_GOLD)):
+        return 0
+
+    objects = io_call("minio", lambda: list(client.list_objects(BUCKET_GOLD, prefix=prefix, recursive=True)))
+    for obj in objects:
+        io_call("minio", lambda: client.remove_object(BUCKET_GOLD, obj.object_name))
+
+    return len(objects)
+
+
+def load_silver(dataset_name: str, upstream: dict, min_id_achat: int | None = None) -> pd.DataFrame:
+    """
+    DataFrame Silver passé en mémoire par le pipeline s'il est présent,
+    sinon lu depuis MinIO. min_id_achat ne garde que les achats plus récents.
+    """
+    if dataset_name in upstream:
+        df = upstream[dataset_name]
+        if min_id_achat is not None:
+            df = df[df["id_achat"] > min_id_achat]
+        return df
+
+    filters = [("id_achat", ">", min_id_achat)] if min_id_achat is not None else None
+    return read_parquet_from_silver(f"{dataset_name}.parquet", filters=filters)
+
 
 @flow(name="Gold Transformation Flow")
-def gold_transformation_flow():
+def gold_transformation_flow(incremental: bool = False, upstream: str | None = None, keep_frames: bool = False):
     """
     Flow Gold : créer les dimensions, faits et KPIs.
-    """
 
-    clients_df = read_parquet_from_silver("clients.parquet")
-    achats_df = read_parquet_from_silver("achats.parquet")
+    En mode incrémental, seuls les achats Silver dont l'id_achat dépasse le
+    watermark du dernier run sont lus. Ils sont fusionnés dans l'état agrégé
+    et le sketch des montants persistés en Gold, puis les KPIs sont
+    recalculés depuis cet état. Les achats déjà traités ne sont pas relus :
+    une correction de l'historique demande un run complet.
+
+    Si les achats à lire dépassent GOLD_MEMORY_BUDGET, faits et cube sont
+    calculés hors mémoire (process_achats_out_of_core).
+
+    Args:
+        incremental: Ne traiter que les nouveaux achats depuis le dernier run
+        upstream: Clé handoff des DataFrames Silver gardés en mémoire par le
+            pipeline (clients, achats)
+        keep_frames: Passer aussi les KPIs en mémoire (nom d'objet ->
+            DataFrame), clé handoff sous "handoff"
+    """
+    upstream = load(upstream)
+    inputs = [(BUCKET_SILVER, "clients.parquet"), (BUCKET_SILVER, "achats.parquet")]
+    run_key = fingerprint(inputs, incremental)
+    if is_up_to_date(BUCKET_GOLD, "gold", run_key):
+        print("Gold: Silver, code et sorties inchangés, rien à recalculer")
+        return {}
+
+    gold_state = read_json_from_gold(GOLD_STATE) if incremental else None
+    if incremental and gold_state is None:
+        print("Aucun état Gold trouvé, run complet")
+    elif gold_state is not None and any(get_etag(BUCKET_GOLD, name) is None for name in (AGG_STATE, SKETCH_MONTANT)):
+        # Watermark sans cube ni sketch (état d'une version antérieure,
+        # state_agg_achats.parquet sans annee_inscription, ou objet supprimé) :
+        # l'historique serait perdu, on le recalcule en entier
+        print(f"Watermark trouvé mais {AGG_STATE} ou {SKETCH_MONTANT} absent, run complet")
+        gold_state = None
+
+    lineage = upstream_etags(inputs)
+    min_id_achat = gold_state["watermark_id_achat"] if gold_state else None
+
+    # Le manifest Silver suffit pour savoir s'il y a de nouveaux achats
+    if min_id_achat is not None and "achats" not in upstream:
+        entry = object_entry(BUCKET_SILVER, "achats.parquet", lineage[f"{BUCKET_SILVER}/achats.parquet"])
+        id_range = column_range(entry, "id_achat")
+        if id_range is not None and id_range[1] <= min_id_achat:
+            print(f"Aucun nouvel achat depuis id_achat={min_id_achat} (manifest Silver)")
+            return {}
+
+    clients_df = load_silver("clients", upstream)
+
+    # Achats déjà en mémoire, sinon estimation depuis le footer Parquet
+    estimated_bytes = 0
+    if "achats" not in upstream:
+        metadata = read_metadata_cached(BUCKET_SILVER, "achats.parquet")
+        estimated_bytes = estimate_memory(metadata, min_id_achat)
+    out_of_core = exceeds_budget(estimated_bytes)
+
+    previous_sketch = read_json_from_gold(SKETCH_MONTANT) if gold_state else None
+    if out_of_core:
+        facts = process_achats_out_of_core(clients_df, estimated_bytes, min_id_achat, previous_sketch)
+        delta_agg, sketch = facts["cube"], facts["sketch"]
+    else:
+        achats_df = load_silver("achats", upstream, min_id_achat=min_id_achat)
+        fact_achats = create_fact_achats(achats_df, clients_df)
+        facts = {
+            "nb_achats": len(fact_achats),
+            "id_min": int(fact_achats["id_achat"].min()) if len(fact_achats) else None,
+            "id_max": int(fact_achats["id_achat"].max()) if len(fact_achats) else None
+        }
+        delta_agg = aggregate_achats(fact_achats)
+        sketch = build_montant_sketch(fact_achats, previous_sketch)
+
+    if gold_state is not None and facts["nb_achats"] == 0:
+        print(f"Aucun nouvel achat depuis id_achat={min_id_achat}")
+        if out_of_core:
+            cleanup(facts["spill_state"])
+        return {}
+
+    previous_agg = read_parquet_from_gold(AGG_STATE) if gold_state else None
     
 
     dim_clients = create_dim_clients(clients_df)
-    dim_temps = create_dim_temps(achats_df)
     
 
-    fact_achats = create_fact_achats(achats_df, clients_df)
+    agg_achats = merge_aggregates(previous_agg, delta_agg)
     
 
-    volumes = kpi_volumes_par_periode(fact_achats)
-    ca_pays = kpi_ca_par_pays(fact_achats)
+    volumes = kpi_volumes_par_periode(agg_achats)
+    ca_pays = kpi_ca_par_pays(agg_achats)
     croissance = kpi_croissance(volumes["mois"])
-    distribution = kpi_distribution(fact_achats)
+    fenetres = kpi_fenetres(agg_achats)
+    # run complet en mémoire : quantiles exacts, t-digest sinon
+    montants = fact_achats["montant"] if gold_state is None and not out_of_core else None
+    distribution = kpi_distribution(sketch, montants)
+    histogramme = kpi_histogramme_montant(sketch)
     
 
     results = {}
     
 
-    results["dim_clients"] = write_to_gold(dim_clients, "dim_clients.parquet")
-    results["dim_temps"] = write_to_gold(dim_temps, "dim_temps.parquet")
+    results["dim_clients"] = write_to_gold(dim_clients, "dim_clients.parquet", lineage)
+    
+
+    # Calendrier sur toute la période du cube (historique + nouveaux achats)
+    dim_temps = create_dim_temps(agg_achats["jour"].min(), agg_achats["jour"].max())
+    results["dim_temps"] = write_to_gold(dim_temps, "dim_temps.parquet", lineage)
+
+    if gold_state is None:
+        fact_object = "fact_achats.parquet"
+    else:
+        # Le fait complet est réécrit au prochain run complet
+        fact_object = f"{FACT_INCREMENTS}{facts['id_min']}_{facts['id_max']}.parquet"
+
+    if out_of_core:
+        if facts["nb_achats"]:
+            start = time.perf_counter()
+            written = put_file_if_changed(BUCKET_GOLD, fact_object, facts["fact_path"])
+            timings = {"upload": time.perf_counter() - start}
+            record_object(BUCKET_GOLD, fact_object, facts["fact_path"], lineage, timings, written)
+        cleanup(facts["spill_state"])
+        results["fact_achats"] = fact_object
+    else:
+        results["fact_achats"] = write_to_gold(fact_achats, fact_object, lineage)
+
+    if gold_state is None:
+        clear_gold_prefix(FACT_INCREMENTS)
     
 
-    results["fact_achats"] = write_to_gold(fact_achats, "fact_achats.parquet")
+    results["volumes_jour"] = write_to_gold(volumes["jour"], "kpi_volumes_jour.parquet", lineage)
+    results["volumes_semaine"] = write_to_gold(volumes["semaine"], "kpi_volumes_semaine.parquet", lineage)
+    results["volumes_mois"] = write_to_gold(volumes["mois"], "kpi_volumes_mois.parquet", lineage)
+    results["ca_pays"] = write_to_gold(ca_pays, "kpi_ca_par_pays.parquet", lineage)
+    results["croissance"] = write_to_gold(croissance, "kpi_croissance.parquet", lineage)
+    results["distribution"] = write_to_gold(distribution, "kpi_distribution.parquet", lineage)
+    results["histogramme"] = write_to_gold(histogramme, "kpi_histogramme_montant.parquet", lineage)
+    results["fenetres"] = write_to_gold(fenetres, WINDOWS_OBJECT, lineage)
     
 
-    results["volumes_jour"] = write_to_gold(volumes["jour"], "kpi_volumes_jour.parquet")
-    results["volumes_semaine"] = write_to_gold(volumes["semaine"], "kpi_volumes_semaine.parquet")
-    results["volumes_mois"] = write_to_gold(volumes["mois"], "kpi_volumes_mois.parquet")
-    results["ca_pays"] = write_to_gold(ca_pays, "kpi_ca_par_pays.parquet")
-    results["croissance"] = write_to_gold(croissance, "kpi_croissance.parquet")
-    results["distribution"] = write_to_gold(distribution, "kpi_distribution.parquet")
+    # État pour le prochain run incrémental
+    watermark = facts["id_max"]
+    if gold_state is not None:
+        watermark = max(watermark, gold_state["watermark_id_achat"])
+
+    results["sketch_montant"] = write_json_to_gold(sketch, SKETCH_MONTANT)
+    results["cube_achats"] = write_to_gold(agg_achats, AGG_STATE, lineage)
+    results["gold_state"] = write_json_to_gold({
+        "watermark_id_achat": watermark,
+        "updated_at": datetime.now().isoformat(timespec="seconds")
+    }, GOLD_STATE, volatile=("updated_at",))
+
+    save_fingerprint(BUCKET_GOLD, "gold", run_key, list(results.values()))
+    evict_local_cache()
+
+    if keep_frames:
+        results["handoff"] = stash({
+            "kpi_volumes_jour.parquet": volumes["jour"],
+            "kpi_volumes_semaine.parquet": volumes["semaine"],
+            "kpi_volumes_mois.parquet": volumes["mois"],
+            "kpi_ca_par_pays.parquet": ca_pays,
+            "kpi_croissance.parquet": croissance,
+            "kpi_distribution.parquet": distribution,
+            "kpi_histogramme_montant.parquet": histogramme,
+            WINDOWS_OBJECT: fenetres
+        })
     
     return results
 
@@ -0,0 +1,27 @@
+from uuid import uuid4
+
+# Données passées en mémoire d'une couche à la suivante dans le pipeline.
+# Les paramètres d'un sous-flow Prefect sont validés puis sérialisés
+# (jsonable_encoder) pour être enregistrés avec le flow run : un DataFrame
+# y serait parcouru ligne à ligne avant d'être remplacé par "<DataFrame>".
+# Les flows n'échangent donc qu'une clé, les données restent dans ce dict
+# du process du pipeline.
+_store: dict[str, dict] = {}
+
+
+def stash(data: dict) -> str:
+    """Keep data in memory and return the key to hand to the next flow."""
+    key = uuid4().hex
+    _store[key] = data
+    return key
+
+
+def load(key: str | None) -> dict:
+    """Data stashed under key (empty if no key or already released)."""
+    return _store.get(key, {}) if key else {}
+
+
+def release(key: str | None) -> None:
+    """Drop data once every consumer has read it."""
+    if key:
+        _store.pop(key, None)
@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+import math
+from typing import TYPE_CHECKING
+
+from .config import MONGO_VOLUMES_BUCKETS
+from .resilience import io_call
+from .windows import ALL_COUNTRIES, WINDOWS, WINDOWS_COLLECTION
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Module importé par l'API : ni pandas ni pymongo au chargement. pandas n'est
+# utilisé que côté flows (build_summary, refresh_summary) ; sens de tri
+# identiques à pymongo.ASCENDING / DESCENDING
+ASCENDING = 1
+DESCENDING = -1
+
+# Un document de synthèse par KPI : la table entière, pré-triée et
+# pré-sérialisée, servie par une lecture ponctuelle sur _id
+SUMMARY_COLLECTION = "kpi_summaries"
+SUMMARY_MAX_ROWS = 10_000
+
+# Champs indexés par collection (clé de période ou pays, puis mesures),
+# seuls champs acceptés par le paramètre sort de l'API
+KPI_INDEXES = {
+    "kpi_volumes_jour": ["jour", "nb_achats", "ca_total"],
+    "kpi_volumes_semaine": ["semaine", "nb_achats", "ca_total"],
+    "kpi_volumes_mois": ["mois", "nb_achats", "ca_total"],
+    "kpi_ca_par_pays": ["pays", "nb_achats", "ca_total", "panier_moyen"],
+    "kpi_croissance": ["mois", "croissance_pct"],
+    "kpi_distribution": [],
+    "kpi_histogramme_montant": ["borne_min"],
+    WINDOWS_COLLECTION: ["periode", "ca_total", "ecart_pct"],
+}
+
+# Index composés : lecture d'une fenêtre et de quelques pays par période
+COMPOUND_INDEXES = {
+    WINDOWS_COLLECTION: [["fenetre", "pays", "periode"]],
+}
+
+# KPIs toujours lus avec un filtre : pas de document de synthèse
+FILTERED_KPIS = {WINDOWS_COLLECTION}
+
+# Collections de volumes stockables en buckets : clé de période, nombre de
+# cases par bucket (jours d'un mois, mois d'une année)
+BUCKETED_KPIS = {
+    "kpi_volumes_jour": ("jour", 31),
+    "kpi_volumes_mois": ("mois", 12),
+}
+BUCKET_MEASURES = ["nb_achats", "ca_total"]
+
+# Lots micro-batch déjà ajoutés à un document par $inc, enregistrés dans la
+# même écriture : un lot rejoué après une panne n'est pas compté deux fois.
+# Seuls les derniers APPLIED_MAX lots sont gardés ; champ jamais renvoyé.
+APPLIED_FIELD = "_lots"
+APPLIED_MAX = 50
+HIDDEN_FIELDS = {"_id": 0, APPLIED_FIELD: 0}
+
+# Ordre des lignes du document de synthèse (champ, décroissant)
+SUMMARY_ORDER = {
+    "kpi_volumes_jour": ("jour", False),
+    "kpi_volumes_semaine": ("semaine", False),
+    "kpi_volumes_mois": ("mois", False),
+    "kpi_ca_par_pays": ("ca_total", True),
+    "kpi_croissance": ("mois", False),
+    "kpi_histogramme_montant": ("borne_min", False),
+}
+
+
+def _json_value(value):
+    """Valeur telle que renvoyée par l'API (dates en texte, NaN/Inf en None)."""
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return None
+    return value
+
+
+def build_summary(df: pd.DataFrame, collection_name: str) -> dict | None:
+    """
+    Document de synthèse d'un KPI, ou None si la table est trop grande
+    pour un seul document (l'API lit alors la collection).
+    """
+    if len(df) > SUMMARY_MAX_ROWS or collection_name in FILTERED_KPIS:
+        return None
+
+    order = SUMMARY_ORDER.get(collection_name)
+    if order and order[0] in df.columns:
+        field, descending = order
+        df = df.sort_values(field, ascending=not descending, na_position="first")
+
+    # NA / NaT remplacés par None avant sérialisation
+    records = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+    rows = [{key: _json_value(value) for key, value in row.items()} for row in records]
+
+    return {
+        "_id": collection_name,
+        "rows": rows,
+        "updated_at": datetime.now()
+    }
+
+
+def is_bucketed(collection_name: str) -> bool:
+    return MONGO_VOLUMES_BUCKETS and collection_name in BUCKETED_KPIS
+
+
+def _period_key(collection_name: str) -> str | None:
+    """Champ de période filtrable par debut / fin, None pour les autres KPIs."""
+    return BUCKETED_KPIS[collection_name][0] if collection_name in BUCKETED_KPIS else None
+
+
+def _bucket(collection_name: str, value) -> tuple[str, datetime, int]:
+    """(_id, début, case) du bucket contenant une période."""
+    if collection_name == "kpi_volumes_jour":
+        return f"{value.year}-{value.month:02d}", datetime(value.year, value.month, 1), value.day - 1
+    year, month = int(value[:4]), int(value[5:7])
+    return str(year), datetime(year, 1, 1), month - 1
+
+
+def _period(collection_name: str, debut: datetime, slot: int):
+    """Période d'une case, telle que stockée hors buckets."""
+    if collection_name == "kpi_volumes_jour":
+        return debut + timedelta(days=slot)
+    return f"{debut.year}-{slot + 1:02d}"
+
+
+def to_buckets(records: list[dict], collection_name: str) -> list[dict]:
+    """
+    Regrouper les documents par période en buckets : un document par mois
+    (volumes par jour) ou par année (volumes par mois), chaque mesure en
+    tableau indexé par jour / mois. Les cases sans achat valent 0.
+    """
+    key, slots = BUCKETED_KPIS[collection_name]
+    buckets = {}
+    for record in records:
+        bucket_id, debut, slot = _bucket(collection_name, record[key])
+        bucket = buckets.setdefault(bucket_id, {
+            "_id": bucket_id,
+            "debut": debut,
+            **{measure: [0] * slots for measure in BUCKET_MEASURES}
+        })
+        for measure in BUCKET_MEASURES:
+            bucket[measure][slot] = record[measure]
+    return [buckets[bucket_id] for bucket_id in sorted(buckets)]
+
+
+def from_buckets(docs, collection_name: str) -> list[dict]:
+    """Documents par période (mêmes champs qu'hors buckets) depuis des buckets."""
+    key, _ = BUCKETED_KPIS[collection_name]
+    return [
+        {
+            key: _period(collection_name, doc["debut"], slot),
+            **{measure: doc[measure][slot] for measure in BUCKET_MEASURES}
+        }
+        for doc in sorted(docs, key=lambda doc: doc["debut"])
+        for slot, nb_achats in enumerate(doc["nb_achats"])
+        if nb_achats
+    ]
+
+
+def guarded_increment(document_filter: dict, increments: dict, lot: str):
+    """
+    $inc d'un document sauf s'il a déjà reçu ce lot ; le lot est ajouté à
+    APPLIED_FIELD dans la même écriture (atomique sur le document).
+    """
+    from pymongo import UpdateOne
+
+    return UpdateOne(
+        {**document_filter, APPLIED_FIELD: {"$ne": lot}},
+        {"$inc": increments, "$push": {APPLIED_FIELD: {"$each": [lot], "$slice": -APPLIED_MAX}}}
+    )
+
+
+def bucket_increments(delta: list[dict], collection_name: str, lot: str) -> list:
+    """
+    Opérations d'un bulk_write ordonné ajoutant le delta d'un lot aux
+    buckets : création des buckets manquants, puis un $inc gardé par bucket
+    pour toutes ses cases (voir guarded_increment).
+    """
+    from pymongo import UpdateOne
+
+    key, slots = BUCKETED_KPIS[collection_name]
+    creates, increments = {}, {}
+    for row in delta:
+        bucket_id, debut, slot = _bucket(collection_name, row[key])
+        creates[bucket_id] = UpdateOne(
+            {"_id": bucket_id},
+            {"$setOnInsert": {"debut": debut, **{measure: [0] * slots for measure in BUCKET_MEASURES}}},
+            upsert=True
+        )
+        bucket = increments.setdefault(bucket_id, {})
+        for measure in BUCKET_MEASURES:
+            if measure in row:
+                field = f"{measure}.{slot}"
+                bucket[field] = bucket.get(field, 0) + row[measure]
+    return list(creates.values()) + [
+        guarded_increment({"_id": bucket_id}, fields, lot) for bucket_id, fields in increments.items()
+    ]
+
+
+def parse_range(collection_name: str, debut: str | None, fin: str | None) -> tuple:
+    """
+    Bornes de période de l'API (YYYY-MM-DD, ou YYYY-MM pour les mois).
+
+    Raises:
+        ValueError: si une borne est mal formée ou si la collection n'a pas de période
+    """
+    if debut is None and fin is None:
+        return None, None
+    key = _period_key(collection_name)
+    if key is None:
+        raise ValueError(f"Pas de filtre de période pour {collection_name}")
+
+    def parse(value):
+        if value is None:
+            return None
+        if key == "jour":
+            return datetime.strptime(value, "%Y-%m-%d")
+        return datetime.strptime(value[:7], "%Y-%m").strftime("%Y-%m")
+
+    return parse(debut), parse(fin)
+
+
+def parse_window_range(granularite: str, debut: str | None, fin: str | None) -> tuple:
+    """
+    Bornes de l'API converties en libellés de période de kpi_fenetres
+    (voir windows.GRANULARITIES), comparables aux libellés stockés.
+
+    Jours : YYYY-MM-DD ; semaines : une date, remplacée par le libellé de
+    la semaine (lundi/dimanche) qui la contient ; mois : YYYY-MM (ou une
+    date du mois).
+
+    Raises:
+        ValueError: si une borne est mal formée
+    """
+    def parse(value):
+        if value is None:
+            return None
+        if granularite == "mois":
+            return datetime.strptime(value[:7], "%Y-%m").strftime("%Y-%m")
+        day = datetime.strptime(value[:10], "%Y-%m-%d").date()
+        if granularite == "semaine":
+            monday = day - timedelta(days=day.weekday())
+            return f"{monday.isoformat()}/{(monday + timedelta(days=6)).isoformat()}"
+        return day.isoformat()
+
+    return parse(debut), parse(fin)
+
+
+def _range_query(field: str, debut, fin) -> dict:
+    """Filtre MongoDB field entre debut et fin inclus (bornes facultatives)."""
+    bounds = {}
+    if debut is not None:
+        bounds["$gte"] = debut
+    if fin is not None:
+        bounds["$lte"] = fin
+    return {field: bounds} if bounds else {}
+
+
+def read_rows(db, collection_name: str, debut=None, fin=None) -> list[dict]:
+    """
+    Documents par période d'une collection de KPI, bornes incluses, qu'elle
+    soit stockée en buckets ou non. Seuls les buckets qui recoupent
+    l'intervalle sont lus.
+    """
+    key = _period_key(collection_name)
+
+    if not is_bucketed(collection_name):
+        return list(db[collection_name].find(_range_query(key, debut, fin), HIDDEN_FIELDS))
+
+    query = _range_query(
+        "debut",
+        _bucket(collection_name, debut)[1] if debut is not None else None,
+        _bucket(collection_name, fin)[1] if fin is not None else None
+    )
+    rows = from_buckets(db[collection_name].find(query), collection_name)
+    return [
+        row for row in rows
+        if (debut is None or row[key] >= debut) and (fin is None or row[key] <= fin)
+    ]
+
+
+def create_indexes(db, collection_name: str) -> list[str]:
+    """
+    Créer un index simple sur chaque champ déclaré dans KPI_INDEXES (sur le
+    début de bucket pour les volumes stockés en buckets) et les index
+    composés de COMPOUND_INDEXES.
+    """
+    collection = db[collection_name]
+    fields = ["debut"] if is_bucketed(collection_name) else KPI_INDEXES.get(collection_name, [])
+    names = [collection.create_index([(field, ASCENDING)]) for field in fields]
+    for compound in COMPOUND_INDEXES.get(collection_name, []):
+        names.append(collection.create_index([(field, ASCENDING) for field in compound]))
+    return names
+
+
+def parse_sort(collection_name: str, sort: str) -> tuple[str, int]:
+    """
+    Paramètre sort de l'API : "champ" (croissant) ou "-champ" (décroissant).
+
+    Raises:
+        ValueError: si le champ n'est pas indexé pour cette collection
+    """
+    field = sort.lstrip("-")
+    allowed = KPI_INDEXES.get(collection_name, [])
+    if field not in allowed:
+        raise ValueError(f"Tri impossible sur '{field}', champs indexés : {allowed}")
+    return field, DESCENDING if sort.startswith("-") else ASCENDING
+
+
+def read_kpi(
+    db,
+    collection_name: str,
+    sort: str | None = None,
+    limit: int | None = None,
+    debut: str | None = None,
+    fin: str | None = None
+) -> list[dict]:
+    """
+    Lire un KPI pour l'API.
+
+    Sans tri ni période, le document de synthèse est lu en une requête sur
+    _id. Avec sort, la collection est lue via l'index du champ trié ; avec
+    debut / fin, via l'index de la période (ou du début de bucket). limit
+    s'applique dans tous les cas.
+    """
+    debut, fin = parse_range(collection_name, debut, fin)
+
+    if sort is None and debut is None and fin is None:
+        summary = db[SUMMARY_COLLECTION].find_one({"_id": collection_name}, {"rows": 1})
+        if summary is not None:
+            rows = summary["rows"]
+            return rows[:limit] if limit else rows
+
+    if is_bucketed(collection_name):
+        # tri et limite après décodage des seuls buckets de la période
+        rows = read_rows(db, collection_name, debut, fin)
+        if sort is not None:
+            field, direction = parse_sort(collection_name, sort)
+            rows.sort(key=lambda row: row[field], reverse=direction == DESCENDING)
+        rows = rows[:limit] if limit else rows
+        return [{key: _json_value(value) for key, value in row.items()} for row in rows]
+
+    key = _period_key(collection_name)
+    cursor = db[collection_name].find(_range_query(key, debut, fin), HIDDEN_FIELDS)
+    if sort is not None:
+        cursor = cursor.sort(*parse_sort(collection_name, sort))
+    if limit:
+        cursor = cursor.limit(limit)
+
+    return [{key: _json_value(value) for key, value in doc.items()} for doc in cursor]
+
+
+def read_windows(
+    db,
+    fenetre: str,
+    pays: list[str] | None = None,
+    sort: str | None = None,
+    limit: int | None = None,
+    debut: str | None = None,
+    fin: str | None = None
+) -> list[dict]:
+    """
+    Lire une fenêtre de kpi_fenetres pour l'API, via l'index composé
+    (fenetre, pays, periode).
+
+    Args:
+        pays: Pays à lire, le total de tous les pays si None
+        debut / fin: Bornes incluses selon la granularité de la fenêtre
+            (YYYY-MM-DD pour les jours, une date de la semaine pour les
+            semaines, YYYY-MM pour les mois), voir parse_window_range
+
+    Raises:
+        ValueError: si la fenêtre est inconnue, une borne mal formée ou le
+            tri impossible
+    """
+    if fenetre not in WINDOWS:
+        raise ValueError(f"Fenêtre inconnue '{fenetre}', fenêtres : {list(WINDOWS)}")
+    debut, fin = parse_window_range(WINDOWS[fenetre][0], debut, fin)
+
+    query = {
+        "fenetre": fenetre,
+        "pays": {"$in": pays or [ALL_COUNTRIES]},
+        **_range_query("periode", debut, fin)
+    }
+    cursor = db[WINDOWS_COLLECTION].find(query, {"_id": 0, "fenetre": 0})
+    if sort is not None:
+        cursor = cursor.sort(*parse_sort(WINDOWS_COLLECTION, sort))
+    else:
+        cursor = cursor.sort([("pays", ASCENDING), ("periode", ASCENDING)])
+    if limit:
+        cursor = cursor.limit(limit)
+
+    return [{key: _json_value(value) for key, value in doc.items()} for doc in cursor]
+
+
+def refresh_summary(db, collection_name: str) -> None:
+    """Rebuild the summary document of a KPI from its collection."""
+    import pandas as pd
+
+    df = pd.DataFrame(io_call("mongo", lambda: read_rows(db, collection_name)))
+    summary = build_summary(df, collection_name)
+
+    if summary is not None:
+        io_call("mongo", lambda: db[SUMMARY_COLLECTION].replace_one({"_id": collection_name}, summary, upsert=True))
+    else:
+        io_call("mongo", lambda: db[SUMMARY_COLLECTION].delete_one({"_id": collection_name}))
@@ -0,0 +1,191 @@
+import hashlib
+import json
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from minio.error import S3Error
+
+from .caching import get_etag, put_if_changed
+from .config import get_minio_client
+from .resilience import io_call, read_object
+
+# Manifest des buckets Silver et Gold : pour chaque objet Parquet écrit,
+# nombre de lignes, min / max des colonnes numériques et dates, hash du
+# schéma, ETags des objets amont et durées d'écriture. Les lecteurs s'en
+# servent pour sauter des lectures sans télécharger les données.
+# Une entrée par objet sous MANIFEST_PREFIX : deux writers (threads ou
+# processus) qui décrivent des objets différents n'écrivent jamais le même
+# objet manifest, aucune mise à jour ne peut être perdue.
+MANIFEST_PREFIX = "_manifest/"
+
+
+def upstream_etags(inputs: list[tuple[str, str]]) -> dict:
+    """ETag of every upstream object, keyed by "bucket/object_name"."""
+    return {f"{bucket}/{object_name}": get_etag(bucket, object_name) for bucket, object_name in inputs}
+
+
+def schema_hash(schema: pa.Schema) -> str:
+    """Hash of the column names and types, independent of pandas metadata."""
+    signature = "|".join(f"{field.name}:{field.type}" for field in schema)
+    return hashlib.sha256(signature.encode("utf-8")).hexdigest()[:16]
+
+
+def _has_stats(data_type: pa.DataType) -> bool:
+    # min / max utiles seulement pour les clés, mesures et dates
+    return (
+        pa.types.is_integer(data_type)
+        or pa.types.is_floating(data_type)
+        or pa.types.is_decimal(data_type)
+        or pa.types.is_temporal(data_type)
+    )
+
+
+def _json_value(value):
+    # statistiques Parquet -> types JSON (decimal128 en texte pour garder
+    # la précision, binaires en hexadécimal)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+def _entry_object(object_name: str) -> str:
+    return f"{MANIFEST_PREFIX}{object_name}.json"
+
+
+def _read_entry(bucket: str, object_name: str) -> dict | None:
+    try:
+        return json.loads(read_object(bucket, _entry_object(object_name)))
+    except S3Error as e:
+        if e.code in ("NoSuchKey", "NoSuchBucket"):
+            return None
+        raise
+
+
+def describe_parquet(source) -> dict:
+    """
+    Row count, schema and column statistics of a Parquet file, read from
+    its footer only.
+
+    Args:
+        source: Parquet content (bytes) or local path
+    """
+    if isinstance(source, bytes):
+        metadata = pq.read_metadata(pa.BufferReader(source))
+        size = len(source)
+    else:
+        metadata = pq.read_metadata(str(source))
+        size = Path(source).stat().st_size
+
+    schema = metadata.schema.to_arrow_schema()
+    stats = {}
+    for i, field in enumerate(schema):
+        if not _has_stats(field.type):
+            continue
+        low = high = None
+        nulls = 0
+        for rg in range(metadata.num_row_groups):
+            column_stats = metadata.row_group(rg).column(i).statistics
+            if column_stats is None or not column_stats.has_min_max:
+                continue
+            low = column_stats.min if low is None else min(low, column_stats.min)
+            high = column_stats.max if high is None else max(high, column_stats.max)
+            nulls += column_stats.null_count or 0
+        if low is not None:
+            stats[field.name] = {"min": _json_value(low), "max": _json_value(high), "nulls": nulls}
+
+    return {
+        "rows": metadata.num_rows,
+        "bytes": size,
+        "row_groups": metadata.num_row_groups,
+        "schema_hash": schema_hash(schema),
+        "columns": {field.name: str(field.type) for field in schema},
+        "stats": stats,
+    }
+
+
+def load_manifest(bucket: str) -> dict:
+    """Manifest of a bucket: every entry, keyed by object name (empty if none)."""
+    client = get_minio_client()
+    try:
+        listed = io_call("minio", lambda: list(client.list_objects(bucket, prefix=MANIFEST_PREFIX, recursive=True)))
+    except S3Error as e:
+        if e.code == "NoSuchBucket":
+            return {"bucket": bucket, "objects": {}}
+        raise
+
+    objects = {}
+    for obj in listed:
+        entry = json.loads(read_object(bucket, obj.object_name))
+        objects[entry["object"]] = entry
+    return {"bucket": bucket, "objects": objects}
+
+
+def record_object(
+    bucket: str,
+    object_name: str,
+    source,
+    upstream: dict | None = None,
+    timings: dict | None = None,
+    written: bool = True
+) -> dict:
+    """
+    Add or replace the manifest entry of an object just written.
+
+    If the object was left unchanged (written=False) and its entry is
+    already there, the entry is not rewritten.
+
+    Args:
+        source: Parquet content (bytes) or local path of the object
+        upstream: ETags of the objects it was computed from (upstream_etags)
+        timings: Writer durations in seconds (ex: serialize, upload)
+        written: False if put_if_changed skipped the upload
+
+    Returns:
+        dict: Manifest entry of the object
+    """
+    entry = {"object": object_name, **describe_parquet(source)}
+    entry["etag"] = get_etag(bucket, object_name)
+
+    previous = _read_entry(bucket, object_name)
+    if not written and previous is not None and previous.get("etag") == entry["etag"]:
+        return previous
+
+    entry["upstream"] = upstream or {}
+    entry["timings"] = {name: round(seconds, 4) for name, seconds in (timings or {}).items()}
+    entry["written_at"] = datetime.now().isoformat(timespec="seconds")
+
+    data = json.dumps(entry, indent=2, sort_keys=True).encode("utf-8")
+    put_if_changed(bucket, _entry_object(object_name), data, "application/json")
+
+    return entry
+
+
+def object_entry(bucket: str, object_name: str, etag: str | None = None) -> dict | None:
+    """
+    Manifest entry of an object, or None if it is missing or stale.
+
+    Args:
+        etag: Current ETag of the object if already known (else one HEAD
+            request); an entry recorded for another ETag is ignored
+    """
+    entry = _read_entry(bucket, object_name)
+    if entry is None:
+        return None
+    if etag is None:
+        etag = get_etag(bucket, object_name)
+    return entry if etag is not None and entry.get("etag") == etag else None
+
+
+def column_range(entry: dict | None, column: str) -> tuple | None:
+    """(min, max) of a column recorded in a manifest entry, if any."""
+    if entry is None or column not in entry["stats"]:
+        return None
+    stats = entry["stats"][column]
+    return stats["min"], stats["max"]
@@ -0,0 +1,369 @@
+import argparse
+from datetime import datetime
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from prefect import flow, task
+from pymongo import UpdateOne
+
+from .bronze_ingestion import copy_to_bronze_layer
+from .caching import get_etag
+from .config import BUCKET_BRONZE, BUCKET_SILVER, BUCKET_SOURCES, MICROBATCH_INTERVAL, get_minio_client, get_mongo_db
+from .gold_ingestion import (
+    CLIENT_LOOKUP_COLUMNS,
+    aggregate_achats,
+    build_montant_sketch,
+    create_fact_achats,
+    kpi_ca_par_pays,
+    kpi_croissance,
+    kpi_histogramme_montant,
+    kpi_volumes_par_periode,
+)
+from .kpi_store import bucket_increments, guarded_increment, is_bucketed, read_rows, refresh_summary
+from .manifest import upstream_etags
+from .mongodb_ingestion import GOLD_COLLECTIONS, export_to_mongodb
+from .object_cache import read_parquet_cached, read_table_cached
+from .resilience import io_call
+from .silver_ingestion import (
+    SILVER_STREAM_PREFIX,
+    clean_dataframe,
+    deduplicate,
+    list_stream_objects,
+    read_csv_from_bronze,
+    write_df_to_silver,
+)
+from .schemas import get_schema
+from .snapshot import refresh_snapshot
+
+# Nouveaux fichiers d'achats déposés dans le bucket sources, traités dans
+# l'ordre de leur nom (ex: achats/20261019T132000.csv)
+STREAM_PREFIX = "achats/"
+
+# Curseur : nom du dernier fichier traité, et lot en cours (fichiers et
+# identifiant) tant que ses $inc ne sont pas tous appliqués
+STATE_COLLECTION = "microbatch_state"
+STATE_ID = "achats"
+
+# Collection -> clé du document mis à jour par $inc
+INC_KEYS = {
+    "kpi_volumes_jour": "jour",
+    "kpi_volumes_semaine": "semaine",
+    "kpi_volumes_mois": "mois",
+    "kpi_ca_par_pays": "pays",
+    "kpi_histogramme_montant": "borne_min",
+}
+
+
+def load_cursor(db) -> str | None:
+    """Nom du dernier fichier source traité."""
+    state = io_call("mongo", lambda: db[STATE_COLLECTION].find_one({"_id": STATE_ID}))
+    return state.get("cursor") if state else None
+
+
+def load_pending(db) -> list[str] | None:
+    """Fichiers du lot interrompu avant la fin de ses $inc, s'il y en a un."""
+    state = io_call("mongo", lambda: db[STATE_COLLECTION].find_one({"_id": STATE_ID}))
+    return state.get("pending") if state else None
+
+
+def save_pending(db, object_names: list[str]) -> None:
+    """Enregistrer le lot avant ses $inc : il sera rejoué à l'identique."""
+    io_call("mongo", lambda: db[STATE_COLLECTION].update_one(
+        {"_id": STATE_ID},
+        {"$set": {"pending": object_names, "updated_at": datetime.now()}},
+        upsert=True
+    ))
+
+
+def save_cursor(db, object_name: str) -> None:
+    """Avancer le curseur et clore le lot en cours."""
+    io_call("mongo", lambda: db[STATE_COLLECTION].replace_one(
+        {"_id": STATE_ID},
+        {"_id": STATE_ID, "cursor": object_name, "updated_at": datetime.now()},
+        upsert=True
+    ))
+
+
+def lot_id(object_names: list[str]) -> str:
+    """Identifiant d'un lot, le même à chaque rejeu des mêmes fichiers."""
+    return hashlib.sha256("\n".join(object_names).encode("utf-8")).hexdigest()[:16]
+
+
+def next_batch(db) -> list[str]:
+    """Lot interrompu à rejouer s'il y en a un, sinon les nouveaux fichiers."""
+    return load_pending(db) or list_new_files(load_cursor(db))
+
+
+def list_new_files(cursor: str | None) -> list[str]:
+    """Fichiers CSV de STREAM_PREFIX arrivés après le curseur, dans l'ordre."""
+    client = get_minio_client()
+    if not io_call("minio", lambda: client.bucket_exists(BUCKET_SOURCES)):
+        return []
+
+    objects = io_call("minio", lambda: list(
+        client.list_objects(BUCKET_SOURCES, prefix=STREAM_PREFIX, recursive=True, start_after=cursor)
+    ))
+    return sorted(obj.object_name for obj in objects if obj.object_name.endswith(".csv"))
+
+
+def stream_object(object_name: str) -> str:
+    """Objet Silver (achats_stream/) d'un fichier source."""
+    stem = object_name[len(STREAM_PREFIX):].rsplit(".", 1)[0]
+    return f"{SILVER_STREAM_PREFIX}{stem}.parquet"
+
+
+@task(name="ingest_microbatch_file")
+def ingest_file(object_name: str) -> pd.DataFrame:
+    """Sources -> Bronze -> Silver pour un fichier d'achats."""
+    copy_to_bronze_layer(object_name)
+    df = clean_dataframe(read_csv_from_bronze(object_name, "achats"), "achats")
+
+    write_df_to_silver(df, stream_object(object_name), upstream_etags([(BUCKET_BRONZE, object_name)]))
+    return df
+
+
+def known_ids(exclude: list[str]) -> np.ndarray:
+    """
+    id_achat déjà comptés dans les KPIs : achats Silver du dernier run
+    batch et fichiers micro-batch de achats_stream/, sauf ceux de exclude
+    (le lot en cours). Seule la colonne id_achat est lue.
+    """
+    names = [name for name in list_stream_objects() if name not in set(exclude)]
+    if get_etag(BUCKET_SILVER, "achats.parquet") is not None:
+        names.insert(0, "achats.parquet")
+
+    columns = [read_table_cached(BUCKET_SILVER, name, columns=["id_achat"])["id_achat"] for name in names]
+    if not columns:
+        return np.array([], dtype=np.int64)
+    return pa.chunked_array([chunk for column in columns for chunk in column.chunks], pa.int64()).to_numpy()
+
+
+@task(name="drop_known_achats")
+def drop_known_achats(achats_df: pd.DataFrame, object_names: list[str]) -> pd.DataFrame:
+    """
+    Garder les seuls nouveaux achats d'un lot : un id_achat présent deux
+    fois dans le lot, ou déjà dans Silver ou dans un autre fichier
+    micro-batch (fichier renvoyé, fichiers qui se recouvrent), n'est compté
+    qu'une fois. Le lot rejoué après une panne exclut ses propres fichiers
+    et retrouve donc les mêmes achats.
+    """
+    new = deduplicate(achats_df, get_schema("achats")["keys"])
+    new = new[~new["id_achat"].isin(known_ids([stream_object(name) for name in object_names]))]
+    if len(new) < len(achats_df):
+        print(f"Micro-batch: {len(achats_df) - len(new)} achats déjà comptés ignorés")
+    return new.reset_index(drop=True)
+
+
+def kpi_deltas(fact: pd.DataFrame) -> dict:
+    """
+    Contributions des nouveaux achats aux KPIs additifs.
+
+    Calculées avec les mêmes tâches que Gold, sur le cube des seuls
+    nouveaux achats.
+    """
+    cube = aggregate_achats(fact)
+    volumes = kpi_volumes_par_periode(cube)
+    histogramme = kpi_histogramme_montant(build_montant_sketch(fact))
+
+    return {
+        "kpi_volumes_jour": volumes["jour"],
+        "kpi_volumes_semaine": volumes["semaine"],
+        "kpi_volumes_mois": volumes["mois"],
+        "kpi_ca_par_pays": kpi_ca_par_pays(cube).drop(columns="panier_moyen"),
+        "kpi_histogramme_montant": histogramme[histogramme["nb_achats"] > 0],
+    }
+
+
+def _key_value(value):
+    """Clé telle que stockée par export_to_mongodb (dates en datetime)."""
+    if pd.isna(value):
+        return None
+    if hasattr(value, "year") and not isinstance(value, datetime):
+        return datetime.combine(value, datetime.min.time())
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value
+
+
+@task(name="apply_kpi_deltas")
+def apply_kpi_deltas(deltas: dict, lot: str) -> dict:
+    """
+    Appliquer les deltas d'un lot aux collections MongoDB par $inc.
+
+    Chaque document manquant est d'abord créé à 0, puis reçoit un $inc
+    gardé par l'identifiant du lot (guarded_increment) : rejouer le lot
+    après une panne ne compte aucun achat deux fois. panier_moyen et la
+    croissance mensuelle, non additifs, sont recalculés depuis les
+    collections mises à jour, puis les documents de synthèse lus par l'API
+    sont reconstruits.
+
+    Returns:
+        dict: Collection -> nombre de documents modifiés ou créés
+    """
+    db = get_mongo_db()
+    results = {}
+
+    for collection_name, delta in deltas.items():
+        key = INC_KEYS[collection_name]
+        measures = [col for col in ("nb_achats", "ca_total") if col in delta.columns]
+
+        rows = [
+            {
+                key: _key_value(row[key]),
+                **{col: round(float(row[col]), 2) if col == "ca_total" else int(row[col]) for col in measures}
+            }
+            for row in delta.to_dict(orient="records")
+        ]
+        if not rows:
+            continue
+
+        # création des documents manquants avant les $inc : bulk ordonné
+        if is_bucketed(collection_name):
+            operations = bucket_increments(rows, collection_name, lot)
+        else:
+            operations = [
+                UpdateOne({key: row[key]}, {"$setOnInsert": {col: 0 for col in measures}}, upsert=True)
+                for row in rows
+            ] + [
+                guarded_increment({key: row[key]}, {col: row[col] for col in measures}, lot)
+                for row in rows
+            ]
+
+        # $inc gardés par le lot : le bulk peut être rejoué sans risque
+        result = io_call("mongo", lambda: db[collection_name].bulk_write(operations, ordered=True))
+        results[collection_name] = result.modified_count + result.upserted_count
+
+    if "kpi_ca_par_pays" in results:
+        pays = [_key_value(value) for value in deltas["kpi_ca_par_pays"]["pays"]]
+        io_call("mongo", lambda: db["kpi_ca_par_pays"].bulk_write([
+            UpdateOne({"_id": doc["_id"]}, {"$set": {"panier_moyen": round(doc["ca_total"] / doc["nb_achats"], 2)}})
+            for doc in db["kpi_ca_par_pays"].find({"pays": {"$in": pays}})
+        ]))
+
+    if "kpi_volumes_mois" in results:
+        volumes_mois = pd.DataFrame(io_call("mongo", lambda: read_rows(db, "kpi_volumes_mois")))
+        results["kpi_croissance"] = export_to_mongodb.fn(kpi_croissance.fn(volumes_mois), "kpi_croissance")
+
+    for collection_name in results:
+        refresh_summary(db, collection_name)
+
+    return results
+
+
+@flow(name="Micro-batch Ingestion Flow")
+def microbatch_flow(object_names: list[str]) -> dict:
+    """
+    Traiter un lot de nouveaux fichiers d'achats jusqu'aux KPIs MongoDB.
+
+    Les fichiers passent par Bronze et Silver (achats_stream/), les achats
+    déjà comptés sont écartés (drop_known_achats), les autres sont
+    enrichis avec les clients Silver, puis leurs contributions aux KPIs
+    sont ajoutées aux collections MongoDB. Le lot est enregistré avant
+    les $inc et le curseur n'avance qu'après : un lot interrompu est rejoué
+    à l'identique (next_batch) et ses $inc déjà faits sont ignorés
+    (traitement exactement une fois). Le snapshot du dashboard est ensuite
+    republié avec les KPIs mis à jour.
+
+    Le run batch suivant recalcule tous les KPIs depuis Silver, où les
+    fichiers de achats_stream/ sont fusionnés aux achats ; la distribution
+    (quantiles, écart type) et le cube ne sont mis à jour que par Gold.
+
+    Args:
+        object_names: Fichiers du bucket sources, dans l'ordre d'arrivée
+
+    Returns:
+        dict: Collection -> nombre de documents mis à jour
+    """
+    db = get_mongo_db()
+    save_pending(db, object_names)
+
+    achats_df = pd.concat([ingest_file(name) for name in object_names], ignore_index=True)
+    achats_df = drop_known_achats(achats_df, object_names)
+    if achats_df.empty:
+        results = {}
+    else:
+        # seules les colonnes de jointure : nom et email ne sont pas téléchargés
+        clients_df = read_parquet_cached(BUCKET_SILVER, "clients.parquet", columns=CLIENT_LOOKUP_COLUMNS)
+        fact_achats = create_fact_achats(achats_df, clients_df)
+        results = apply_kpi_deltas(kpi_deltas(fact_achats), lot_id(object_names))
+
+    save_cursor(db, object_names[-1])
+    if results:
+        refresh_dashboard(db, results)
+    print(f"Micro-batch: {len(achats_df)} achats depuis {len(object_names)} fichier(s)")
+    return results
+
+
+def refresh_dashboard(db, collections) -> str:
+    """
+    Republier le snapshot du dashboard avec les KPIs MongoDB mis à jour
+    par un micro-batch, les autres restant ceux du dernier run Gold.
+    """
+    frames = {
+        object_name: pd.DataFrame(io_call("mongo", lambda: read_rows(db, collection)))
+        for object_name, collection in GOLD_COLLECTIONS.items()
+        if collection in collections
+    }
+    return refresh_snapshot(frames)
+
+
+def listen_for_files(wakeup: threading.Event) -> None:
+    """Thread : signaler chaque notification MinIO de création d'objet."""
+    client = get_minio_client()
+    with client.listen_bucket_notification(
+        BUCKET_SOURCES,
+        prefix=STREAM_PREFIX,
+        events=["s3:ObjectCreated:*"]
+    ) as events:
+        for _ in events:
+            wakeup.set()
+
+
+def watch_sources(interval: float = MICROBATCH_INTERVAL, listen: bool = False, max_batches: int | None = None) -> int:
+    """
+    Surveiller le bucket sources et traiter chaque lot de nouveaux fichiers.
+
+    Le curseur (dernier fichier traité) fait foi : les notifications MinIO
+    (listen) servent seulement à se réveiller sans attendre l'intervalle.
+
+    Args:
+        interval: Délai entre deux scrutations sans nouveau fichier (secondes)
+        listen: Se réveiller aussi sur les notifications MinIO
+        max_batches: Arrêter après ce nombre de lots (sans limite si None)
+
+    Returns:
+        int: Nombre de lots traités
+    """
+    db = get_mongo_db()
+    wakeup = threading.Event()
+    if listen:
+        threading.Thread(target=listen_for_files, args=(wakeup,), daemon=True).start()
+
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        names = next_batch(db)
+        if names:
+            microbatch_flow(names)
+            batches += 1
+        else:
+            wakeup.wait(interval)
+            wakeup.clear()
+
+    return batches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingestion micro-batch sources -> KPIs MongoDB")
+    parser.add_argument("--interval", type=float, default=MICROBATCH_INTERVAL)
+    parser.add_argument("--listen", action="store_true", help="Notifications MinIO au lieu de la scrutation")
+    parser.add_argument("--once", action="store_true", help="Traiter les fichiers en attente puis s'arrêter")
+    args = parser.parse_args()
+
+    if args.once:
+        names = next_batch(get_mongo_db())
+        print(microbatch_flow(names) if names else "Aucun nouveau fichier")
+    else:
+        watch_sources(args.interval, args.listen)
@@ -1,11 +1,27 @@
 from datetime import date, datetime
-from io import BytesIO
 import pandas as pd
 
 from prefect import flow, task
 
-from config import get_minio_client, get_mongo_db, BUCKET_GOLD
-
+from .config import get_mongo_db, BUCKET_GOLD
+from .handoff import load
+from .kpi_store import SUMMARY_COLLECTION, build_summary, create_indexes, is_bucketed, to_buckets
+from .object_cache import read_parquet_cached
+from .resilience import io_call
+from .snapshot import refresh_snapshot
+from .windows import WINDOWS_COLLECTION, WINDOWS_OBJECT
+
+# Objet Gold -> collection MongoDB
+GOLD_COLLECTIONS = {
+    "kpi_volumes_jour.parquet": "kpi_volumes_jour",
+    "kpi_volumes_semaine.parquet": "kpi_volumes_semaine",
+    "kpi_volumes_mois.parquet": "kpi_volumes_mois",
+    "kpi_ca_par_pays.parquet": "kpi_ca_par_pays",
+    "kpi_croissance.parquet": "kpi_croissance",
+    "kpi_distribution.parquet": "kpi_distribution",
+    "kpi_histogramme_montant.parquet": "kpi_histogramme_montant",
+    WINDOWS_OBJECT: WINDOWS_COLLECTION
+}
 
 
 @task(name="read_from_gold")
@@ -20,9 +36,7 @@ def read_from_gold(object_name:str)-> pd.DataFrame:
         pd.DataFrame: DataFrame containing the Parquet data
     """
 
-    client = get_minio_client()
-    response = client.get_object(BUCKET_GOLD, object_name)
-    df = pd.read_parquet(BytesIO(response.read()))
+    df = read_parquet_cached(BUCKET_GOLD, object_name)
     print(f"Chargé {object_name}, {len(df)} lignes")
     return df
 
@@ -31,15 +45,22 @@ def export_to_mongodb(df:pd.DataFrame, collection_name:str)-> int:
     """
     Export data from Gold layer to MongoDB.
 
+    The collection is indexed on its period / country key and sortable
+    measures, and its pre-sorted summary document is stored in
+    kpi_summaries. With MONGO_VOLUMES_BUCKETS, daily and monthly volumes
+    are stored as one bucket document per month / year.
+
     Args:
         df: DataFrame to export
         collection_name: Name of the MongoDB collection
 
     Returns:
-        int: Number of documents inserted
+        int: Number of documents inserted (buckets for bucketed volumes)
     """
     db=get_mongo_db()
 
+    summary = build_summary(df, collection_name)
+
     df = df.copy()
     for col in df.columns:
         # convertit les dates en datetime
@@ -52,35 +73,54 @@ def export_to_mongodb(df:pd.DataFrame, collection_name:str)-> int:
 
 
     records= df.to_dict(orient="records")
+    if is_bucketed(collection_name):
+        records = to_buckets(records, collection_name)
 
-    # deelte l'ancienne collection
-    db[collection_name].drop()
+    def replace_collection():
+        # deelte l'ancienne collection (rejouable : un insert partiel est effacé)
+        db[collection_name].drop()
+        if records:
+            db[collection_name].insert_many(records)
 
+    io_call("mongo", replace_collection)
     if records:
-        db[collection_name].insert_many(records)
         print(f"Exported {len(records)} documents to '{collection_name}'")
+
+    io_call("mongo", lambda: create_indexes(db, collection_name))
+
+    if summary is not None:
+        io_call("mongo", lambda: db[SUMMARY_COLLECTION].replace_one({"_id": collection_name}, summary, upsert=True))
+    else:
+        io_call("mongo", lambda: db[SUMMARY_COLLECTION].delete_one({"_id": collection_name}))
+
     return len(records)
 
 @flow(name="MongoDB Ingestion Flow")
-def mongodb_ingestion_flow():
+def mongodb_ingestion_flow(upstream: str | None = None):
     """
     Main flow to ingest data from Gold layer to MongoDB.
+
+    Args:
+        upstream: handoff key of the Gold KPIs kept in memory by the
+            pipeline (object name -> DataFrame), the others are read from MinIO
+
+    Once MongoDB is up to date, the dashboard snapshot is republished from
+    the same KPIs so both stay in step.
+
+    Returns:
+        dict: Documents written per collection, and the published
+            snapshot version under "snapshot"
     """
-    fichiers = {
-        "kpi_volumes_jour.parquet": "kpi_volumes_jour",
-        "kpi_volumes_semaine.parquet": "kpi_volumes_semaine",
-        "kpi_volumes_mois.parquet": "kpi_volumes_mois",
-        "kpi_ca_par_pays.parquet": "kpi_ca_par_pays",
-        "kpi_croissance.parquet": "kpi_croissance",
-        "kpi_distribution.parquet": "kpi_distribution"
-    }
-    
+    frames = dict(load(upstream))
     results = {}
     
-    for fichier, collection in fichiers.items():
-        df = read_from_gold(fichier)
-        count = export_to_mongodb(df, collection)
+    for fichier, collection in GOLD_COLLECTIONS.items():
+        if fichier not in frames:
+            frames[fichier] = read_from_gold(fichier)
+        count = export_to_mongodb(frames[fichier], collection)
         results[collection] = count
+
+    results["snapshot"] = refresh_snapshot(frames)
     
     return results
 
@@ -89,5 +129,6 @@ if __name__ == "__main__":
 
     print(f"MongoDB ingestion complete: {result}")
 
+    print(f"Snapshot: {result.pop('snapshot')}")
     for collection, count in result.items():
         print(f"{collection}: {count} documents")
\ No newline at end of file
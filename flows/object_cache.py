@@ -0,0 +1,129 @@
+import os
+import uuid
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from minio.error import S3Error
+
+from .caching import evict_lru, get_etag
+from .config import OBJECT_CACHE_DIR, OBJECT_CACHE_MAX_BYTES, get_minio_client
+from .range_reader import MinioRangeFile, read_table_ranges
+from .resilience import io_call
+from .schemas import to_pandas
+
+
+def _entry(bucket: str, object_name: str) -> Path:
+    """Path of the cache entry of the current version of an object."""
+    etag = get_etag(bucket, object_name)
+    if etag is None:
+        raise FileNotFoundError(f"{bucket}/{object_name}")
+
+    directory = OBJECT_CACHE_DIR / bucket / object_name.replace("/", "__")
+    return directory / f"{etag.strip(chr(34))}{Path(object_name).suffix}"
+
+
+def _download(bucket: str, object_name: str, etag: str, file_path: Path) -> None:
+    """
+    Conditional GET (If-Match) of an object into a local file: MinIO answers
+    PreconditionFailed instead of sending a body rewritten since the HEAD.
+    """
+    client = get_minio_client()
+
+    def download() -> None:
+        response = client.get_object(bucket, object_name, request_headers={"If-Match": f'"{etag}"'})
+        try:
+            with open(file_path, "wb") as file:
+                for data in response.stream(amt=1024 * 1024):
+                    file.write(data)
+        finally:
+            response.close()
+            response.release_conn()
+
+    io_call("minio", download)
+
+
+def cached_path(bucket: str, object_name: str, entry: Path | None = None) -> Path:
+    """
+    Local copy of a MinIO object, keyed by bucket / object / ETag.
+
+    Only a HEAD request is made when the cached version is current, and a
+    download only succeeds if the object still has the ETag of the entry
+    (else the new version is fetched under its own ETag). Older
+    versions of the object are removed (never the downloads in progress of
+    other processes) and the cache is kept under OBJECT_CACHE_MAX_BYTES by
+    LRU eviction, the returned file excluded.
+
+    Args:
+        bucket: Name of the bucket
+        object_name: Name of the object
+        entry: Cache entry already resolved by _entry
+
+    Returns:
+        Path: Path of the cached file
+    """
+    path = entry or _entry(bucket, object_name)
+
+    if path.exists():
+        # mise à jour de l'atime pour l'éviction LRU (montages noatime)
+        os.utime(path)
+        return path
+
+    directory = path.parent
+    directory.mkdir(parents=True, exist_ok=True)
+    for stale in directory.iterdir():
+        if stale.suffix != ".tmp":
+            stale.unlink(missing_ok=True)
+
+    # téléchargement dans un fichier temporaire puis renommage atomique
+    tmp_path = directory / f".{uuid.uuid4().hex}.tmp"
+    try:
+        _download(bucket, object_name, path.stem, tmp_path)
+    except BaseException as e:
+        tmp_path.unlink(missing_ok=True)
+        if not (isinstance(e, S3Error) and e.code == "PreconditionFailed"):
+            raise
+        # objet réécrit entre le HEAD et le GET : entrée du nouvel ETag
+        return cached_path(bucket, object_name)
+    os.replace(tmp_path, path)
+
+    evict_lru(OBJECT_CACHE_DIR, OBJECT_CACHE_MAX_BYTES, keep={path})
+    return path
+
+
+def read_table_cached(bucket: str, object_name: str, columns: list[str] | None = None, filters: list | None = None) -> pa.Table:
+    """
+    Read a Parquet object as an Arrow table.
+
+    A cached copy is opened through a memory map. Otherwise a projected or
+    filtered read only fetches the needed byte ranges from MinIO, and a
+    full read downloads the object into the cache.
+    """
+    entry = _entry(bucket, object_name)
+
+    if not entry.exists() and (columns is not None or filters is not None):
+        return read_table_ranges(bucket, object_name, columns, filters)
+
+    path = cached_path(bucket, object_name, entry)
+    try:
+        return pq.read_table(path, columns=columns, filters=filters, memory_map=True)
+    except FileNotFoundError:
+        # évincé par un autre process entre-temps : nouveau téléchargement
+        path = cached_path(bucket, object_name, entry)
+        return pq.read_table(path, columns=columns, filters=filters, memory_map=True)
+
+
+def read_parquet_cached(bucket: str, object_name: str, columns: list[str] | None = None, filters: list | None = None) -> pd.DataFrame:
+    """Read a Parquet object as a DataFrame (see read_table_cached and schemas.to_pandas)."""
+    return to_pandas(read_table_cached(bucket, object_name, columns, filters))
+
+
+def read_metadata_cached(bucket: str, object_name: str) -> pq.FileMetaData:
+    """Parquet footer of an object: from the cache, else by range requests."""
+    entry = _entry(bucket, object_name)
+    if entry.exists():
+        return pq.read_metadata(entry, memory_map=True)
+
+    with pa.PythonFile(MinioRangeFile(bucket, object_name), mode="r") as source:
+        return pq.read_metadata(source)
@@ -0,0 +1,122 @@
+import math
+import shutil
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .config import GOLD_MEMORY_BUDGET, SPILL_DIR
+
+
+def select_row_groups(metadata: pq.FileMetaData, min_id_achat: int | None = None) -> list[int]:
+    """
+    Row groups a Gold run has to read.
+
+    With min_id_achat, row groups whose id_achat statistics show they only
+    hold older purchases are skipped.
+    """
+    names = [metadata.schema.column(i).name for i in range(metadata.num_columns)]
+    selected = []
+
+    for i in range(metadata.num_row_groups):
+        if min_id_achat is not None and "id_achat" in names:
+            stats = metadata.row_group(i).column(names.index("id_achat")).statistics
+            if stats is not None and stats.has_min_max and stats.max <= min_id_achat:
+                continue
+        selected.append(i)
+
+    return selected
+
+
+def estimate_memory(metadata: pq.FileMetaData, min_id_achat: int | None = None) -> int:
+    """Uncompressed size of the row groups to read, from the Parquet footer only."""
+    return sum(
+        metadata.row_group(i).total_byte_size
+        for i in select_row_groups(metadata, min_id_achat)
+    )
+
+
+def exceeds_budget(estimated_bytes: int, budget: int = GOLD_MEMORY_BUDGET) -> bool:
+    return estimated_bytes > budget
+
+
+def init_spill(estimated_bytes: int, budget: int = GOLD_MEMORY_BUDGET) -> dict:
+    """
+    Spill state of a partitioned hash aggregation.
+
+    The number of partitions is chosen so that one partition of the input
+    fits in half of the budget.
+    """
+    n_partitions = max(2, math.ceil(2 * estimated_bytes / max(budget, 1)))
+    SPILL_DIR.mkdir(parents=True, exist_ok=True)
+    return {
+        "directory": Path(tempfile.mkdtemp(prefix="gold_spill_", dir=SPILL_DIR)),
+        "n_partitions": n_partitions,
+        "writers": {},
+        "schema": None,
+        "rows": 0
+    }
+
+
+def spill(state: dict, df: pd.DataFrame, keys: list[str]) -> None:
+    """
+    Hash-partition df on keys and append each part to its spill file.
+
+    Categorical keys are written as plain strings so that every batch has
+    the same Arrow schema, whatever its categories.
+    """
+    if df.empty:
+        return
+
+    df = df.assign(**{
+        col: df[col].astype(object)
+        for col in keys
+        if isinstance(df[col].dtype, pd.CategoricalDtype)
+    })
+    row_hash = pd.util.hash_pandas_object(df[keys], index=False).to_numpy()
+    partition_ids = row_hash % state["n_partitions"]
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if state["schema"] is None:
+        state["schema"] = table.schema
+    table = table.cast(state["schema"])
+
+    for partition in range(state["n_partitions"]):
+        part = table.filter(pa.array(partition_ids == partition))
+        if part.num_rows == 0:
+            continue
+        writer = state["writers"].get(partition)
+        if writer is None:
+            path = state["directory"] / f"part_{partition:04d}.arrow"
+            writer = pa.ipc.new_file(path, state["schema"])
+            state["writers"][partition] = writer
+        writer.write_table(part)
+
+    state["rows"] += len(df)
+
+
+def iter_partitions(state: dict):
+    """Yield each spilled partition as a DataFrame, removing its file once read."""
+    for writer in state["writers"].values():
+        writer.close()
+
+    for partition in sorted(state["writers"]):
+        path = state["directory"] / f"part_{partition:04d}.arrow"
+        with pa.memory_map(str(path)) as source:
+            df = pa.ipc.open_file(source).read_all().to_pandas()
+        path.unlink()
+        yield df
+
+    state["writers"] = {}
+
+
+def cleanup(state: dict) -> None:
+    """Remove the spill directory (also after a failure)."""
+    for writer in state["writers"].values():
+        try:
+            writer.close()
+        except (OSError, pa.ArrowInvalid):
+            pass
+    shutil.rmtree(state["directory"], ignore_errors=True)
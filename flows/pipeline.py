@@ -0,0 +1,99 @@
+import argparse
+from pathlib import Path
+
+from prefect import flow
+
+from .bronze_ingestion import bronze_ingestion_flow
+from .config import SILVER_WORKERS
+from .gold_ingestion import gold_transformation_flow
+from .handoff import release, stash
+from .mongodb_ingestion import mongodb_ingestion_flow
+from .silver_ingestion import silver_transformation_flow
+
+LAYERS = ["bronze", "silver", "gold", "mongodb"]
+
+
+@flow(name="Data Lake Pipeline")
+def pipeline_flow(
+    start_from: str = "bronze",
+    data_dir: str = "./data/sources",
+    parallel: bool = False,
+    n_workers: int = SILVER_WORKERS,
+    incremental: bool = False
+) -> dict:
+    """
+    Flow parent : enchaîne Bronze, Silver, Gold et MongoDB en sous-flows.
+
+    Chaque couche est toujours persistée dans MinIO, mais la couche suivante
+    reçoit les données en mémoire au lieu de les retélécharger et de les
+    reparser : Bronze parse les CSV une fois et passe les tables Arrow à
+    Silver, Silver passe ses DataFrames à Gold et Gold ses KPIs à MongoDB.
+    Seule une clé handoff passe en paramètre des sous-flows (voir
+    handoff.py). En mode parallèle, Silver reçoit les chemins des CSV pour
+    que chaque worker parse sa plage. Une reprise partielle (start_from)
+    lit la première couche depuis MinIO. Le snapshot du dashboard est
+    republié par le flow MongoDB, qui termine toujours le run.
+
+    Args:
+        start_from: Première couche exécutée (bronze, silver, gold, mongodb)
+        data_dir: Répertoire des CSV sources
+        parallel: Nettoyage Silver partitionné sur un pool de processus
+        n_workers: Nombre de processus en mode parallèle
+        incremental: Gold incrémental
+
+    Returns:
+        dict: Résultat de chaque couche exécutée
+    """
+    if start_from not in LAYERS:
+        raise ValueError(f"start_from doit être l'une des couches {LAYERS}")
+
+    layers = LAYERS[LAYERS.index(start_from):]
+    results = {}
+    upstream = None
+
+    if "bronze" in layers:
+        bronze = bronze_ingestion_flow(data_dir, keep_tables=not parallel)
+        upstream = bronze.pop("handoff", None)
+        if parallel:
+            # Bronze est une copie des CSV sources : les workers Silver en
+            # lisent chacun une plage en local
+            upstream = stash({
+                "clients": str(Path(data_dir) / "clients.csv"),
+                "achats": str(Path(data_dir) / "achats.csv")
+            })
+        results["bronze"] = bronze
+
+    if "silver" in layers:
+        silver = silver_transformation_flow(parallel, n_workers, upstream=upstream, keep_frames=True)
+        release(upstream)
+        upstream = silver.pop("handoff", None)
+        results["silver"] = silver
+
+    if "gold" in layers:
+        gold = gold_transformation_flow(incremental, upstream=upstream, keep_frames=True)
+        release(upstream)
+        upstream = gold.pop("handoff", None)
+        results["gold"] = gold
+
+    if "mongodb" in layers:
+        results["mongodb"] = mongodb_ingestion_flow(upstream=upstream)
+        release(upstream)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline complet Bronze -> MongoDB")
+    parser.add_argument("--from", dest="start_from", choices=LAYERS, default="bronze")
+    parser.add_argument("--data-dir", default="./data/sources")
+    parser.add_argument("--parallel", action="store_true")
+    parser.add_argument("--incremental", action="store_true")
+    args = parser.parse_args()
+
+    result = pipeline_flow(
+        start_from=args.start_from,
+        data_dir=args.data_dir,
+        parallel=args.parallel,
+        incremental=args.incremental
+    )
+    print(f"Pipeline complete: {result}")
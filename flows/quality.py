@@ -0,0 +1,209 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Règles de qualité par dataset
+# - not_null: ratio minimal de valeurs renseignées par colonne
+# - ranges: bornes (min, max) acceptées pour une colonne numérique
+# - unique: colonnes devant être uniques (comptage exact des doublons sur
+#   le dataset entier ou sur chaque partition de hachage de la clé)
+# - references: colonne -> dataset dont la clé doit contenir les valeurs
+# - date_bounds: bornes (min, max) des dates, None = pas de borne / maintenant
+QUALITY_RULES = {
+    "clients": {
+        "not_null": {"id_client": 1.0, "email": 0.95, "pays": 0.99, "date_inscription": 0.95},
+        "ranges": {},
+        "unique": ["id_client"],
+        "references": {},
+        "date_bounds": {"date_inscription": ("2000-01-01", None)},
+    },
+    "achats": {
+        "not_null": {"id_achat": 1.0, "id_client": 1.0, "montant": 1.0, "date_achat": 0.99},
+        "ranges": {"montant": (0, 10_000)},
+        "unique": ["id_achat"],
+        "references": {"id_client": "clients"},
+        "date_bounds": {"date_achat": ("2000-01-01", None)},
+    },
+}
+
+CHUNK_SIZE = 250_000
+
+
+def get_rules(dataset_name: str) -> dict:
+    """Return the quality rules of a dataset (no rule if unknown)."""
+    empty = {"not_null": {}, "ranges": {}, "unique": [], "references": {}, "date_bounds": {}}
+    return QUALITY_RULES.get(dataset_name, empty)
+
+
+def iter_chunks(df: pd.DataFrame, chunk_size: int = CHUNK_SIZE):
+    """
+    Yield row slices of a DataFrame without copying it.
+
+    The dataset itself is already in memory (Silver deduplicates it as a
+    whole); slicing bounds the temporaries of each rule (masks, isin).
+    Uniqueness is not chunked: see count_duplicates.
+    """
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def init_state() -> dict:
+    """Empty quality state, to be filled chunk by chunk."""
+    return {
+        "nb_rows": 0,
+        "non_null": {},
+        "out_of_range": {},
+        "min": {},
+        "max": {},
+        "orphans": {},
+        "duplicates": {},
+    }
+
+
+def update_state(state: dict, chunk: pd.DataFrame, rules: dict, references: dict | None = None) -> dict:
+    """
+    Evaluate every rule on one chunk and accumulate the counters.
+
+    Args:
+        state: State returned by init_state or a previous update
+        chunk: Slice of the dataset
+        rules: Quality rules of the dataset
+        references: Dataset name -> array of valid keys
+
+    Returns:
+        dict: Updated state
+    """
+    references = references or {}
+    state["nb_rows"] += len(chunk)
+
+    for col, count in chunk.notna().sum().items():
+        state["non_null"][col] = state["non_null"].get(col, 0) + int(count)
+
+    bounded = {**rules["ranges"], **rules["date_bounds"]}
+    for col, (low, high) in bounded.items():
+        if col not in chunk.columns:
+            continue
+        values = chunk[col]
+        low, high = _bound(low, values), _bound(high, values)
+        bad = pd.Series(False, index=values.index)
+        if low is not None:
+            bad |= values < low
+        if high is not None:
+            bad |= values > high
+        state["out_of_range"][col] = state["out_of_range"].get(col, 0) + int(bad.sum())
+        _merge_extreme(state, col, values.min(), values.max())
+
+    for col, dataset in rules["references"].items():
+        if col in chunk.columns and dataset in references:
+            values = chunk[col].dropna()
+            orphans = int((~values.isin(references[dataset])).sum())
+            state["orphans"][col] = state["orphans"].get(col, 0) + orphans
+
+    return state
+
+
+def count_duplicates(state: dict, df: pd.DataFrame, rules: dict) -> dict:
+    """
+    Count the duplicated values of the unique columns, exactly.
+
+    A duplicate can sit in any two chunks, so the count runs once over the
+    whole frame (one hash table of the keys, like the Silver dedup). States
+    of frames that share no key, such as the hash partitions of Silver on
+    that key, add up to the exact count of the whole dataset.
+
+    Args:
+        state: Quality state of df
+        df: Whole dataset or one key hash partition of it
+        rules: Quality rules of the dataset
+
+    Returns:
+        dict: Updated state
+    """
+    for col in rules["unique"]:
+        if col in df.columns:
+            duplicates = int(df[col].dropna().duplicated().sum())
+            state["duplicates"][col] = state["duplicates"].get(col, 0) + duplicates
+    return state
+
+
+def merge_states(left: dict, right: dict) -> dict:
+    """Combine the states of two chunks or partitions."""
+    merged = init_state()
+    merged["nb_rows"] = left["nb_rows"] + right["nb_rows"]
+    for counter in ("non_null", "out_of_range", "orphans", "duplicates"):
+        for col in left[counter].keys() | right[counter].keys():
+            merged[counter][col] = left[counter].get(col, 0) + right[counter].get(col, 0)
+    for state in (left, right):
+        for col in state["min"]:
+            _merge_extreme(merged, col, state["min"][col], state["max"][col])
+    return merged
+
+
+def build_report(state: dict, rules: dict, dataset_name: str) -> dict:
+    """
+    Turn a quality state into a compact JSON-serializable report.
+
+    Args:
+        state: Final state over the whole dataset
+        rules: Quality rules of the dataset
+        dataset_name: Name of the dataset
+
+    Returns:
+        dict: Report with one entry per rule and a global status
+    """
+    nb_rows = state["nb_rows"]
+    results = []
+
+    for col, threshold in rules["not_null"].items():
+        ratio = state["non_null"].get(col, 0) / nb_rows if nb_rows else 0.0
+        results.append(_result("not_null", col, round(ratio, 4), threshold, ratio >= threshold))
+
+    for col in {**rules["ranges"], **rules["date_bounds"]}:
+        count = state["out_of_range"].get(col, 0)
+        results.append(_result("range", col, count, 0, count == 0))
+
+    for col, dataset in rules["references"].items():
+        if col in state["orphans"]:
+            count = state["orphans"][col]
+            results.append(_result(f"references:{dataset}", col, count, 0, count == 0))
+
+    for col, count in state["duplicates"].items():
+        results.append(_result("unique", col, count, 0, count == 0))
+
+    return {
+        "dataset": dataset_name,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "nb_rows": nb_rows,
+        "null_columns": [col for col, count in state["non_null"].items() if count == 0],
+        "min": {col: _to_json(value) for col, value in state["min"].items()},
+        "max": {col: _to_json(value) for col, value in state["max"].items()},
+        "rules": results,
+        "passed": all(result["passed"] for result in results),
+    }
+
+
+def _result(rule: str, column: str, value, threshold, passed: bool) -> dict:
+    return {"rule": rule, "column": column, "value": value, "threshold": threshold, "passed": bool(passed)}
+
+
+def _bound(bound, values: pd.Series):
+    """Cast a configured bound to the type of the column."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.Timestamp.now() if bound is None else pd.Timestamp(bound)
+    return bound
+
+
+def _merge_extreme(state: dict, col: str, low, high) -> None:
+    if pd.notna(low):
+        state["min"][col] = low if col not in state["min"] else min(state["min"][col], low)
+    if pd.notna(high):
+        state["max"][col] = high if col not in state["max"] else max(state["max"][col], high)
+
+
+def _to_json(value):
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
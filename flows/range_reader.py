@@ -0,0 +1,136 @@
+import io
+from collections import OrderedDict
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .config import get_minio_client
+from .resilience import io_call, read_object
+
+# Taille des blocs demandés à MinIO : les petites lectures voisines
+# (footer, column chunks adjacents) sont regroupées dans un même bloc
+BLOCK_SIZE = 1024 * 1024
+MAX_CACHED_BLOCKS = 64
+
+
+class MinioRangeFile(io.RawIOBase):
+    """
+    Read-only random-access file over a MinIO object using HTTP range requests.
+
+    Reads are aligned on BLOCK_SIZE blocks kept in a small LRU, contiguous
+    missing blocks are fetched in a single request and the next block is
+    prefetched when the access pattern is sequential. Wrapped in
+    pa.PythonFile, it lets pyarrow fetch only the footer, the projected
+    column chunks and the row groups kept by the filters.
+    """
+
+    def __init__(self, bucket: str, object_name: str, size: int | None = None, block_size: int = BLOCK_SIZE):
+        super().__init__()
+        self.client = get_minio_client()
+        self.bucket = bucket
+        self.object_name = object_name
+        self.block_size = block_size
+        self.size = size if size is not None else io_call("minio", lambda: self.client.stat_object(bucket, object_name)).size
+        self.position = 0
+        self.blocks = OrderedDict()
+        self.last_block = None
+        self.requests = 0
+        self.bytes_fetched = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = self.size + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        return self.position
+
+    def read(self, n: int = -1) -> bytes:
+        end = self.size if n is None or n < 0 else min(self.position + n, self.size)
+        if end <= self.position:
+            return b""
+
+        first = self.position // self.block_size
+        last = (end - 1) // self.block_size
+        self._fetch(first, last)
+
+        data = b"".join(self.blocks[index] for index in range(first, last + 1))
+        offset = self.position - first * self.block_size
+        out = data[offset:offset + end - self.position]
+        self.position = end
+        return out
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def _fetch(self, first: int, last: int) -> None:
+        for index in range(first, last + 1):
+            if index in self.blocks:
+                self.blocks.move_to_end(index)
+
+        missing = [index for index in range(first, last + 1) if index not in self.blocks]
+        sequential = self.last_block is not None and first == self.last_block + 1
+        self.last_block = last
+        if not missing:
+            return
+
+        # Une seule requête pour les blocs manquants (+ lecture anticipée)
+        start, stop = missing[0], missing[-1]
+        if sequential:
+            stop = min(stop + 1, (self.size - 1) // self.block_size)
+
+        offset = start * self.block_size
+        length = min((stop + 1) * self.block_size, self.size) - offset
+        data = read_object(self.bucket, self.object_name, offset=offset, length=length)
+
+        self.requests += 1
+        self.bytes_fetched += len(data)
+
+        for index in range(start, stop + 1):
+            begin = (index - start) * self.block_size
+            self.blocks[index] = data[begin:begin + self.block_size]
+
+        # éviction LRU, sans toucher aux blocs de la lecture en cours
+        # (une lecture de plus de MAX_CACHED_BLOCKS blocs les garde tous)
+        excess = len(self.blocks) - MAX_CACHED_BLOCKS
+        for index in list(self.blocks):
+            if excess <= 0:
+                break
+            if not first <= index <= last:
+                del self.blocks[index]
+                excess -= 1
+
+
+def read_table_ranges(bucket: str, object_name: str, columns: list[str] | None = None, filters: list | None = None) -> pa.Table:
+    """
+    Read a Parquet object from MinIO fetching only the needed byte ranges.
+
+    Args:
+        bucket: Name of the bucket
+        object_name: Name of the object
+        columns: Columns to read (all if None)
+        filters: pyarrow filters, used to skip row groups from their statistics
+
+    Returns:
+        pa.Table: Projected and filtered table
+    """
+    remote = MinioRangeFile(bucket, object_name)
+    with pa.PythonFile(remote, mode="r") as source:
+        table = pq.read_table(source, columns=columns, filters=filters)
+
+    print(f"{object_name}: {remote.bytes_fetched} / {remote.size} octets lus en {remote.requests} requêtes")
+    return table
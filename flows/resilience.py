@@ -0,0 +1,264 @@
+import hashlib
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from io import BytesIO
+from pathlib import Path
+
+from .config import (
+    IO_BACKOFF_BASE,
+    IO_BACKOFF_MAX,
+    IO_BREAKER_RESET,
+    IO_BREAKER_THRESHOLD,
+    IO_RETRIES,
+    MULTIPART_PART_SIZE,
+    get_minio_client,
+)
+
+# Codes S3 renvoyés par un serveur surchargé ou en cours de redémarrage
+TRANSIENT_S3_CODES = {
+    "SlowDown",
+    "InternalError",
+    "ServiceUnavailable",
+    "RequestTimeout",
+    "OperationTimedOut",
+    "XMinioServerNotInitialized",
+}
+
+# Métadonnée des parties d'un upload repris (SHA-256 de la partie)
+PART_HASH_HEADER = "x-amz-meta-content-hash"
+
+# Disjoncteur par service ("minio", "mongo") : closed -> open après
+# IO_BREAKER_THRESHOLD échecs transitoires consécutifs, puis un seul appel
+# d'essai (half_open) après IO_BREAKER_RESET secondes
+_breakers = {}
+_lock = threading.Lock()
+
+# Nouveaux essais par défaut des io_call du contexte courant (voir retry_budget)
+_default_retries = ContextVar("io_retries", default=IO_RETRIES)
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised without calling the service while its circuit breaker is open."""
+
+
+def is_transient(exc: BaseException) -> bool:
+    """
+    True for errors worth retrying: network failures and timeouts, S3
+    throttling / 5xx, MongoDB connection errors and retryable writes.
+    Missing objects, bad requests or duplicate keys are not.
+    """
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+
+    module = type(exc).__module__
+    if module.startswith("urllib3"):
+        return True
+    if module.startswith("minio"):
+        from minio.error import S3Error, ServerError
+        if isinstance(exc, ServerError):
+            return True
+        return isinstance(exc, S3Error) and exc.code in TRANSIENT_S3_CODES
+    if module.startswith("pymongo"):
+        from pymongo.errors import ConnectionFailure, PyMongoError
+        if isinstance(exc, ConnectionFailure):
+            return True
+        return isinstance(exc, PyMongoError) and exc.has_error_label("RetryableWriteError")
+
+    return False
+
+
+def breaker_state(service: str) -> dict:
+    """Current state of the circuit breaker of a service."""
+    with _lock:
+        return dict(_breakers.setdefault(service, {"state": "closed", "failures": 0, "opened_at": 0.0}))
+
+
+def _before_call(service: str) -> None:
+    with _lock:
+        breaker = _breakers.setdefault(service, {"state": "closed", "failures": 0, "opened_at": 0.0})
+        if breaker["state"] == "closed":
+            return
+        waited = time.monotonic() - breaker["opened_at"]
+        if breaker["state"] == "open" and waited >= IO_BREAKER_RESET:
+            # cet appel sert d'essai, les autres échouent vite en attendant
+            breaker["state"] = "half_open"
+            return
+        raise CircuitOpenError(f"{service} indisponible (disjoncteur ouvert depuis {waited:.0f}s)")
+
+
+def _record(service: str, ok: bool) -> None:
+    with _lock:
+        breaker = _breakers[service]
+        if ok:
+            breaker.update(state="closed", failures=0)
+            return
+        breaker["failures"] += 1
+        if breaker["state"] == "half_open" or breaker["failures"] >= IO_BREAKER_THRESHOLD:
+            breaker.update(state="open", opened_at=time.monotonic())
+
+
+def backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter (seconds)."""
+    return random.uniform(0, min(IO_BACKOFF_MAX, IO_BACKOFF_BASE * 2 ** attempt))
+
+
+@contextmanager
+def retry_budget(retries: int):
+    """
+    Nouveaux essais des io_call sans retries explicite dans ce bloc, y
+    compris dans les fonctions appelées (ex: API_IO_RETRIES pour qu'un
+    endpoint échoue vite). Propre au thread / à la tâche en cours.
+    """
+    token = _default_retries.set(retries)
+    try:
+        yield
+    finally:
+        _default_retries.reset(token)
+
+
+def io_call(service: str, operation, retries: int | None = None):
+    """
+    Run one MinIO or MongoDB operation with retries and circuit breaking.
+
+    Only transient errors are retried; any other error is raised at once
+    and counts as an answer of the service for the breaker. operation
+    must be safe to run again (rebuild request bodies inside it).
+
+    Args:
+        service: Name of the circuit breaker ("minio", "mongo")
+        operation: Callable without arguments doing the I/O
+        retries: Attempts after the first one (IO_RETRIES, or the
+            retry_budget in effect, if None)
+
+    Raises:
+        CircuitOpenError: if the breaker of the service is open
+    """
+    if retries is None:
+        retries = _default_retries.get()
+    for attempt in range(retries + 1):
+        _before_call(service)
+        try:
+            result = operation()
+        except Exception as e:
+            if not is_transient(e):
+                _record(service, True)
+                raise
+            _record(service, False)
+            if attempt == retries:
+                raise
+            delay = backoff(attempt)
+            print(f"{service}: {type(e).__name__}, nouvel essai dans {delay:.2f}s ({attempt + 1}/{retries})")
+            time.sleep(delay)
+        else:
+            _record(service, True)
+            return result
+
+
+def read_object(bucket: str, object_name: str, **kwargs) -> bytes:
+    """Download an object (or a range with offset / length), retried as a whole."""
+    client = get_minio_client()
+
+    def download() -> bytes:
+        response = client.get_object(bucket, object_name, **kwargs)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    return io_call("minio", download)
+
+
+def ensure_bucket(bucket: str) -> None:
+    client = get_minio_client()
+    if not io_call("minio", lambda: client.bucket_exists(bucket)):
+        io_call("minio", lambda: client.make_bucket(bucket))
+
+
+def put_bytes(bucket: str, object_name: str, data: bytes, content_type: str = "application/octet-stream", metadata: dict | None = None) -> None:
+    """put_object of an in-memory payload, retried."""
+    client = get_minio_client()
+    io_call("minio", lambda: client.put_object(
+        bucket,
+        object_name,
+        BytesIO(data),
+        length=len(data),
+        content_type=content_type,
+        metadata=metadata
+    ))
+
+
+def upload_file(
+    bucket: str,
+    object_name: str,
+    path: Path,
+    content_type: str = "application/octet-stream",
+    metadata: dict | None = None,
+    content_hash: str | None = None,
+    part_size: int = MULTIPART_PART_SIZE
+) -> None:
+    """
+    Upload a local file, resuming after a failure.
+
+    Files up to part_size are sent in one retried put. Larger files are
+    uploaded as part objects under <object_name>.parts/<content hash>/,
+    each retried on its own; a rerun with the same content skips the parts
+    already stored (same SHA-256 in their metadata). The parts are then composed server-side
+    into the target object and removed.
+
+    Args:
+        content_hash: SHA-256 of the file if already known
+    """
+    from minio.commonconfig import ComposeSource
+    from minio.error import S3Error
+
+    client = get_minio_client()
+    path = Path(path)
+
+    if path.stat().st_size <= part_size:
+        io_call("minio", lambda: client.fput_object(
+            bucket, object_name, str(path), content_type=content_type, metadata=metadata
+        ))
+        return
+
+    if content_hash is None:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+
+    prefix = f"{object_name}.parts/{content_hash[:16]}/"
+    parts = []
+    skipped = 0
+    with open(path, "rb") as f:
+        for number, chunk in enumerate(iter(lambda: f.read(part_size), b""), start=1):
+            part_name = f"{prefix}{number:05d}"
+            parts.append(part_name)
+            try:
+                stat = io_call("minio", lambda: client.stat_object(bucket, part_name))
+            except S3Error as e:
+                if e.code != "NoSuchKey":
+                    raise
+                stat = None
+            # l'ETag d'un objet envoyé en multipart n'est pas le MD5 du
+            # contenu : chaque partie porte son SHA-256 en métadonnée
+            part_hash = hashlib.sha256(chunk).hexdigest()
+            if stat is not None and stat.metadata.get(PART_HASH_HEADER) == part_hash:
+                skipped += 1
+                continue
+            put_bytes(bucket, part_name, chunk, metadata={"content-hash": part_hash})
+
+    headers = {**(metadata or {}), "Content-Type": content_type}
+    io_call("minio", lambda: client.compose_object(
+        bucket, object_name, [ComposeSource(bucket, name) for name in parts], metadata=headers
+    ))
+    for part_name in parts:
+        io_call("minio", lambda: client.remove_object(bucket, part_name))
+
+    print(f"{object_name} : {len(parts)} parties ({skipped} reprises)")
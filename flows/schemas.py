@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from .config import MONTANT_DECIMAL
+
+# Schémas déclarés des datasets Bronze -> Silver
+# - columns: type Arrow lu directement par le parser CSV
+# - dates: colonnes date et leur format explicite (pas d'inférence)
+# - categories: colonnes à faible cardinalité encodées en dictionnaire
+# - strings: colonnes texte à nettoyer (strip)
+# - keys: clé métier utilisée pour la déduplication
+# - decimals: colonnes monétaires (précision, échelle) si MONTANT_DECIMAL
+SCHEMAS = {
+    "clients": {
+        "columns": {
+            "id_client": pa.int32(),
+            "nom": pa.string(),
+            "email": pa.string(),
+            "date_inscription": pa.string(),
+            "pays": pa.string(),
+        },
+        "dates": {"date_inscription": "%Y-%m-%d"},
+        "categories": ["pays"],
+        "strings": ["nom", "email", "pays"],
+        "keys": ["id_client"],
+    },
+    "achats": {
+        "columns": {
+            "id_achat": pa.int64(),
+            "id_client": pa.int32(),
+            "date_achat": pa.string(),
+            "montant": pa.float64(),
+            "produit": pa.string(),
+        },
+        "dates": {"date_achat": "%Y-%m-%d %H:%M:%S"},
+        "categories": ["produit"],
+        "strings": ["produit"],
+        "keys": ["id_achat"],
+        "decimals": {"montant": (12, 2)},
+    },
+}
+
+# Politique de types, de la lecture CSV jusqu'au dashboard :
+# - entiers réduits au plus petit type signé qui contient leurs valeurs en
+#   mémoire, mais écrits dans les Parquet avec la largeur déclarée des
+#   identifiants (id_client int32, id_achat int64) : le schéma des fichiers
+#   ne dépend pas des valeurs d'un run ou d'un micro-batch
+# - colonnes à faible cardinalité en dictionnaire Arrow / pd.Categorical
+# - autres chaînes en chaînes Arrow (pd.StringDtype("pyarrow"))
+# - montants en float64 en mémoire, en decimal128 dans les Parquet si MONTANT_DECIMAL
+DECIMAL_COLUMNS = {
+    col: spec
+    for schema in SCHEMAS.values()
+    for col, spec in schema.get("decimals", {}).items()
+}
+STORED_INTEGERS = {
+    col: data_type
+    for schema in SCHEMAS.values()
+    for col, data_type in schema["columns"].items()
+    if pa.types.is_integer(data_type)
+}
+INTEGER_TYPES = [pa.int8(), pa.int16(), pa.int32(), pa.int64()]
+
+
+def get_schema(dataset_name: str) -> dict | None:
+    """Return the declared schema of a dataset, or None if it is unknown."""
+    return SCHEMAS.get(dataset_name)
+
+
+def read_csv_with_schema(source, dataset_name: str) -> pa.Table:
+    """
+    Parse a CSV with the pyarrow multi-threaded reader and apply the schema.
+
+    Args:
+        source: Path or file-like object containing the CSV
+        dataset_name: Name of the dataset (key of SCHEMAS)
+
+    Returns:
+        pa.Table: Typed table (dates parsed, strings trimmed, categories
+            encoded, integers downcast)
+    """
+    schema = get_schema(dataset_name)
+    if schema is None:
+        return pacsv.read_csv(source)
+
+    convert_options = pacsv.ConvertOptions(
+        column_types=schema["columns"],
+        strings_can_be_null=True,
+    )
+    table = pacsv.read_csv(source, convert_options=convert_options)
+    return apply_schema(table, schema)
+
+
+def apply_schema(table: pa.Table, schema: dict) -> pa.Table:
+    """
+    Vectorized normalisation of an Arrow table according to a schema.
+
+    Invalid dates become null (same behaviour as errors="coerce").
+    """
+    for col in schema["strings"]:
+        if col in table.column_names:
+            table = _set_column(table, col, pc.utf8_trim_whitespace(table[col]))
+
+    for col, fmt in schema["dates"].items():
+        if col in table.column_names:
+            values = pc.utf8_trim_whitespace(table[col])
+            parsed = pc.strptime(values, format=fmt, unit="s", error_is_null=True)
+            table = _set_column(table, col, parsed)
+
+    for col in schema["categories"]:
+        if col in table.column_names:
+            table = _set_column(table, col, pc.dictionary_encode(table[col]))
+
+    return downcast_integers(table)
+
+
+def downcast_integers(table: pa.Table, columns: list[str] | None = None) -> pa.Table:
+    """Cast every integer column (or those of columns) to the smallest signed type holding its values."""
+    for col in table.column_names if columns is None else columns:
+        if col not in table.column_names:
+            continue
+        if not pa.types.is_integer(table[col].type) or table[col].null_count == len(table):
+            continue
+
+        bounds = pc.min_max(table[col])
+        low, high = bounds["min"].as_py(), bounds["max"].as_py()
+        for target in INTEGER_TYPES:
+            info = np.iinfo(target.to_pandas_dtype())
+            if info.min <= low and high <= info.max:
+                if target != table[col].type:
+                    table = _set_column(table, col, table[col].cast(target))
+                break
+
+    return table
+
+
+def _string_dtype(arrow_type: pa.DataType):
+    if arrow_type in (pa.string(), pa.large_string()):
+        return pd.StringDtype("pyarrow")
+    return None
+
+
+def to_pandas(table: pa.Table) -> pd.DataFrame:
+    """
+    Convert an Arrow table to pandas following the dtype policy.
+
+    Dictionaries become categoricals, strings stay Arrow-backed, decimals
+    are converted to float64 for computation and identifiers read at their
+    stored width are downcast again.
+    """
+    table = downcast_integers(table, list(STORED_INTEGERS))
+    for i, field in enumerate(table.schema):
+        if pa.types.is_decimal(field.type):
+            # cast direct inexact (19.99 -> 19.990000000000002) : le texte
+            # décimal est converti au float64 le plus proche
+            values = table[field.name].cast(pa.string()).cast(pa.float64())
+            table = table.set_column(i, field.name, values)
+
+    return table.to_pandas(types_mapper=_string_dtype)
+
+
+def to_arrow(df: pd.DataFrame) -> pa.Table:
+    """
+    Convert a DataFrame to an Arrow table following the dtype policy.
+
+    Declared integer columns get back their stored width (see
+    STORED_INTEGERS) and monetary columns are stored as exact decimals when
+    MONTANT_DECIMAL is enabled.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    for col, data_type in STORED_INTEGERS.items():
+        if col in table.column_names and pa.types.is_integer(table[col].type) and table[col].type != data_type:
+            table = _set_column(table, col, table[col].cast(data_type))
+
+    if MONTANT_DECIMAL:
+        for col, (precision, scale) in DECIMAL_COLUMNS.items():
+            if col in table.column_names and pa.types.is_floating(table[col].type):
+                values = pc.round(table[col], scale)
+                table = _set_column(table, col, values.cast(pa.decimal128(precision, scale)))
+
+    return table
+
+
+def to_parquet(df: pd.DataFrame, **kwargs) -> bytes:
+    """Serialize a DataFrame to Parquet bytes following the dtype policy (see to_arrow)."""
+    sink = pa.BufferOutputStream()
+    pq.write_table(to_arrow(df), sink, **kwargs)
+    return sink.getvalue().to_pybytes()
+
+
+def _set_column(table: pa.Table, name: str, values) -> pa.Table:
+    return table.set_column(table.column_names.index(name), name, values)
@@ -1,30 +1,96 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
 from io import BytesIO
+import os
+from pathlib import Path
+import tempfile
+import time
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 
 from prefect import flow, task
 
-from config import BUCKET_BRONZE, BUCKET_SILVER, get_minio_client
+from .caching import etag_cache_key, evict_local_cache, fingerprint, is_up_to_date, json_payload, put_if_changed, save_fingerprint
+from .config import BUCKET_BRONZE, BUCKET_SILVER, CACHE_EXPIRATION, PARQUET_ROW_GROUP_SIZE, SILVER_WORKERS, SPILL_DIR, get_minio_client
+from .handoff import load, stash
+from .manifest import record_object, upstream_etags
+from .object_cache import read_table_cached
+from .quality import build_report, count_duplicates, get_rules, init_state, iter_chunks, merge_states, update_state
+from .resilience import io_call, read_object
+from .schemas import downcast_integers, get_schema, read_csv_with_schema, to_arrow, to_pandas, to_parquet
 
+# En dessous, le coût du pool dépasse le gain du parallélisme
+MIN_BYTES_PER_PARTITION = 4 * 1024 * 1024
 
-@task(name="read_from_bronze", retries=2)
-def read_csv_from_bronze(object_name: str) -> pd.DataFrame:
+# Lecture de la fin d'une ligne coupée par une borne de plage
+READ_BLOCK = 64 * 1024
+
+# Achats ingérés en micro-batch (voir microbatch.py), fusionnés à achats.parquet
+SILVER_STREAM_PREFIX = "achats_stream/"
+
+
+@task(
+    name="read_from_bronze",
+    cache_key_fn=etag_cache_key(BUCKET_BRONZE),
+    cache_expiration=CACHE_EXPIRATION,
+    persist_result=True
+)
+def read_csv_from_bronze(object_name: str, dataset_name: str | None = None) -> pd.DataFrame:
     """
     Read CSV file from Bronze bucket into a Pandas DataFrame.
+
+    Parsing is done at read time by the pyarrow CSV engine using the
+    declared schema of the dataset (see schemas.py).
+
     Args:
         object_name: Name of the object in Bronze bucket
+        dataset_name: Name of the dataset schema, defaults to the object stem
 
     Returns:
-        pd.DataFrame: DataFrame containing the CSV data
+        pd.DataFrame: DataFrame containing the typed CSV data
     """
-    client = get_minio_client()
+    data = read_object(BUCKET_BRONZE, object_name)
+
+    if dataset_name is None:
+        dataset_name = object_name.rsplit(".", 1)[0]
+
+    table = read_csv_with_schema(BytesIO(data), dataset_name)
+    return to_pandas(table)
+
+
+def deduplicate(df: pd.DataFrame, keys: list[str] | None = None) -> pd.DataFrame:
+    """
+    Drop duplicated records.
+
+    Uses the business key when declared, otherwise a 64-bit hash of each row
+    (one vectorized pass instead of a full multi-column sort).
+    """
+    if keys and all(key in df.columns for key in keys):
+        return df.drop_duplicates(subset=keys)
+
+    row_hash = pd.util.hash_pandas_object(df, index=False)
+    return df[~row_hash.duplicated().to_numpy()]
+
 
-    response = client.get_object(BUCKET_BRONZE, object_name)
-    data = response.read()
+def _clean(df: pd.DataFrame, dataset_name: str) -> pd.DataFrame:
+    """Silver cleaning of a DataFrame or of one partition of it."""
+    schema = get_schema(dataset_name)
 
-    response.close()
-    response.release_conn()
+    # Supprimer les lignes entièrement vides
+    df = df.dropna(how="all")
+
+    # supprimer les doublons
+    df = deduplicate(df, schema["keys"] if schema else None)
+
+    # Dates non converties
+    if schema:
+        for col in schema["dates"]:
+            if col in df.columns:
+                null_count = df[col].isna().sum()
+                if null_count > 0:
+                    print(f"{col}: {null_count} valeurs non converties")
 
-    df = pd.read_csv(BytesIO(data))
     return df
 
 
@@ -33,97 +99,407 @@ def clean_dataframe(df: pd.DataFrame, dataset_name: str) -> pd.DataFrame:
     """
     Apply Silver transformations:
     - Handle missing values
-    - Normalize data types
-    - Standardize dates
-    - Deduplicate records
+    - Deduplicate records (business key or row hash)
+    - Report dates that could not be parsed
+
+    Types, dates and strings are already normalised at read time
+    according to the dataset schema.
     """
-    df = df.copy()
+    df = _clean(df, dataset_name)
+    print(f"{dataset_name}: {len(df)} rows after cleaning")
+    return df
 
-    # Supprimer les lignes entièrement vides
-    df = df.dropna(how="all")
 
-    # supprimer les doubles id
-    if "id_client" in df.columns and dataset_name == "clients":
-        df = df.drop_duplicates(subset=["id_client"])
+def hash_partition(df: pd.DataFrame, keys: list[str] | None, n_partitions: int) -> list[pd.DataFrame]:
+    """
+    Split a DataFrame into n_partitions by hashing its business key.
 
-    if "id_achat" in df.columns and dataset_name == "achats":
-        df = df.drop_duplicates(subset=["id_achat"])
+    All the rows sharing a key land in the same partition, so duplicates
+    can be resolved locally without a global shuffle. Without key the
+    whole row is hashed.
+    """
+    if keys and all(key in df.columns for key in keys):
+        row_hash = pd.util.hash_pandas_object(df[keys], index=False)
+    else:
+        row_hash = pd.util.hash_pandas_object(df, index=False)
 
-    # Convertion des dates
-    for col in df.columns:
-        if "date" in col.lower():
-            df[col] = pd.to_datetime(df[col], errors="coerce", infer_datetime_format=True)
-        
-            null_count = df[col].isna().sum()
-            if null_count > 0:
-                print(f"{col}: {null_count} valeurs non converties")
+    partition_ids = row_hash.to_numpy() % n_partitions
+    return [df[partition_ids == i] for i in range(n_partitions)]
 
-    # Nettoyer les strings
-    for col in df.select_dtypes(include="object").columns:
-        df[col] = df[col].str.strip()
 
-    # Supprimer les doublons
-    df = df.drop_duplicates()
+def _source_size(source) -> int:
+    if isinstance(source, tuple):
+        client = get_minio_client()
+        return io_call("minio", lambda: client.stat_object(*source)).size
+    return os.path.getsize(source)
+
+
+def _read_range(source, start: int, length: int) -> bytes:
+    """Bytes [start, start + length) of a local file or of a MinIO object (bucket, name)."""
+    if length <= 0:
+        return b""
+    if isinstance(source, tuple):
+        return read_object(*source, offset=start, length=length)
+    with open(source, "rb") as f:
+        f.seek(start)
+        return f.read(length)
+
+
+def read_header(source, size: int) -> bytes:
+    """First line of a CSV, end of line included."""
+    data = b""
+    while b"\n" not in data and len(data) < size:
+        data += _read_range(source, len(data), min(READ_BLOCK, size - len(data)))
+    cut = data.find(b"\n")
+    return data if cut == -1 else data[:cut + 1]
+
+
+def read_lines(source, start: int, end: int, size: int) -> bytes:
+    """
+    Complete CSV lines whose first byte lies in [start, end).
+
+    The line cut by start belongs to the previous range and the last line
+    is read past end up to its newline, so consecutive ranges cover each
+    line exactly once. Fields must not contain newlines (true for the
+    generated sources).
+    """
+    begin = max(start - 1, 0)
+    data = _read_range(source, begin, end - begin)
+    if start > 0:
+        cut = data.find(b"\n")
+        if cut == -1:
+            return b""
+        data = data[cut + 1:]
+
+    position = end
+    while data and not data.endswith(b"\n") and position < size:
+        block = _read_range(source, position, min(READ_BLOCK, size - position))
+        cut = block.find(b"\n")
+        if cut != -1:
+            return data + block[:cut + 1]
+        data += block
+        position += len(block)
+
+    return data
+
+
+def _spill(df: pd.DataFrame, path: Path) -> None:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.ipc.new_file(path, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _load_spilled(paths: list[Path]) -> pa.Table:
+    tables = [pa.ipc.open_file(pa.memory_map(str(path))).read_all() for path in paths]
+    # largeurs d'entiers et dictionnaires propres à chaque morceau
+    return pa.concat_tables(tables, promote_options="permissive")
+
+
+def _parse_range(
+    source,
+    header: bytes,
+    bounds: tuple[int, int, int],
+    dataset_name: str,
+    n_partitions: int,
+    spill_dir: Path,
+    index: int
+) -> int:
+    """
+    Worker, phase 1: parse one byte range of the Bronze CSV and spill its
+    rows to disk, hash-partitioned on the business key.
+
+    Each row keeps its position in the source (_row) so that duplicates
+    are resolved in file order, as in the sequential path.
+    """
+    start, end, size = bounds
+    body = read_lines(source, start, end, size)
+    df = to_pandas(read_csv_with_schema(BytesIO(header + body), dataset_name))
+
+    schema = get_schema(dataset_name)
+    for i, part in enumerate(hash_partition(df, schema["keys"] if schema else None, n_partitions)):
+        part = part.assign(_row=(index << 32) + part.index.to_numpy(dtype="int64"))
+        _spill(part, spill_dir / f"parsed-{i}-{index}.arrow")
+
+    return len(df)
+
+
+def _clean_partition(
+    paths: list[Path],
+    dataset_name: str,
+    references: dict | None,
+    output: Path
+) -> dict:
+    """Worker, phase 2: clean one hash partition and evaluate the quality rules on it."""
+    # _row en index : ni les lignes vides ni le hash de ligne ne doivent le voir
+    df = to_pandas(_load_spilled(paths)).sort_values("_row").set_index("_row")
+    df = _clean(df, dataset_name)
+    _spill(df.reset_index(), output)
+    return _quality_state(df, dataset_name, references)
+
+
+@task(name="clean_bronze_parallel")
+def clean_bronze_parallel(
+    source,
+    dataset_name: str,
+    n_workers: int = SILVER_WORKERS,
+    references: dict | None = None
+) -> tuple[pd.DataFrame, dict]:
+    """
+    Partitioned Silver cleaning on a process pool, parsing included.
+
+    The parent only splits the Bronze CSV into byte ranges. Each worker
+    downloads and parses its own range and spills it to disk,
+    hash-partitioned on the business key (id_client, id_achat); each hash
+    partition is then cleaned and checked in its own process. The parent
+    memory-maps the cleaned partitions and restores the source order.
+
+    Args:
+        source: Local CSV path or (bucket, object_name) of the Bronze object
+        dataset_name: Name of the dataset
+        n_workers: Number of worker processes
+        references: Dataset name -> valid keys for referential integrity
+
+    Returns:
+        tuple: Cleaned DataFrame and its quality report
+    """
+    size = _source_size(source)
+    header = read_header(source, size)
+    n_workers = max(1, min(n_workers, size // MIN_BYTES_PER_PARTITION or 1))
+    edges = np.linspace(len(header), size, n_workers + 1).astype(np.int64)
+
+    with tempfile.TemporaryDirectory(prefix="silver-", dir=SPILL_DIR) as tmp, \
+            ProcessPoolExecutor(max_workers=n_workers) as executor:
+        spill_dir = Path(tmp)
+        ranges = [(int(edges[i]), int(edges[i + 1]), size) for i in range(n_workers)]
+        parsed = list(executor.map(
+            _parse_range,
+            [source] * n_workers,
+            [header] * n_workers,
+            ranges,
+            [dataset_name] * n_workers,
+            [n_workers] * n_workers,
+            [spill_dir] * n_workers,
+            range(n_workers)
+        ))
+
+        outputs = [spill_dir / f"clean-{i}.arrow" for i in range(n_workers)]
+        states = list(executor.map(
+            _clean_partition,
+            [[spill_dir / f"parsed-{i}-{j}.arrow" for j in range(n_workers)] for i in range(n_workers)],
+            [dataset_name] * n_workers,
+            [references] * n_workers,
+            outputs
+        ))
+
+        table = downcast_integers(_load_spilled(outputs))
+        cleaned = to_pandas(table).sort_values("_row", ignore_index=True).drop(columns="_row")
+
+    state = reduce(merge_states, states)
+    report = build_report(state, get_rules(dataset_name), dataset_name)
+    _check_quality(report, dataset_name)
+
+    print(f"{dataset_name}: {sum(parsed)} rows parsed, {len(cleaned)} after cleaning ({n_workers} partitions)")
+    return cleaned, report
+
+
+def _quality_state(df: pd.DataFrame, dataset_name: str, references: dict | None = None) -> dict:
+    """Evaluate all the quality rules in a single pass over the chunks of df."""
+    rules = get_rules(dataset_name)
+    state = init_state()
+    for chunk in iter_chunks(df):
+        state = update_state(state, chunk, rules, references)
+    return count_duplicates(state, df, rules)
+
+
+def _check_quality(report: dict, dataset_name: str) -> None:
+    if report["nb_rows"] == 0:
+        raise ValueError(f"[Data Quality] {dataset_name} DataFrame is empty!")
+
+    if report["null_columns"]:
+        raise ValueError(f"[Data Quality] {dataset_name} DataFrame has columns with all null values!")
+
+    for result in report["rules"]:
+        if not result["passed"]:
+            print(f"[Data Quality] {dataset_name}: {result['rule']} failed on {result['column']} "
+                  f"({result['value']} vs {result['threshold']})")
 
-    print(f"{dataset_name}: {len(df)} rows after cleaning")
-    return df
 
 @task(name="data_quality_checks")
-def data_quality_checks(df: pd.DataFrame, dataset_name: str) -> None:
+def data_quality_checks(df: pd.DataFrame, dataset_name: str, references: dict | None = None) -> dict:
     """
     Perform data quality checks on the DataFrame.
+
+    All the rules of quality.py are evaluated in one pass over streamed
+    chunks. Empty datasets and all-null columns are blocking, other
+    failed rules are reported.
+
     Args:
         df: DataFrame to check
         dataset_name: Name of the dataset 
-    
-    returns: 
+        references: Dataset name -> valid keys for referential integrity
+
+    Returns:
+        dict: Quality report
     """
-    if df.empty:
-        raise ValueError(f"[Data Quality] {dataset_name} DataFrame is empty!")
+    state = _quality_state(df, dataset_name, references)
+    report = build_report(state, get_rules(dataset_name), dataset_name)
+    _check_quality(report, dataset_name)
+    return report
 
-    if df.isnull().all().any():
-        raise ValueError(f"[Data Quality] {dataset_name} DataFrame has columns with all null values!")
 
+@task(name="write_quality_report")
+def write_quality_report(report: dict, object_name: str) -> str:
+    """
+    Write a quality report as JSON next to the Silver dataset.
 
-@task(name="write_to_silver", retries=2)
-def write_df_to_silver(df: pd.DataFrame, object_name: str) -> str:
+    Only rewritten if the report changed, its generation date aside.
+    """
+    data, content_key = json_payload(report, volatile=("generated_at",))
+    put_if_changed(BUCKET_SILVER, object_name, data, "application/json", content_key)
+
+    return object_name
+
+
+@task(name="write_to_silver")
+def write_df_to_silver(df: pd.DataFrame, object_name: str, upstream: dict | None = None) -> str:
     """
     Write DataFrame to Silver bucket in Parquet format.
+
+    The object is rewritten only if its content changed. Its row count,
+    column statistics and lineage are recorded in the Silver manifest.
+
+    Args:
+        upstream: ETags of the Bronze objects it comes from (upstream_etags)
     """
+    start = time.perf_counter()
+    data = to_parquet(df, row_group_size=PARQUET_ROW_GROUP_SIZE)
+    serialized = time.perf_counter()
+    written = put_if_changed(BUCKET_SILVER, object_name, data)
+    timings = {"serialize": serialized - start, "upload": time.perf_counter() - serialized}
+    record_object(BUCKET_SILVER, object_name, data, upstream, timings, written)
+
+    return object_name
+
+def list_stream_objects() -> list[str]:
+    """Fichiers Silver des micro-batchs, dans l'ordre d'arrivée."""
     client = get_minio_client()
+    if not io_call("minio", lambda: client.bucket_exists(BUCKET_SILVER)):
+        return []
 
-    if not client.bucket_exists(BUCKET_SILVER):
-        client.make_bucket(BUCKET_SILVER)
+    objects = io_call("minio", lambda: list(
+        client.list_objects(BUCKET_SILVER, prefix=SILVER_STREAM_PREFIX, recursive=True)
+    ))
+    return sorted(obj.object_name for obj in objects if obj.object_name.endswith(".parquet"))
 
-    data = df.to_parquet(index=False)
 
-    client.put_object(
-        BUCKET_SILVER,
-        object_name,
-        BytesIO(data),
-        length=len(data)
-    )
+@task(name="merge_stream")
+def merge_stream(achats_df: pd.DataFrame, stream_objects: list[str]) -> pd.DataFrame:
+    """
+    Ajouter aux achats Bronze ceux des micro-batchs, pour que les runs
+    Gold et MongoDB suivants les comptent aussi. Pour un même id_achat, la
+    ligne Bronze l'emporte.
+    """
+    tables = [to_arrow(achats_df)] + [read_table_cached(BUCKET_SILVER, name) for name in stream_objects]
+    merged = to_pandas(pa.concat_tables(tables, promote_options="permissive"))
+    merged = deduplicate(merged, get_schema("achats")["keys"])
+    print(f"achats: {len(merged) - len(achats_df)} achats ajoutés depuis {len(stream_objects)} fichier(s) micro-batch")
+    return merged
+
+
+def bronze_source(dataset_name: str, upstream: dict):
+    """
+    Bronze data of a dataset: Arrow table, local CSV path or bytes handed
+    off by the pipeline flow, else the Bronze object (bucket, name).
+    """
+    return upstream.get(dataset_name, (BUCKET_BRONZE, f"{dataset_name}.csv"))
+
+
+def load_bronze(source, dataset_name: str) -> pd.DataFrame:
+    """Parse a Bronze source (see bronze_source) in the current process."""
+    if isinstance(source, pa.Table):
+        return to_pandas(source)
+    if isinstance(source, tuple):
+        return read_csv_from_bronze(source[1], dataset_name)
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+    return to_pandas(read_csv_with_schema(source, dataset_name))
+
+
+def clean_and_check(
+    source,
+    dataset_name: str,
+    parallel: bool,
+    n_workers: int,
+    references: dict | None = None
+) -> tuple[pd.DataFrame, dict]:
+    """Read, clean and check a Bronze dataset, partitioned or not."""
+    if parallel and isinstance(source, (str, tuple)):
+        # Lecture, nettoyage et checks faits par les workers
+        return clean_bronze_parallel(source, dataset_name, n_workers, references)
+
+    df = clean_dataframe(load_bronze(source, dataset_name), dataset_name)
+    report = data_quality_checks(df, dataset_name, references)
+    return df, report
 
-    return object_name
 
 @flow(name="Silver Transformation Flow")
-def silver_transformation_flow():
+def silver_transformation_flow(
+    parallel: bool = False,
+    n_workers: int = SILVER_WORKERS,
+    upstream: str | None = None,
+    keep_frames: bool = False
+):
+    """
+    Flow Silver : lire Bronze, nettoyer, contrôler et écrire en Parquet.
+
+    Args:
+        parallel: Parse and clean byte ranges of the CSV on a process pool
+        n_workers: Number of worker processes in parallel mode
+        upstream: handoff key of the Bronze data kept in memory by the
+            pipeline (dataset -> Arrow table, local path or bytes)
+        keep_frames: Also hand off the cleaned DataFrames, key under "handoff"
+    """
+    upstream = load(upstream)
+
+    stream_objects = list_stream_objects()
+    inputs = [(BUCKET_BRONZE, "clients.csv"), (BUCKET_BRONZE, "achats.csv")]
+    inputs += [(BUCKET_SILVER, name) for name in stream_objects]
+    run_key = fingerprint(inputs)
+    if is_up_to_date(BUCKET_SILVER, "silver", run_key):
+        print("Silver: Bronze, code et sorties inchangés, rien à recalculer")
+        return {"clients": "clients.parquet", "achats": "achats.parquet"}
+
+    lineage = upstream_etags(inputs)
+
     # Clients
-    clients_df = read_csv_from_bronze("clients.csv")
-    clients_clean = clean_dataframe(clients_df, "clients")
-    data_quality_checks(clients_clean, "clients")
-    silver_clients = write_df_to_silver(clients_clean, "clients.parquet")
-
-    # Achats
-    achats_df = read_csv_from_bronze("achats.csv")
-    achats_clean = clean_dataframe(achats_df, "achats")
-    data_quality_checks(achats_clean, "achats")
-    silver_achats = write_df_to_silver(achats_clean, "achats.parquet")
-
-    return {
+    clients_clean, clients_report = clean_and_check(bronze_source("clients", upstream), "clients", parallel, n_workers)
+    silver_clients = write_df_to_silver(
+        clients_clean, "clients.parquet", {f"{BUCKET_BRONZE}/clients.csv": lineage[f"{BUCKET_BRONZE}/clients.csv"]}
+    )
+    clients_quality = write_quality_report(clients_report, "clients_quality.json")
+
+    # Achats (intégrité référentielle sur les clients)
+    references = {"clients": clients_clean["id_client"].to_numpy()}
+    achats_clean, achats_report = clean_and_check(
+        bronze_source("achats", upstream), "achats", parallel, n_workers, references
+    )
+    if stream_objects:
+        achats_clean = merge_stream(achats_clean, stream_objects)
+    silver_achats = write_df_to_silver(achats_clean, "achats.parquet", lineage)
+    achats_quality = write_quality_report(achats_report, "achats_quality.json")
+
+    save_fingerprint(BUCKET_SILVER, "silver", run_key, [silver_clients, silver_achats, clients_quality, achats_quality])
+    evict_local_cache()
+
+    result = {
         "clients": silver_clients,
         "achats": silver_achats
     }
+    if keep_frames:
+        result["handoff"] = stash({"clients": clients_clean, "achats": achats_clean})
+
+    return result
+
 if __name__ == "__main__":
     result = silver_transformation_flow()
     print(f"Silver ingestion complete: {result}")
@@ -0,0 +1,161 @@
+import math
+
+import numpy as np
+
+# Compression du t-digest : au plus COMPRESSION centroïdes conservés
+COMPRESSION = 500
+
+# Bornes fixes des buckets d'histogramme (mêmes bornes partout => fusionnable)
+HISTOGRAM_EDGES = [0, 25, 50, 75, 100, 150, 200, 250, 300, 400, 500, 1000]
+
+
+def init_sketch(edges: list[float] | None = None) -> dict:
+    """
+    Empty statistics state.
+
+    The state holds Welford moments (exact count, mean, variance, min, max),
+    a t-digest (approximate quantiles) and a fixed-bucket histogram. Every
+    part is mergeable, so partitions and daily deltas can be combined
+    without rescanning the history. The state is JSON-serializable.
+    """
+    edges = list(HISTOGRAM_EDGES if edges is None else edges)
+    return {
+        "count": 0,
+        "mean": 0.0,
+        "m2": 0.0,
+        "min": None,
+        "max": None,
+        "centroids": {"mean": [], "weight": []},
+        "histogram": {"edges": edges, "counts": [0] * (len(edges) + 1)},
+    }
+
+
+def update_sketch(state: dict, values) -> dict:
+    """
+    Fold a batch of values into a statistics state.
+
+    Args:
+        state: State returned by init_sketch, update_sketch or merge_sketches
+        values: Array-like of numbers (NaN are ignored)
+
+    Returns:
+        dict: New state
+    """
+    values = np.asarray(values, dtype="float64")
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return state
+
+    batch = init_sketch(state["histogram"]["edges"])
+    batch["count"] = len(values)
+    batch["mean"] = float(values.mean())
+    batch["m2"] = float(((values - batch["mean"]) ** 2).sum())
+    batch["min"] = float(values.min())
+    batch["max"] = float(values.max())
+
+    means, weights = _compress(values, np.ones(len(values)))
+    batch["centroids"] = {"mean": means.tolist(), "weight": weights.tolist()}
+
+    buckets = np.searchsorted(batch["histogram"]["edges"], values, side="right")
+    counts = np.bincount(buckets, minlength=len(batch["histogram"]["counts"]))
+    batch["histogram"]["counts"] = counts.tolist()
+
+    return merge_sketches(state, batch)
+
+
+def merge_sketches(left: dict, right: dict) -> dict:
+    """Combine two statistics states (Chan et al. parallel moments)."""
+    if left["histogram"]["edges"] != right["histogram"]["edges"]:
+        raise ValueError("Cannot merge sketches with different histogram edges")
+    if left["count"] == 0:
+        return right
+    if right["count"] == 0:
+        return left
+
+    count = left["count"] + right["count"]
+    delta = right["mean"] - left["mean"]
+
+    means = np.concatenate([left["centroids"]["mean"], right["centroids"]["mean"]])
+    weights = np.concatenate([left["centroids"]["weight"], right["centroids"]["weight"]])
+    means, weights = _compress(means, weights)
+
+    return {
+        "count": count,
+        "mean": left["mean"] + delta * right["count"] / count,
+        "m2": left["m2"] + right["m2"] + delta ** 2 * left["count"] * right["count"] / count,
+        "min": min(left["min"], right["min"]),
+        "max": max(left["max"], right["max"]),
+        "centroids": {"mean": means.tolist(), "weight": weights.tolist()},
+        "histogram": {
+            "edges": left["histogram"]["edges"],
+            "counts": [a + b for a, b in zip(left["histogram"]["counts"], right["histogram"]["counts"])],
+        },
+    }
+
+
+def std(state: dict) -> float:
+    """Sample standard deviation (ddof=1, like pandas)."""
+    if state["count"] < 2:
+        return math.nan
+    return math.sqrt(state["m2"] / (state["count"] - 1))
+
+
+def is_compressed(state: dict) -> bool:
+    """True once the t-digest merged values into centroids (quantiles are estimates)."""
+    return any(weight != 1 for weight in state["centroids"]["weight"])
+
+
+def quantile(state: dict, q: float) -> float:
+    """Approximate quantile from the t-digest (exact while it is not compressed)."""
+    if state["count"] == 0:
+        return math.nan
+
+    means = np.asarray(state["centroids"]["mean"])
+    weights = np.asarray(state["centroids"]["weight"])
+
+    # Position de chaque centroïde au milieu de son poids cumulé
+    centers = np.cumsum(weights) - weights / 2
+    total = weights.sum()
+
+    if not is_compressed(state):
+        # Digest non compressé : interpolation exacte (comme numpy / pandas)
+        return float(np.interp(q * (total - 1), np.arange(total), means))
+
+    positions = np.concatenate([[0], centers, [total]])
+    values = np.concatenate([[state["min"]], means, [state["max"]]])
+    return float(np.interp(q * total, positions, values))
+
+
+def histogram(state: dict) -> list[dict]:
+    """Histogram buckets as rows (borne_min, borne_max, nb_achats)."""
+    edges = [-math.inf] + list(state["histogram"]["edges"]) + [math.inf]
+    return [
+        {"borne_min": edges[i], "borne_max": edges[i + 1], "nb_achats": count}
+        for i, count in enumerate(state["histogram"]["counts"])
+    ]
+
+
+def _compress(means: np.ndarray, weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized t-digest compression with the k1 scale function.
+
+    Centroids are sorted and grouped by the integer part of
+    k(q) = delta / (2 pi) * asin(2q - 1), so each output centroid spans at
+    most one unit of k: small near the tails, large around the median.
+    """
+    order = np.argsort(means, kind="stable")
+    means, weights = means[order], weights[order]
+
+    total = weights.sum()
+    if len(means) <= COMPRESSION:
+        return means, weights
+
+    q = (np.cumsum(weights) - weights / 2) / total
+    k = COMPRESSION / (2 * math.pi) * np.arcsin(2 * q - 1)
+    groups = np.floor(k).astype(np.int64)
+    groups -= groups.min()
+
+    new_weights = np.bincount(groups, weights=weights)
+    new_means = np.bincount(groups, weights=weights * means)
+    keep = new_weights > 0
+    return new_means[keep] / new_weights[keep], new_weights[keep]
@@ -0,0 +1,165 @@
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+
+from .config import BUCKET_GOLD, SNAPSHOT_DIR, SNAPSHOT_GRACE_SECONDS
+from .cube import CUBE_OBJECT
+from .object_cache import read_parquet_cached
+from .schemas import to_pandas
+
+# Snapshot des jeux de données du dashboard : fichiers Arrow IPC non
+# compressés, ouverts en memory-map par toutes les sessions et tous les
+# processus de la machine. Chaque refresh écrit un nouveau répertoire
+# versionné puis bascule le pointeur CURRENT de façon atomique.
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+KEEP_VERSIONS = 2
+
+# Nom du jeu de données -> objet Gold
+GOLD_DATASETS = {
+    "ca_par_pays": "kpi_ca_par_pays.parquet",
+    "volumes_jour": "kpi_volumes_jour.parquet",
+    "volumes_semaine": "kpi_volumes_semaine.parquet",
+    "volumes_mois": "kpi_volumes_mois.parquet",
+    "croissance": "kpi_croissance.parquet",
+    "distribution": "kpi_distribution.parquet",
+    "histogramme_montant": "kpi_histogramme_montant.parquet",
+    "cube_achats": CUBE_OBJECT,
+}
+
+
+def prepare_datasets(frames: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    """
+    Mettre les KPIs Gold sous forme prête à tracer.
+
+    Périodes converties en dates, tables triées comme elles sont affichées
+    et agrégats dérivés (volumes par an, libellés des tranches) calculés
+    une seule fois ici plutôt qu'à chaque affichage.
+    """
+    datasets = dict(frames)
+
+    jour = frames["volumes_jour"].assign(jour=pd.to_datetime(frames["volumes_jour"]["jour"]))
+    datasets["volumes_jour"] = jour.sort_values("jour", ignore_index=True)
+
+    annee = jour.groupby(jour["jour"].dt.year).agg(
+        nb_achats=("nb_achats", "sum"),
+        ca_total=("ca_total", "sum")
+    )
+    datasets["volumes_annee"] = annee.rename_axis("annee").reset_index()
+
+    for name in ("volumes_mois", "croissance"):
+        df = frames[name]
+        datasets[name] = df.assign(mois=pd.to_datetime(df["mois"])).sort_values("mois", ignore_index=True)
+
+    datasets["ca_par_pays"] = frames["ca_par_pays"].sort_values("ca_total", ascending=False, ignore_index=True)
+
+    hist = frames["histogramme_montant"]
+    datasets["histogramme_montant"] = hist.assign(
+        tranche=hist["borne_min"].fillna(float("-inf")).astype(str) + " - " + hist["borne_max"].fillna(float("inf")).astype(str)
+    )
+
+    return datasets
+
+
+def write_snapshot(datasets: dict[str, pd.DataFrame]) -> str:
+    """
+    Publier un nouveau snapshot.
+
+    Returns:
+        str: Version publiée
+    """
+    version = datetime.now().strftime("%Y%m%dT%H%M%S_%f")
+    directory = SNAPSHOT_DIR / version
+    directory.mkdir(parents=True)
+
+    manifest = {"version": version, "created_at": datetime.now().isoformat(timespec="seconds"), "datasets": {}}
+    for name, df in datasets.items():
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(str(directory / f"{name}.arrow"), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        manifest["datasets"][name] = table.num_rows
+
+    (directory / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+
+    # bascule atomique du pointeur
+    tmp_pointer = SNAPSHOT_DIR / f".{CURRENT_FILE}.{os.getpid()}"
+    tmp_pointer.write_text(version)
+    os.replace(tmp_pointer, SNAPSHOT_DIR / CURRENT_FILE)
+
+    prune_versions()
+    return version
+
+
+def prune_versions(grace_seconds: int = SNAPSHOT_GRACE_SECONDS) -> list[str]:
+    """
+    Supprimer les anciennes versions du snapshot.
+
+    Les KEEP_VERSIONS dernières sont toujours gardées. Une version plus
+    ancienne n'est supprimée que si elle a été remplacée depuis plus de
+    grace_seconds : une session qui a lu le pointeur juste avant la bascule
+    doit encore pouvoir ouvrir ses fichiers (ceux déjà ouverts en
+    memory-map restent lisibles après suppression).
+
+    Returns:
+        list[str]: Versions supprimées
+    """
+    versions = sorted(path for path in SNAPSHOT_DIR.iterdir() if path.is_dir())
+    now = time.time()
+    removed = []
+    for old, newer in zip(versions[:-KEEP_VERSIONS], versions[1:]):
+        # remplacée quand la version suivante a été publiée
+        if now - newer.stat().st_mtime < grace_seconds:
+            break
+        shutil.rmtree(old, ignore_errors=True)
+        removed.append(old.name)
+    return removed
+
+
+def refresh_snapshot(frames: dict | None = None) -> str:
+    """
+    Reconstruire le snapshot depuis les KPIs Gold.
+
+    Args:
+        frames: KPIs déjà en mémoire (nom d'objet Gold -> DataFrame), les
+            autres sont lus depuis MinIO
+
+    Returns:
+        str: Version publiée
+    """
+    frames = frames or {}
+    gold = {
+        name: frames[object_name] if object_name in frames else read_parquet_cached(BUCKET_GOLD, object_name)
+        for name, object_name in GOLD_DATASETS.items()
+    }
+    version = write_snapshot(prepare_datasets(gold))
+    print(f"Snapshot dashboard {version} publié dans {SNAPSHOT_DIR}")
+    return version
+
+
+def current_version() -> str | None:
+    """Version du snapshot courant, ou None si aucun n'a été publié."""
+    try:
+        return (SNAPSHOT_DIR / CURRENT_FILE).read_text().strip()
+    except FileNotFoundError:
+        return None
+
+
+def read_manifest(version: str) -> dict:
+    return json.loads((SNAPSHOT_DIR / version / MANIFEST_FILE).read_text())
+
+
+def read_snapshot(name: str, version: str) -> pd.DataFrame:
+    """Lire un jeu de données d'un snapshot (fichier Arrow en memory-map)."""
+    with pa.memory_map(str(SNAPSHOT_DIR / version / f"{name}.arrow")) as source:
+        table = pa.ipc.open_file(source).read_all()
+    return to_pandas(table)
+
+
+if __name__ == "__main__":
+    refresh_snapshot()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Module importé par l'API pour la liste des fenêtres : pandas n'est chargé
+# que par compute_windows, côté Gold
+
+WINDOWS_OBJECT = "kpi_fenetres.parquet"
+WINDOWS_COLLECTION = "kpi_fenetres"
+
+# Ligne "pays" portant le total de tous les pays
+ALL_COUNTRIES = "Tous"
+
+# Granularité -> fréquence de période pandas (mêmes libellés que les KPIs
+# de volumes : 2026-10-19, 2026-10-13/2026-10-19, 2026-10)
+GRANULARITIES = {"jour": "D", "semaine": "W", "mois": "M"}
+
+# Fenêtre -> (granularité, type, nombre de périodes)
+#   rolling : moyenne des n dernières périodes, période courante incluse
+#   lag : valeur de la période n périodes plus tôt
+# Ajouter une entrée suffit : elle est calculée au prochain run Gold
+WINDOWS = {
+    "moyenne_7j": ("jour", "rolling", 7),
+    "moyenne_28j": ("jour", "rolling", 28),
+    "jour_semaine_precedente": ("jour", "lag", 7),
+    "semaine_precedente": ("semaine", "lag", 1),
+    "moyenne_4s": ("semaine", "rolling", 4),
+    "mois_precedent": ("mois", "lag", 1),
+    "moyenne_3m": ("mois", "rolling", 3),
+    "annee_precedente": ("mois", "lag", 12),
+}
+
+MEASURES = ["nb_achats", "ca_total"]
+
+# Colonnes de compute_windows
+COLUMNS = [
+    "fenetre", "granularite", "periode", "pays", *MEASURES,
+    "nb_achats_fenetre", "ca_fenetre", "ecart_pct",
+]
+
+
+def compute_windows(cube: pd.DataFrame, windows: dict = WINDOWS) -> pd.DataFrame:
+    """
+    Métriques glissantes et décalées par granularité et par pays.
+
+    Les agrégats journaliers du cube sont sommés une fois par granularité
+    dans une matrice période x pays (plus le total), complétée par les
+    périodes sans achat. Chaque fenêtre est ensuite un rolling ou un shift
+    sur toute la matrice à la fois, sans boucle sur les pays.
+
+    Returns:
+        pd.DataFrame: fenetre, granularite, periode, pays, nb_achats,
+            ca_total, nb_achats_fenetre, ca_fenetre (moyenne glissante ou
+            valeur décalée, vide tant que la fenêtre n'est pas complète) et
+            ecart_pct (écart du CA à ca_fenetre, en %), vide si le cube
+            est vide
+    """
+    import numpy as np
+    import pandas as pd
+
+    daily = cube.groupby(["jour", "pays"], observed=True)[MEASURES].sum()
+    if daily.empty:
+        return pd.DataFrame(columns=COLUMNS)
+    days = daily.index.get_level_values("jour")
+    countries = daily.index.get_level_values("pays").astype(str)
+
+    frames = []
+    for granularite in dict.fromkeys(spec[0] for spec in windows.values()):
+        freq = GRANULARITIES[granularite]
+        periods = days.to_period(freq)
+        calendar = pd.period_range(periods.min(), periods.max(), freq=freq)
+
+        # matrices période x pays, périodes sans achat à 0
+        wide = {}
+        for measure in MEASURES:
+            matrix = daily[measure].groupby([periods, countries]).sum().unstack(fill_value=0)
+            matrix = matrix.reindex(calendar, fill_value=0)
+            matrix[ALL_COUNTRIES] = matrix.sum(axis=1)
+            wide[measure] = matrix
+
+        labels = calendar.astype(str)
+        if granularite == "jour":
+            labels = calendar.strftime("%Y-%m-%d")
+        columns = wide["ca_total"].columns
+
+        for name, (window_granularity, kind, n) in windows.items():
+            if window_granularity != granularite:
+                continue
+            reference = {
+                measure: matrix.rolling(n, min_periods=n).mean() if kind == "rolling" else matrix.shift(n)
+                for measure, matrix in wide.items()
+            }
+
+            ca = wide["ca_total"].to_numpy(dtype=float)
+            ca_ref = reference["ca_total"].to_numpy(dtype=float)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ecart = np.where(ca_ref > 0, (ca - ca_ref) / ca_ref * 100, np.nan)
+
+            # une ligne par (pays, période), dans cet ordre
+            frames.append(pd.DataFrame({
+                "fenetre": name,
+                "granularite": granularite,
+                "periode": np.tile(labels, len(columns)),
+                "pays": np.repeat(columns.astype(str), len(calendar)),
+                "nb_achats": wide["nb_achats"].to_numpy().ravel(order="F"),
+                "ca_total": ca.ravel(order="F").round(2),
+                "nb_achats_fenetre": reference["nb_achats"].to_numpy(dtype=float).ravel(order="F").round(2),
+                "ca_fenetre": ca_ref.ravel(order="F").round(2),
+                "ecart_pct": ecart.ravel(order="F").round(2),
+            }))
+
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(frames, ignore_index=True)
@@ -1,107 +1,309 @@
-import csv
-import random
+"""
+Synthetic clients / achats generator.
+
+Columns are drawn with NumPy in chunks, one independent RNG stream per
+chunk (spawned from a single seed, so the output does not depend on the
+number of workers). Chunks are generated on a process pool and written in
+order to CSV or Parquet as they come back: memory stays bounded by a few
+chunks whatever the size of the data set. Names and emails are picked from
+a pool built once with Faker.
+
+    python script/generate_data.py
+    python script/generate_data.py --clients 1000000 --avg-purchases 20 --profile production --workers 8
+    python script/generate_data.py --format parquet --output-dir data/bench
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 from faker import Faker
 
-fake= Faker()
-Faker.seed(42)
-random.seed(42)
+COUNTRIES = ["France", "Germany", "Spain", "Italy", "Belgium",
+             "Netherland", "Switzerland", "UK", "Canada"]
+
+PRODUCTS = ["Laptop", "Phone", "Tablet", "Headphones", "Monitor", "Keyboard",
+            "Mouse", "Webcam", "Speaker", "Charger"]
+
+# Lois de tirage. Les poids sont normalisés, un poids absent vaut 1.
+#   country_weights / product_weights : répartition des clients et produits
+#   month_weights : saisonnalité des achats (janvier -> décembre)
+#   weekday_weights : lundi -> dimanche
+#   amount : "uniform" entre amount_min et amount_max, ou "lognormal"
+#            (médiane amount_median, dispersion amount_sigma) bornée
+PROFILES = {
+    # même loi que l'ancien générateur : tout est uniforme
+    "uniform": {
+        "amount": "uniform",
+    },
+    # proche des données réelles : pays et produits déséquilibrés, pic de
+    # fin d'année, soldes de janvier, montants asymétriques
+    "production": {
+        "country_weights": {"France": 35, "Germany": 18, "UK": 12, "Spain": 9, "Italy": 8,
+                            "Belgium": 6, "Netherland": 5, "Switzerland": 4, "Canada": 3},
+        "product_weights": {"Phone": 20, "Charger": 16, "Headphones": 14, "Mouse": 10,
+                            "Keyboard": 9, "Laptop": 9, "Speaker": 7, "Tablet": 6,
+                            "Webcam": 5, "Monitor": 4},
+        "month_weights": [1.2, 0.8, 0.85, 0.9, 0.95, 1.0, 1.05, 0.85, 0.95, 1.0, 1.4, 1.9],
+        "weekday_weights": [0.9, 0.9, 0.95, 1.0, 1.15, 1.3, 0.8],
+        "amount": "lognormal",
+        "amount_median": 60.0,
+        "amount_sigma": 0.9,
+    },
+}
+
+AMOUNT_MIN = 10.0
+AMOUNT_MAX = 500.0
+
+CLIENTS_SCHEMA = pa.schema([
+    ("id_client", pa.int64()),
+    ("nom", pa.string()),
+    ("email", pa.string()),
+    ("date_inscription", pa.date32()),
+    ("pays", pa.string()),
+])
+
+ACHATS_SCHEMA = pa.schema([
+    ("id_achat", pa.int64()),
+    ("id_client", pa.int64()),
+    ("date_achat", pa.timestamp("s")),
+    ("montant", pa.float64()),
+    ("produit", pa.string()),
+])
+
+
+def weights(values: list[str], mapping: dict | None) -> np.ndarray:
+    """Normalized weights of values (1 for the values missing in mapping)."""
+    w = np.array([(mapping or {}).get(value, 1.0) for value in values], dtype=float)
+    return w / w.sum()
+
+
+def day_weights(start: np.datetime64, n_days: int, profile: dict) -> np.ndarray:
+    """Probability of each day of the period: seasonality x day of week."""
+    days = start + np.arange(n_days)
+    months = days.astype("datetime64[M]").astype(int) % 12
+    weekdays = (days.astype(int) + 3) % 7  # 1970-01-01 était un jeudi
+
+    w = np.asarray(profile.get("month_weights", [1.0] * 12), dtype=float)[months]
+    w = w * np.asarray(profile.get("weekday_weights", [1.0] * 7), dtype=float)[weekdays]
+    return w / w.sum()
+
+
+def build_pool(size: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """Names and emails drawn once with Faker, then sampled by index."""
+    fake = Faker()
+    Faker.seed(seed)
+    names = np.array([fake.name() for _ in range(size)], dtype=object)
+    emails = np.array([fake.email() for _ in range(size)], dtype=object)
+    return names, emails
+
+
+def draw_amounts(rng: np.random.Generator, n: int, profile: dict) -> np.ndarray:
+    if profile.get("amount", "uniform") == "lognormal":
+        amounts = rng.lognormal(np.log(profile.get("amount_median", 60.0)), profile.get("amount_sigma", 0.9), n)
+        amounts = np.clip(amounts, AMOUNT_MIN, AMOUNT_MAX)
+    else:
+        amounts = rng.uniform(AMOUNT_MIN, AMOUNT_MAX, n)
+    return np.round(amounts, 2)
+
 
-def generate_clients(n_clients: int, output_path: str) -> list[int]:
+def clients_chunk(task: dict) -> pa.Table:
+    """Clients id_start .. id_stop - 1."""
+    rng = np.random.default_rng(task["seed"])
+    profile = task["profile"]
+    n = task["id_stop"] - task["id_start"]
+    names, emails = task["pool"]
+
+    # inscription entre il y a 3 ans et il y a 1 mois
+    first, last = task["inscription_range"]
+    inscriptions = first + rng.integers(0, (last - first).astype(int) + 1, n)
+
+    return pa.table({
+        "id_client": np.arange(task["id_start"], task["id_stop"]),
+        "nom": names[rng.integers(0, len(names), n)],
+        "email": emails[rng.integers(0, len(emails), n)],
+        "date_inscription": inscriptions,
+        "pays": np.array(COUNTRIES, dtype=object)[rng.choice(len(COUNTRIES), n, p=task["country_p"])],
+    }, schema=CLIENTS_SCHEMA)
+
+
+def achats_chunk(task: dict) -> pa.Table:
+    """Purchases of clients id_start .. id_stop - 1 (counts drawn beforehand)."""
+    rng = np.random.default_rng(task["seed"])
+    counts = task["counts"]
+    n = int(counts.sum())
+
+    # jour tiré selon la saisonnalité, heure uniforme, dans la période
+    start, end = task["period"]
+    days = rng.choice(len(task["day_p"]), n, p=task["day_p"])
+    dates = (start.astype("datetime64[D]") + days).astype("datetime64[s]") + rng.integers(0, 86400, n)
+    dates = np.clip(dates, start, end)
+
+    return pa.table({
+        "id_achat": np.arange(task["first_id"], task["first_id"] + n),
+        "id_client": np.repeat(np.arange(task["id_start"], task["id_stop"]), counts),
+        "date_achat": dates,
+        "montant": draw_amounts(rng, n, task["profile"]),
+        "produit": np.array(PRODUCTS, dtype=object)[rng.choice(len(PRODUCTS), n, p=task["product_p"])],
+    }, schema=ACHATS_SCHEMA)
+
+
+def open_writer(path: Path, schema: pa.Schema, fmt: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "parquet":
+        return pq.ParquetWriter(str(path), schema)
+    return pa_csv.CSVWriter(str(path), schema, write_options=pa_csv.WriteOptions(quoting_style="needed"))
+
+
+def write_chunks(function, tasks: list[dict], path: Path, schema: pa.Schema, fmt: str, workers: int) -> int:
     """
-    Generate fake client data
+    Generate the chunks on a process pool and write them in order.
 
-    Args:
-        n_clients (int): Numer of client to generate
-        output_path (str): Path to save the client csv file
+    At most 2 x workers chunks are in flight so that memory stays bounded.
 
     Returns:
-        list[int]: List of client IDs
+        int: Number of rows written
     """
+    writer = open_writer(path, schema, fmt)
+    rows = 0
+    try:
+        if workers <= 1:
+            for task in tasks:
+                table = function(task)
+                writer.write_table(table)
+                rows += table.num_rows
+            return rows
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = []
+            for task in tasks:
+                pending.append(pool.submit(function, task))
+                if len(pending) >= 2 * workers:
+                    table = pending.pop(0).result()
+                    writer.write_table(table)
+                    rows += table.num_rows
+            for future in pending:
+                table = future.result()
+                writer.write_table(table)
+                rows += table.num_rows
+        return rows
+    finally:
+        writer.close()
 
-    countries = ["France", "Germany", "Spain", "Italy", "Belgium", 
-                 "Netherland", "Switzerland", "UK", "Canada"]
-    
-    clients = []
-    client_ids = []
-
-    for i in range(1, n_clients + 1):
-        date_inscription = fake.date_between(start_date = "-3y", end_date= "-1m")
-        clients.append(
-            {
-                "id_client": i,
-                "nom": fake.name(),
-                "email": fake.email(),
-                "date_inscription": date_inscription.strftime("%Y-%m-%d"),
-                "pays": random.choice(countries)
-            }
-        )
-        client_ids.append(i)
-
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-
-    with open(output_path, "w", newline="", encoding= "utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["id_client", "nom", "email", "date_inscription", "pays"])
-        writer.writeheader()
-        writer.writerows(clients)
-
-    print(f"Generated Clients: {n_clients} in file {output_path} ")
-    return client_ids
-
-def generate_achats(client_ids: list[int], avg_purchases_per_client: int, output_path: str) -> None:
+
+def generate(
+    n_clients: int,
+    avg_purchases_per_client: int,
+    output_dir: Path,
+    fmt: str = "csv",
+    profile_name: str = "uniform",
+    workers: int = 1,
+    chunk_rows: int = 500_000,
+    seed: int = 42,
+    pool_size: int = 5000
+) -> dict:
     """
-    Generate fake purchase data.
+    Generate clients and achats files in output_dir.
+
+    Each client has between 1 and 2 x avg_purchases_per_client purchases,
+    dated over the last 365 days.
 
-    Args:
-        client_ids: List of client IDs
-        avg_purchases_per_client: Average number of purchases per client
-        output_path: Path to save achats.csv
+    Returns:
+        dict: Rows written per file
     """
-    products = ["Laptop", "Phone", "Tablet", "Headphones", "Monitor", "Keyboard",
-                "Mouse", "Webcam", "Speaker", "Charger"]
+    profile = PROFILES[profile_name]
+    extension = "parquet" if fmt == "parquet" else "csv"
 
-    achats = []
-    achat_id = 1
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=365)
+    # un flux RNG indépendant par tâche, dérivé du seed
+    counts_seed, clients_seed, achats_seed = np.random.SeedSequence(seed).spawn(3)
 
-    for client_id in client_ids:
-        n_purchases = random.randint(1, avg_purchases_per_client * 2)
+    today = np.datetime64(datetime.now().date(), "D")
+    pool = build_pool(min(pool_size, n_clients), seed)
 
-        for _ in range(n_purchases):
-            date_achat = fake.date_time_between(start_date=start_date, end_date=end_date)
-            achats.append({
-                "id_achat": achat_id,
-                "id_client": client_id,
-                "date_achat": date_achat.strftime("%Y-%m-%d %H:%M:%S"),
-                "montant": round(random.uniform(10, 500), 2),
-                "produit": random.choice(products)
-            })
-            achat_id += 1
+    # Clients
+    starts = range(1, n_clients + 1, chunk_rows)
+    client_tasks = [
+        {
+            "id_start": start,
+            "id_stop": min(start + chunk_rows, n_clients + 1),
+            "seed": chunk_seed,
+            "profile": profile,
+            "pool": pool,
+            "inscription_range": (today - np.timedelta64(3 * 365, "D"), today - np.timedelta64(30, "D")),
+            "country_p": weights(COUNTRIES, profile.get("country_weights")),
+        }
+        for start, chunk_seed in zip(starts, clients_seed.spawn(len(starts)))
+    ]
+    clients_path = output_dir / f"clients.{extension}"
+    n_written = write_chunks(clients_chunk, client_tasks, clients_path, CLIENTS_SCHEMA, fmt, workers)
+    print(f"Generated Clients: {n_written} in file {clients_path}")
 
-    with open(output_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["id_achat", "id_client", "date_achat", "montant", "produit"])
-        writer.writeheader()
-        writer.writerows(achats)
+    # Achats : nombre d'achats par client tiré d'abord, pour numéroter les
+    # id_achat de chaque tranche de clients sans coordination entre workers
+    counts = np.random.default_rng(counts_seed).integers(1, 2 * avg_purchases_per_client + 1, n_clients)
+    clients_per_chunk = max(1, chunk_rows // max(1, avg_purchases_per_client))
+    end_date = np.datetime64(datetime.now(), "s")
+    start_date = np.datetime64(datetime.now() - timedelta(days=365), "s")
+    start_day = start_date.astype("datetime64[D]")
+    day_p = day_weights(start_day, 366, profile)
+    product_p = weights(PRODUCTS, profile.get("product_weights"))
 
-    print(f"Generated {len(achats)} purchases -> {output_path}")
+    starts = range(1, n_clients + 1, clients_per_chunk)
+    achat_tasks = []
+    first_id = 1
+    for start, chunk_seed in zip(starts, achats_seed.spawn(len(starts))):
+        stop = min(start + clients_per_chunk, n_clients + 1)
+        chunk_counts = counts[start - 1:stop - 1]
+        achat_tasks.append({
+            "id_start": start,
+            "id_stop": stop,
+            "counts": chunk_counts,
+            "first_id": first_id,
+            "seed": chunk_seed,
+            "profile": profile,
+            "period": (start_date, end_date),
+            "day_p": day_p,
+            "product_p": product_p,
+        })
+        first_id += int(chunk_counts.sum())
 
+    achats_path = output_dir / f"achats.{extension}"
+    n_achats = write_chunks(achats_chunk, achat_tasks, achats_path, ACHATS_SCHEMA, fmt, workers)
+    print(f"Generated {n_achats} purchases -> {achats_path}")
 
+    return {str(clients_path): n_written, str(achats_path): n_achats}
 
-if __name__ == "__main__":
-    output_dir = Path(__file__).parent.parent / "data" / "sources"
 
-    clients_ids = generate_clients(
-        n_clients= 1500,
-        output_path=str(output_dir / "clients.csv")
-    )
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic clients and achats")
+    parser.add_argument("--clients", type=int, default=1500, help="Number of clients")
+    parser.add_argument("--avg-purchases", type=int, default=15, help="Average purchases per client")
+    parser.add_argument("--output-dir", default=str(Path(__file__).parent.parent / "data" / "sources"))
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--profile", choices=list(PROFILES), default="uniform", help="Distributions used")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--chunk-rows", type=int, default=500_000, help="Rows per generated chunk")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--pool-size", type=int, default=5000, help="Distinct names / emails")
+    args = parser.parse_args()
 
-    generate_achats(
-        client_ids=clients_ids,
-        avg_purchases_per_client=15,
-        output_path=str(output_dir / "achats.csv")
+    generate(
+        n_clients=args.clients,
+        avg_purchases_per_client=args.avg_purchases,
+        output_dir=Path(args.output_dir),
+        fmt=args.format,
+        profile_name=args.profile,
+        workers=args.workers,
+        chunk_rows=args.chunk_rows,
+        seed=args.seed,
+        pool_size=args.pool_size
     )
 
 
+if __name__ == "__main__":
+    main()
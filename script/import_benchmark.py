@@ -0,0 +1,150 @@
+"""
+Cold-start import benchmark of the entry points.
+
+Each entry point is imported in a fresh interpreter with -X importtime,
+several times, and the median import time (interpreter startup excluded)
+is compared to its budget. The heaviest modules imported by the entry
+point in the last run are listed to see where the time goes. Exit code 1
+if an entry point is over budget or fails to import.
+
+    python script/import_benchmark.py
+    python script/import_benchmark.py --repeat 10 --budget api=400 --output import_times.csv
+"""
+import argparse
+import csv
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Modules importés par dashboard/app.py : importer app.py lui-même
+# exécuterait la page (requêtes API, lectures du snapshot) hors de Streamlit
+DASHBOARD_MODULES = ", ".join([
+    "streamlit",
+    "dashboard.tabs.home",
+    "dashboard.tabs.ca_par_pays",
+    "dashboard.tabs.volumes",
+    "dashboard.tabs.croissance",
+    "dashboard.tabs.distribution",
+    "dashboard.tabs.minio_data",
+    "dashboard.tabs.analyse_cube",
+])
+
+# Entry point -> (modules imported, budget in ms)
+ENTRY_POINTS = {
+    "config": ("flows.config", 50),
+    "api": ("api.main", 400),
+    "pipeline": ("flows.pipeline", 2500),
+    "microbatch": ("flows.microbatch", 2500),
+    "dashboard": (DASHBOARD_MODULES, 3000),
+}
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(statement: str) -> list[tuple[int, str, int]]:
+    """
+    Run statement in a new interpreter with -X importtime.
+
+    Returns:
+        list[tuple[int, str, int]]: (depth, module, cumulative µs) per
+            imported module, in the order printed by the interpreter
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    times = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            depth = (len(match.group(3)) + 1) // 2
+            times.append((depth, match.group(4), int(match.group(2))))
+    return times
+
+
+def measure(name: str, module: str, budget_ms: float, repeat: int, top: int) -> dict:
+    """Median cold-start import time of one entry point."""
+    startup = {mod for depth, mod, _ in import_times("pass") if depth == 1}
+
+    totals = []
+    for _ in range(repeat):
+        times = import_times(f"import {module}")
+        totals.append(sum(us for depth, mod, us in times if depth == 1 and mod not in startup) / 1000)
+
+    # modules importés directement par l'entry point et ses packages parents
+    # (les enfants sont affichés avant leur parent)
+    children, direct = [], []
+    for depth, mod, us in times:
+        if depth == 2:
+            children.append((mod, us))
+        elif depth == 1:
+            if mod not in startup:
+                direct.extend(children)
+            children = []
+    heaviest = sorted(direct, key=lambda item: item[1], reverse=True)[:top]
+    median = statistics.median(totals)
+
+    return {
+        "entry_point": name,
+        "module": module,
+        "median_ms": round(median, 1),
+        "min_ms": round(min(totals), 1),
+        "max_ms": round(max(totals), 1),
+        "budget_ms": budget_ms,
+        "ok": median <= budget_ms,
+        "heaviest": ", ".join(f"{mod} {us / 1000:.0f}ms" for mod, us in heaviest),
+    }
+
+
+def parse_budgets(values: list[str]) -> dict:
+    budgets = {}
+    for value in values:
+        name, ms = value.split("=")
+        budgets[name] = float(ms)
+    return budgets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold-start import benchmark of the entry points")
+    parser.add_argument("--entry-points", default=",".join(ENTRY_POINTS), help="ex: api,pipeline")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per entry point")
+    parser.add_argument("--budget", action="append", default=[], help="Override a budget, ex: api=400")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest imports listed per entry point")
+    parser.add_argument("--output", help="CSV file of the results")
+    args = parser.parse_args()
+
+    budgets = parse_budgets(args.budget)
+    rows = []
+    for name in args.entry_points.split(","):
+        module, budget_ms = ENTRY_POINTS[name]
+        try:
+            row = measure(name, module, budgets.get(name, budget_ms), args.repeat, args.top)
+        except RuntimeError as e:
+            print(f"{name:<12} import impossible : {e}")
+            rows.append({"entry_point": name, "module": module, "budget_ms": budgets.get(name, budget_ms), "ok": False})
+            continue
+        rows.append(row)
+        status = "OK" if row["ok"] else "HORS BUDGET"
+        print(f"{name:<12} {row['median_ms']:>8.1f} ms (budget {row['budget_ms']:.0f} ms) {status}")
+        print(f"{'':<12} {row['heaviest']}")
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(max(rows, key=len)))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    sys.exit(0 if all(row["ok"] for row in rows) else 1)
+
+
+if __name__ == "__main__":
+    main()
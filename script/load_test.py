@@ -0,0 +1,255 @@
+"""
+Load test of the KPI API.
+
+Each configuration (uvicorn workers x shared Mongo client on/off) starts
+the API against a local MongoDB stand-in seeded with synthetic KPIs, then
+every endpoint is hit at increasing concurrency by an asyncio client.
+Throughput, latency percentiles and error rate are reported per endpoint.
+
+    docker compose --profile loadtest up -d mongo
+    python script/load_test.py --workers 1,4 --client-cache off,on --concurrency 1,16,64
+
+With --base-url, an already running API is tested as is (no seeding,
+single configuration).
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import httpx
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).parent.parent
+
+ENDPOINTS = [
+    "/api/ca_par_pays",
+    "/api/volumes_jour",
+    "/api/volumes_mois",
+    "/api/croissance",
+    "/api/distribution",
+    "/api/histogramme_montant",
+    "/api/ca_par_pays?sort=-ca_total&limit=5",
+    "/api/volumes_jour?sort=-nb_achats&limit=10",
+]
+
+
+def seed_mongo(mongo_uri: str, mongo_db: str, n_achats: int = 200_000, seed: int = 42) -> dict:
+    """
+    Fill the stand-in database with KPIs computed by the Gold and MongoDB
+    code paths from synthetic purchases.
+
+    Args:
+        mongo_uri: URI of the local MongoDB
+        mongo_db: Database used by the load test
+        n_achats: Number of synthetic purchases
+        seed: Random seed
+
+    Returns:
+        dict: Collection -> number of documents
+    """
+    os.environ["MONGO_URI"] = mongo_uri
+    os.environ["MONGO_DB"] = mongo_db
+    from flows import gold_ingestion as gold
+    from flows.mongodb_ingestion import export_to_mongodb
+
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.now().normalize()
+    fact = pd.DataFrame({
+        "id_achat": np.arange(1, n_achats + 1),
+        "date_achat": end - pd.to_timedelta(rng.uniform(0, 365, n_achats), unit="D"),
+        "montant": rng.uniform(10, 500, n_achats).round(2),
+        "produit": pd.Categorical(rng.choice(["Laptop", "Phone", "Tablet", "Headphones", "Monitor"], n_achats)),
+        "pays": pd.Categorical(rng.choice(["France", "Germany", "Spain", "Italy", "Belgium", "UK"], n_achats)),
+        "annee_inscription": pd.array(rng.integers(end.year - 3, end.year + 1, n_achats), dtype="Int16"),
+    })
+
+    cube = gold.aggregate_achats.fn(fact)
+    volumes = gold.kpi_volumes_par_periode.fn(cube)
+    sketch = gold.build_montant_sketch.fn(fact)
+    kpis = {
+        "kpi_volumes_jour": volumes["jour"],
+        "kpi_volumes_semaine": volumes["semaine"],
+        "kpi_volumes_mois": volumes["mois"],
+        "kpi_ca_par_pays": gold.kpi_ca_par_pays.fn(cube),
+        "kpi_croissance": gold.kpi_croissance.fn(volumes["mois"]),
+        "kpi_distribution": gold.kpi_distribution.fn(sketch),
+        "kpi_histogramme_montant": gold.kpi_histogramme_montant.fn(sketch),
+    }
+
+    return {name: export_to_mongodb.fn(df, name) for name, df in kpis.items()}
+
+
+def wait_ready(base_url: str, timeout: float = 30) -> None:
+    """Poll the API home page until it answers."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"API not ready after {timeout}s: {base_url}")
+
+
+@contextmanager
+def run_api(port: int, workers: int, client_cache: bool, mongo_uri: str, mongo_db: str):
+    """Start the API with uvicorn in a subprocess for one configuration."""
+    env = {
+        **os.environ,
+        "MONGO_URI": mongo_uri,
+        "MONGO_DB": mongo_db,
+        "MONGO_CLIENT_CACHE": str(client_cache),
+    }
+    command = [
+        sys.executable, "-m", "uvicorn", "api.main:app",
+        "--host", "127.0.0.1",
+        "--port", str(port),
+        "--workers", str(workers),
+        "--log-level", "warning",
+    ]
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_ready(base_url)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+async def _user(client: httpx.AsyncClient, endpoints: list[str], offset: int, deadline: float, samples: dict) -> None:
+    """One virtual user: requests the endpoints in turn until the deadline."""
+    for endpoint in itertools.islice(itertools.cycle(endpoints), offset, None):
+        if time.perf_counter() >= deadline:
+            return
+        start = time.perf_counter()
+        try:
+            response = await client.get(endpoint)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        samples[endpoint].append((time.perf_counter() - start, ok))
+
+
+async def run_step(base_url: str, endpoints: list[str], concurrency: int, duration: float) -> tuple[dict, float]:
+    """
+    Run concurrency virtual users for duration seconds.
+
+    Returns:
+        tuple[dict, float]: Endpoint -> [(latency_s, ok)], measured elapsed time
+    """
+    samples = {endpoint: [] for endpoint in endpoints}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(
+            _user(client, endpoints, i, deadline, samples) for i in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+
+    return samples, elapsed
+
+
+def summarize(samples: dict, elapsed: float) -> list[dict]:
+    """Throughput, latency percentiles (ms) and error rate per endpoint, plus a total row."""
+    rows = []
+    groups = dict(samples)
+    groups["TOTAL"] = [sample for values in samples.values() for sample in values]
+
+    for endpoint, values in groups.items():
+        if not values:
+            continue
+        latencies = np.array([latency for latency, _ in values]) * 1000
+        errors = sum(1 for _, ok in values if not ok)
+        rows.append({
+            "endpoint": endpoint,
+            "requests": len(values),
+            "rps": round(len(values) / elapsed, 1),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+            "max_ms": round(float(latencies.max()), 2),
+            "error_pct": round(100 * errors / len(values), 2),
+        })
+
+    return rows
+
+
+def run_config(base_url: str, config: dict, endpoints: list[str], levels: list[int], duration: float) -> list[dict]:
+    """Hit every endpoint at each concurrency level for one configuration."""
+    results = []
+    for concurrency in levels:
+        samples, elapsed = asyncio.run(run_step(base_url, endpoints, concurrency, duration))
+        rows = summarize(samples, elapsed)
+        total = rows[-1]
+        print(
+            f"{config} concurrency={concurrency}: {total['rps']} req/s, "
+            f"p95={total['p95_ms']} ms, erreurs={total['error_pct']}%"
+        )
+        results.extend({**config, "concurrency": concurrency, **row} for row in rows)
+    return results
+
+
+def parse_list(value: str, cast=int) -> list:
+    return [cast(item) for item in value.split(",") if item]
+
+
+def parse_bool(value: str) -> bool:
+    return value.lower() in ("on", "true", "1", "yes")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test of the KPI API")
+    parser.add_argument("--base-url", help="Test an already running API instead of starting one per configuration")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017", help="Local MongoDB stand-in")
+    parser.add_argument("--mongo-db", default="loadtest")
+    parser.add_argument("--no-seed", action="store_true", help="Keep the KPIs already in --mongo-db")
+    parser.add_argument("--workers", default="1", help="uvicorn worker counts, ex: 1,4")
+    parser.add_argument("--client-cache", default="off,on", help="Shared Mongo client (MONGO_CLIENT_CACHE), ex: off,on")
+    parser.add_argument("--concurrency", default="1,8,32,64", help="Virtual users per step")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per step")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--port", type=int, default=5100)
+    parser.add_argument("--output", default="load_test_results.csv")
+    args = parser.parse_args()
+
+    endpoints = parse_list(args.endpoints, str)
+    levels = parse_list(args.concurrency)
+    results = []
+
+    if args.base_url:
+        results = run_config(args.base_url, {"config": args.base_url}, endpoints, levels, args.duration)
+    else:
+        if not args.no_seed:
+            print(f"Seed: {seed_mongo(args.mongo_uri, args.mongo_db)}")
+
+        for workers, client_cache in itertools.product(parse_list(args.workers), parse_list(args.client_cache, parse_bool)):
+            config = {"workers": workers, "client_cache": client_cache}
+            with run_api(args.port, workers, client_cache, args.mongo_uri, args.mongo_db) as base_url:
+                results.extend(run_config(base_url, config, endpoints, levels, args.duration))
+
+    df = pd.DataFrame(results)
+    df.to_csv(args.output, index=False)
+
+    config_columns = [col for col in ("config", "workers", "client_cache") if col in df.columns]
+    comparison = df[df["endpoint"] == "TOTAL"].pivot_table(
+        index=config_columns,
+        columns="concurrency",
+        values=["rps", "p95_ms", "error_pct"]
+    )
+    print(comparison.to_string())
+    print(f"Détail par endpoint : {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import io
+from types import SimpleNamespace
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+
+def parquet_bytes(table: pa.Table, **kwargs) -> bytes:
+    """Parquet file of a table, written in memory."""
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, **kwargs)
+    return buffer.getvalue()
+
+
+class MemoryObjects:
+    """
+    Objects of a single bucket kept in memory, with the client calls and
+    the read_object signature used by the flows (offset / length ranges).
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self.reads = []
+
+    def stat_object(self, bucket, object_name):
+        return SimpleNamespace(size=len(self.objects[object_name]))
+
+    def read_object(self, bucket, object_name, offset=0, length=0):
+        data = self.objects[object_name]
+        self.reads.append((offset, length))
+        return data[offset:offset + length] if length else data[offset:]
+
+
+@pytest.fixture
+def memory_objects():
+    return MemoryObjects()
@@ -0,0 +1,68 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from api import main
+from flows import caching, cube, resilience
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilience.time, "sleep", lambda seconds: None)
+    return TestClient(main.app)
+
+
+class Unreachable:
+    """HEAD request on MinIO failing with a transient error."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def stat_object(self, bucket, object_name):
+        self.calls += 1
+        raise ConnectionError("MinIO injoignable")
+
+
+def test_cube_transient_error_is_503_after_api_retries(client, monkeypatch):
+    minio = Unreachable()
+    monkeypatch.setattr(caching, "get_minio_client", lambda: minio)
+    monkeypatch.setattr(cube, "_loaded", {"etag": None, "cube": None})
+
+    response = client.get("/api/cube?dimensions=pays")
+
+    assert response.status_code == 503
+    assert response.json()["detail"] == "MinIO indisponible"
+    assert minio.calls == main.API_IO_RETRIES + 1
+
+
+def test_cube_open_breaker_is_503(client, monkeypatch):
+    monkeypatch.setattr(resilience, "IO_BREAKER_THRESHOLD", 1)
+    minio = Unreachable()
+    monkeypatch.setattr(caching, "get_minio_client", lambda: minio)
+
+    client.get("/api/cube")
+    calls = minio.calls
+    response = client.get("/api/cube")
+
+    assert response.status_code == 503
+    assert minio.calls == calls
+
+
+def test_cube_bad_dimension_is_400(client, monkeypatch):
+    import pandas as pd
+
+    monkeypatch.setattr(cube, "load_cube", lambda: pd.DataFrame(columns=cube.CUBE_DIMENSIONS + ["nb_achats", "ca_total", "ca_carre"]))
+    assert client.get("/api/cube?dimensions=couleur").status_code == 400
+
+
+def test_mongo_transient_error_is_503(client, monkeypatch):
+    import mongomock
+
+    monkeypatch.setattr(main, "get_mongo_db", lambda: mongomock.MongoClient()["datalake"])
+
+    def down(db):
+        raise TimeoutError("MongoDB injoignable")
+
+    with pytest.raises(main.HTTPException) as error:
+        main.run_query(down)
+    assert error.value.status_code == 503
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from flows.cube import rollup
+from flows.gold_ingestion import aggregate_achats
+
+
+@pytest.fixture(scope="module")
+def fact():
+    rng = np.random.default_rng(0)
+    n = 500
+    return pd.DataFrame({
+        "id_achat": np.arange(n),
+        "date_achat": pd.Timestamp("2024-11-01") + pd.to_timedelta(rng.integers(0, 120 * 86400, n), unit="s"),
+        "pays": pd.Categorical(rng.choice(["France", "Espagne", "Italie"], n)),
+        "produit": pd.Categorical(rng.choice(["a", "b"], n)),
+        "annee_inscription": pd.array(rng.choice([2020, 2021], n), dtype="Int16"),
+        "montant": rng.uniform(1, 300, n).round(2),
+    })
+
+
+@pytest.fixture(scope="module")
+def cube(fact):
+    return aggregate_achats.fn(fact)
+
+
+def expected(fact, by):
+    grouped = fact.groupby(by, observed=True)["montant"]
+    return pd.DataFrame({
+        "nb_achats": grouped.count(),
+        "ca_total": grouped.sum().round(2),
+        "panier_moyen": grouped.mean().round(2),
+        "ecart_type": grouped.std().round(2),
+    }).reset_index()
+
+
+def test_rollup_by_country_matches_the_facts(fact, cube):
+    result = rollup(cube, ["pays"])
+
+    pd.testing.assert_frame_equal(
+        result.astype({"pays": object}).sort_values("pays", ignore_index=True),
+        expected(fact.astype({"pays": object}), "pays"),
+        check_dtype=False,
+    )
+
+
+def test_rollup_by_month_and_product(fact, cube):
+    result = rollup(cube, ["mois", "produit"])
+    by_month = fact.assign(mois=fact["date_achat"].dt.to_period("M").astype(str), produit=fact["produit"].astype(object))
+
+    pd.testing.assert_frame_equal(
+        result.astype({"produit": object}).sort_values(["mois", "produit"], ignore_index=True),
+        expected(by_month, ["mois", "produit"]),
+        check_dtype=False,
+    )
+
+
+def test_grand_total(fact, cube):
+    total = rollup(cube, []).iloc[0]
+
+    assert total["nb_achats"] == len(fact)
+    assert total["ca_total"] == pytest.approx(fact["montant"].sum(), abs=0.01)
+    assert total["ecart_type"] == pytest.approx(fact["montant"].std(), abs=0.01)
+
+
+def test_filters_and_date_range(fact, cube):
+    result = rollup(cube, [], filters={"pays": ["France"], "annee_inscription": [2021]},
+                    date_debut="2024-12-01", date_fin="2025-01-31")
+
+    jour = fact["date_achat"].dt.normalize()
+    mask = (
+        (fact["pays"] == "France") & (fact["annee_inscription"] == 2021)
+        & (jour >= "2024-12-01") & (jour <= "2025-01-31")
+    )
+    assert result["nb_achats"].iloc[0] == mask.sum()
+    assert result["ca_total"].iloc[0] == pytest.approx(fact.loc[mask, "montant"].sum(), abs=0.01)
+
+
+def test_unknown_dimension(cube):
+    with pytest.raises(ValueError, match="couleur"):
+        rollup(cube, ["couleur"])
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.downsampling import downsample, lttb_indices, minmax_indices
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    n = 10_000
+    y = np.cumsum(rng.normal(size=n))
+    # pic et creux isolés, à garder
+    y[1234] = 500.0
+    y[8765] = -500.0
+    return pd.DataFrame({"jour": pd.date_range("2000-01-01", periods=n, freq="D"), "ca_total": y})
+
+
+def test_lttb_keeps_endpoints_and_extremes(series):
+    x = np.arange(len(series), dtype=float)
+    indices = lttb_indices(x, series["ca_total"].to_numpy(), 200)
+
+    assert len(indices) == 200
+    assert indices[0] == 0 and indices[-1] == len(series) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert {1234, 8765} <= set(indices)
+
+
+def test_minmax_keeps_every_bucket_extreme(series):
+    y = series["ca_total"].to_numpy()
+    indices = minmax_indices(y, 202)
+
+    assert len(indices) <= 202
+    assert np.all(np.diff(indices) > 0)
+    edges = np.linspace(0, len(y), 101).astype(np.int64)
+    for start, stop in zip(edges[:-1], edges[1:]):
+        kept = indices[(indices >= start) & (indices < stop)]
+        assert y[start:stop].min() in y[kept]
+        assert y[start:stop].max() in y[kept]
+
+
+def test_short_series_are_kept():
+    y = np.arange(50, dtype=float)
+    assert len(minmax_indices(y, 100)) == 50
+    assert len(lttb_indices(y, y, 50)) == 50
+    # moins de 3 points demandés : pas de sous-échantillonnage
+    assert len(lttb_indices(y, y, 2)) == 50
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsample_returns_rows_of_the_data(series, method):
+    shuffled = series.sample(frac=1, random_state=0)
+    shuffled.loc[shuffled.index[:10], "ca_total"] = np.nan
+
+    result = downsample(shuffled, "jour", "ca_total", 300, method)
+
+    assert len(result) <= 300
+    assert result["jour"].is_monotonic_increasing
+    assert result["ca_total"].notna().all()
+    pd.testing.assert_frame_equal(result, series.loc[result.index])
+    assert result["ca_total"].max() == 500.0
+    assert result["ca_total"].min() == -500.0
+
+
+def test_downsample_small_frame_is_unchanged(series):
+    small = series.head(100)
+    assert downsample(small, "jour", "ca_total", 300) is small
+
+
+def test_unknown_method(series):
+    with pytest.raises(ValueError):
+        downsample(series, "jour", "ca_total", 300, "mean")
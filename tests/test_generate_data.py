@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+
+from flows.schemas import read_csv_with_schema
+from script import generate_data
+from script.generate_data import AMOUNT_MAX, AMOUNT_MIN, COUNTRIES, PRODUCTS, generate
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2025, 6, 15, 12, 0, 0)
+
+
+@pytest.fixture(autouse=True)
+def frozen_now(monkeypatch):
+    # période des achats relative à maintenant : figée pour comparer deux runs
+    monkeypatch.setattr(generate_data, "datetime", FrozenDatetime)
+
+
+def run(tmp_path, name, **kwargs):
+    options = {"n_clients": 300, "avg_purchases_per_client": 4, "fmt": "parquet", "chunk_rows": 200, "pool_size": 50}
+    generate(output_dir=tmp_path / name, **{**options, **kwargs})
+    return pq.read_table(tmp_path / name / "clients.parquet"), pq.read_table(tmp_path / name / "achats.parquet")
+
+
+def test_output_does_not_depend_on_workers(tmp_path):
+    sequential = run(tmp_path, "sequential", workers=1)
+    parallel = run(tmp_path, "parallel", workers=3)
+
+    assert sequential[0].equals(parallel[0])
+    assert sequential[1].equals(parallel[1])
+
+
+def test_seed_changes_the_data(tmp_path):
+    assert not run(tmp_path, "a", seed=1)[1].equals(run(tmp_path, "b", seed=2)[1])
+
+
+def test_generated_values(tmp_path):
+    clients, achats = (table.to_pandas() for table in run(tmp_path, "data", profile_name="production"))
+
+    assert clients["id_client"].tolist() == list(range(1, 301))
+    assert achats["id_achat"].tolist() == list(range(1, len(achats) + 1))
+    assert achats["id_client"].isin(clients["id_client"]).all()
+
+    counts = achats.groupby("id_client").size()
+    assert len(counts) == 300 and counts.between(1, 8).all()
+
+    assert achats["montant"].between(AMOUNT_MIN, AMOUNT_MAX).all()
+    assert achats["date_achat"].between(datetime(2024, 6, 15, 12), datetime(2025, 6, 15, 12)).all()
+    assert set(achats["produit"]) <= set(PRODUCTS)
+    assert set(clients["pays"]) <= set(COUNTRIES)
+    # profil production : France majoritaire
+    assert clients["pays"].value_counts().idxmax() == "France"
+
+
+def test_csv_is_read_by_the_silver_schemas(tmp_path):
+    generate(n_clients=50, avg_purchases_per_client=3, output_dir=tmp_path, chunk_rows=20, pool_size=20)
+
+    clients = read_csv_with_schema(str(tmp_path / "clients.csv"), "clients")
+    achats = read_csv_with_schema(str(tmp_path / "achats.csv"), "achats")
+
+    assert clients.num_rows == 50
+    assert clients["date_inscription"].null_count == 0
+    assert achats["date_achat"].null_count == 0
+    assert np.all(np.diff(achats["id_achat"].to_numpy()) == 1)
@@ -0,0 +1,203 @@
+import io
+import json
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from flows import gold_ingestion, out_of_core
+from flows.caching import json_payload
+from flows.cube import CUBE_DIMENSIONS, MEASURES
+from flows.gold_ingestion import (
+    aggregate_achats,
+    build_client_lookup,
+    build_montant_sketch,
+    create_dim_temps,
+    create_fact_achats,
+    enrich_with_clients,
+    kpi_ca_par_pays,
+    kpi_distribution,
+    kpi_volumes_par_periode,
+    load_silver,
+    merge_aggregates,
+    process_achats_out_of_core,
+)
+from flows.schemas import to_pandas, to_parquet
+
+
+@pytest.fixture
+def clients():
+    return pd.DataFrame({
+        "id_client": [1, 2, 3],
+        "pays": ["France", "Espagne", "France"],
+        "date_inscription": pd.to_datetime(["2020-03-01", "2021-06-15", "2022-01-10"]),
+    })
+
+
+@pytest.fixture
+def achats():
+    return pd.DataFrame({
+        "id_achat": list(range(8)),
+        "id_client": [1, 2, 3, 1, 2, 3, 1, 2],
+        "date_achat": pd.to_datetime([
+            "2025-01-01", "2025-01-01", "2025-01-02", "2025-02-10",
+            "2025-02-10", "2025-03-05", "2025-03-05", "2025-03-06",
+        ]),
+        "montant": [10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0, 80.0],
+        "produit": ["a", "b", "a", "b", "a", "b", "a", "b"],
+    })
+
+
+@pytest.fixture
+def silver_achats(monkeypatch, tmp_path, achats):
+    """achats.parquet Silver en row groups de 3 lignes, lu depuis le disque."""
+    path = tmp_path / "achats.parquet"
+    pq.write_table(pa.Table.from_pandas(achats, preserve_index=False), path, row_group_size=3)
+    monkeypatch.setattr(gold_ingestion, "cached_path", lambda bucket, name: path)
+    monkeypatch.setattr(out_of_core, "SPILL_DIR", tmp_path / "spill")
+    return path
+
+
+def sorted_cube(cube):
+    return cube.astype({col: object for col in ("pays", "produit")}).sort_values(CUBE_DIMENSIONS, ignore_index=True)
+
+
+def test_out_of_core_matches_in_memory(clients, achats, silver_achats):
+    result = process_achats_out_of_core.fn(clients, estimated_bytes=10**9)
+    try:
+        expected = aggregate_achats.fn(create_fact_achats.fn(achats, clients))
+
+        pd.testing.assert_frame_equal(
+            sorted_cube(result["cube"])[CUBE_DIMENSIONS + MEASURES],
+            sorted_cube(expected)[CUBE_DIMENSIONS + MEASURES],
+            check_dtype=False,
+        )
+        assert result["nb_achats"] == len(achats)
+    finally:
+        out_of_core.cleanup(result["spill_state"])
+
+
+def test_out_of_core_id_bounds_keep_id_zero(monkeypatch, tmp_path, clients, achats):
+    # plus d'un lot de iter_batches (65 536 lignes), id 0 dans le premier
+    n = 70_000
+    many = achats.sample(n, replace=True, random_state=0).assign(id_achat=range(n))
+    path = tmp_path / "achats.parquet"
+    pq.write_table(pa.Table.from_pandas(many, preserve_index=False), path)
+    monkeypatch.setattr(gold_ingestion, "cached_path", lambda bucket, name: path)
+    monkeypatch.setattr(out_of_core, "SPILL_DIR", tmp_path / "spill")
+
+    result = process_achats_out_of_core.fn(clients, estimated_bytes=10**9)
+    out_of_core.cleanup(result["spill_state"])
+
+    assert (result["id_min"], result["id_max"]) == (0, n - 1)
+
+
+def test_out_of_core_watermark(clients, silver_achats):
+    result = process_achats_out_of_core.fn(clients, estimated_bytes=10**9, min_id_achat=4)
+    out_of_core.cleanup(result["spill_state"])
+
+    assert result["nb_achats"] == 3
+    assert (result["id_min"], result["id_max"]) == (5, 7)
+
+
+def merged_fact(achats, clients):
+    """Enrichissement de référence : merge pandas sur id_client."""
+    attributes = clients.assign(annee_inscription=clients["date_inscription"].dt.year)[["id_client", "pays", "annee_inscription"]]
+    return achats.merge(attributes, on="id_client", how="left")
+
+
+@pytest.mark.parametrize("offset", [0, 10**6], ids=["dense", "hash"])
+def test_enrichment_matches_a_merge(clients, achats, offset):
+    clients = clients.assign(id_client=clients["id_client"] + offset)
+    achats = achats.assign(id_client=achats["id_client"] + offset)
+    lookup = build_client_lookup(clients)
+
+    fact = enrich_with_clients(achats, lookup)
+    expected = merged_fact(achats, clients)
+
+    assert lookup["dense"] == (offset == 0)
+    assert fact["pays"].astype(object).tolist() == expected["pays"].tolist()
+    assert fact["annee_inscription"].astype("Int64").tolist() == expected["annee_inscription"].tolist()
+
+
+@pytest.mark.parametrize("offset", [0, 10**6], ids=["dense", "hash"])
+def test_enrichment_of_unknown_or_missing_clients(clients, achats, offset):
+    clients = clients.assign(id_client=clients["id_client"] + offset)
+    achats = achats.head(3).assign(id_client=pd.array([1 + offset, 999 + offset, None], dtype="Int64"))
+
+    fact = enrich_with_clients(achats, build_client_lookup(clients))
+
+    assert fact["pays"].isna().tolist() == [False, True, True]
+    assert fact["annee_inscription"].isna().tolist() == [False, True, True]
+    assert fact["pays"].iloc[0] == "France"
+
+
+def gold_state(achats, clients, previous=None, watermark=None):
+    """
+    Étapes de gold_transformation_flow en mémoire : delta au-dessus du
+    watermark, fusion dans le cube et le sketch persistés (aller-retour
+    Parquet / JSON comme dans MinIO).
+    """
+    delta = load_silver("achats", {"achats": achats}, min_id_achat=watermark)
+    fact = create_fact_achats.fn(delta, clients)
+    previous_cube, previous_sketch = previous or (None, None)
+    cube = merge_aggregates.fn(previous_cube, aggregate_achats.fn(fact))
+    sketch = build_montant_sketch.fn(fact, previous_sketch)
+    stored_cube = to_pandas(pq.read_table(io.BytesIO(to_parquet(cube))))
+    return (stored_cube, json.loads(json_payload(sketch)[0])), int(delta["id_achat"].max())
+
+
+def test_incremental_gold_equals_full(clients, achats):
+    (full_cube, full_sketch), _ = gold_state(achats, clients)
+
+    first, watermark = gold_state(achats[achats["id_achat"] < 5], clients)
+    (cube, sketch), last = gold_state(achats, clients, previous=first, watermark=watermark)
+
+    assert (watermark, last) == (4, 7)
+    pd.testing.assert_frame_equal(sorted_cube(cube), sorted_cube(full_cube), check_dtype=False)
+    for name in ("jour", "semaine", "mois"):
+        pd.testing.assert_frame_equal(
+            kpi_volumes_par_periode.fn(cube)[name], kpi_volumes_par_periode.fn(full_cube)[name]
+        )
+    pd.testing.assert_frame_equal(kpi_ca_par_pays.fn(cube), kpi_ca_par_pays.fn(full_cube), check_categorical=False)
+    pd.testing.assert_frame_equal(kpi_distribution.fn(sketch), kpi_distribution.fn(full_sketch))
+
+
+def test_watermark_filters_silver_reads(monkeypatch, achats):
+    calls = []
+    monkeypatch.setattr(gold_ingestion, "read_parquet_from_silver", lambda name, filters=None: calls.append((name, filters)))
+
+    load_silver("achats", {}, min_id_achat=4)
+    load_silver("achats", {})
+
+    assert calls == [("achats.parquet", [("id_achat", ">", 4)]), ("achats.parquet", None)]
+    assert load_silver("achats", {"achats": achats}, min_id_achat=4)["id_achat"].tolist() == [5, 6, 7]
+
+
+def test_dim_temps_is_a_daily_calendar(clients, achats):
+    fact = create_fact_achats.fn(achats, clients)
+
+    dim = create_dim_temps.fn(achats["date_achat"].min(), achats["date_achat"].max() + pd.Timedelta(hours=23))
+
+    # un jour par ligne, bornes incluses, y compris les jours sans achat
+    assert len(dim) == (pd.Timestamp("2025-03-06") - pd.Timestamp("2025-01-01")).days + 1
+    assert dim["id_temps"].is_unique
+    assert dim["id_temps"].iloc[[0, -1]].tolist() == [20250101, 20250306]
+    assert set(fact["id_temps"]) <= set(dim["id_temps"])
+
+
+def test_dim_temps_attributes():
+    dim = create_dim_temps.fn(pd.Timestamp("2024-12-30 18:00"), pd.Timestamp("2025-01-01")).set_index("id_temps")
+
+    # semaine ISO : le 30/12/2024 est en semaine 1 de 2025
+    assert dim.loc[20241230, ["annee", "mois", "jour", "semaine"]].tolist() == [2024, 12, 30, 1]
+    assert dim["jour_semaine"].astype(str).tolist() == ["Monday", "Tuesday", "Wednesday"]
+    assert dim["date"].tolist() == list(pd.date_range("2024-12-30", "2025-01-01"))
+
+
+def test_dim_temps_without_dates():
+    dim = create_dim_temps.fn(pd.NaT, pd.NaT)
+
+    assert dim.empty
+    assert "id_temps" in dim.columns
@@ -0,0 +1,89 @@
+from datetime import datetime
+
+import mongomock
+import pytest
+
+from flows import kpi_store
+from flows.kpi_store import bucket_increments, from_buckets, read_kpi, read_rows, to_buckets
+
+DAYS = [
+    {"jour": datetime(2025, 1, 30), "nb_achats": 3, "ca_total": 120.5},
+    {"jour": datetime(2025, 1, 31), "nb_achats": 1, "ca_total": 10.0},
+    {"jour": datetime(2025, 2, 1), "nb_achats": 2, "ca_total": 80.25},
+    {"jour": datetime(2025, 3, 15), "nb_achats": 5, "ca_total": 300.0},
+]
+
+MONTHS = [
+    {"mois": "2024-12", "nb_achats": 40, "ca_total": 4000.0},
+    {"mois": "2025-01", "nb_achats": 30, "ca_total": 3000.0},
+    {"mois": "2025-03", "nb_achats": 10, "ca_total": 990.5},
+]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(kpi_store, "MONGO_VOLUMES_BUCKETS", True)
+    return mongomock.MongoClient()["datalake"]
+
+
+def apply(collection, operations):
+    # bulk_write de mongomock ne prend pas les UpdateOne des pymongo récents :
+    # mêmes opérations, dans l'ordre
+    for operation in operations:
+        collection.update_one(operation._filter, operation._doc, upsert=bool(operation._upsert))
+
+
+@pytest.mark.parametrize("collection_name, records", [("kpi_volumes_jour", DAYS), ("kpi_volumes_mois", MONTHS)])
+def test_buckets_round_trip(collection_name, records):
+    buckets = to_buckets(records, collection_name)
+    assert from_buckets(buckets, collection_name) == records
+
+
+def test_day_buckets_are_months():
+    buckets = to_buckets(DAYS, "kpi_volumes_jour")
+
+    assert [bucket["_id"] for bucket in buckets] == ["2025-01", "2025-02", "2025-03"]
+    assert buckets[0]["debut"] == datetime(2025, 1, 1)
+    assert len(buckets[0]["nb_achats"]) == 31
+    assert buckets[0]["nb_achats"][29:] == [3, 1]
+    assert sum(buckets[2]["nb_achats"]) == 5
+
+
+def test_read_rows_filters_bucketed_periods(db):
+    db["kpi_volumes_jour"].insert_many(to_buckets(DAYS, "kpi_volumes_jour"))
+
+    rows = read_rows(db, "kpi_volumes_jour", datetime(2025, 1, 31), datetime(2025, 2, 28))
+    assert rows == DAYS[1:3]
+    assert read_rows(db, "kpi_volumes_jour") == DAYS
+
+
+def test_read_kpi_sorts_and_serializes_buckets(db):
+    db["kpi_volumes_mois"].insert_many(to_buckets(MONTHS, "kpi_volumes_mois"))
+
+    rows = read_kpi(db, "kpi_volumes_mois", sort="-ca_total", limit=2, debut="2025-01", fin="2025-12")
+    assert rows == [MONTHS[1], MONTHS[2]]
+
+
+def test_bucket_increments_are_applied_once(db):
+    collection = db["kpi_volumes_jour"]
+    collection.insert_many(to_buckets(DAYS[:2], "kpi_volumes_jour"))
+    delta = [
+        {"jour": datetime(2025, 1, 31), "nb_achats": 2, "ca_total": 15.0},
+        {"jour": datetime(2025, 4, 2), "nb_achats": 1, "ca_total": 9.5},
+    ]
+
+    for _ in range(2):
+        # lot rejoué : les buckets ont déjà reçu ce lot
+        apply(collection, bucket_increments(delta, "kpi_volumes_jour", "lot-1"))
+
+    rows = read_rows(db, "kpi_volumes_jour")
+    assert rows == [
+        DAYS[0],
+        {"jour": datetime(2025, 1, 31), "nb_achats": 3, "ca_total": 25.0},
+        {"jour": datetime(2025, 4, 2), "nb_achats": 1, "ca_total": 9.5},
+    ]
+    assert collection.find_one({"_id": "2025-01"})[kpi_store.APPLIED_FIELD] == ["lot-1"]
+
+    # un autre lot s'ajoute
+    apply(collection, bucket_increments(delta[:1], "kpi_volumes_jour", "lot-2"))
+    assert read_rows(db, "kpi_volumes_jour", datetime(2025, 1, 31), datetime(2025, 1, 31))[0]["nb_achats"] == 5
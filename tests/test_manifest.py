@@ -0,0 +1,128 @@
+import json
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pyarrow as pa
+import pytest
+from minio.error import S3Error
+
+from flows import manifest
+from flows.manifest import column_range, describe_parquet, load_manifest, object_entry, record_object, schema_hash
+
+from .conftest import parquet_bytes
+
+TABLE = pa.table({
+    "id_achat": pa.array([1, 2, 3, 4, 5, 6], pa.int64()),
+    "montant": pa.array([10.5, None, 3.25, 99.0, 42.0, None]),
+    "montant_decimal": pa.array([Decimal("10.50"), None, Decimal("3.25"), Decimal("99.00"), Decimal("42.00"), None], pa.decimal128(12, 2)),
+    "date_achat": pa.array([date(2025, 1, d) for d in (3, 1, 9, 2, 30, 12)]),
+    "produit": pa.array(["a", "b", "c", "d", "e", "f"]),
+})
+
+
+def test_stats_are_merged_across_row_groups():
+    entry = describe_parquet(parquet_bytes(TABLE, row_group_size=2))
+
+    assert entry["rows"] == 6
+    assert entry["row_groups"] == 3
+    assert entry["stats"]["id_achat"] == {"min": 1, "max": 6, "nulls": 0}
+    assert entry["stats"]["montant"] == {"min": 3.25, "max": 99.0, "nulls": 2}
+    assert entry["stats"]["date_achat"] == {"min": "2025-01-01", "max": "2025-01-30", "nulls": 0}
+    assert "produit" not in entry["stats"]
+    assert entry["columns"]["montant_decimal"] == "decimal128(12, 2)"
+
+
+def test_decimal_stats_are_json_text():
+    entry = describe_parquet(parquet_bytes(TABLE))
+
+    assert entry["stats"]["montant_decimal"] == {"min": "3.25", "max": "99.00", "nulls": 2}
+    assert json.loads(json.dumps(entry)) == entry
+
+
+def test_schema_hash_ignores_pandas_metadata():
+    with_metadata = TABLE.schema.with_metadata({b"pandas": b"{}"})
+    assert schema_hash(with_metadata) == schema_hash(TABLE.schema)
+    assert schema_hash(TABLE.drop_columns(["produit"]).schema) != schema_hash(TABLE.schema)
+
+
+class Bucket:
+    """Objects of one bucket in memory, ETag = version counter."""
+
+    def __init__(self):
+        self.objects = {}
+        self.versions = {}
+
+    def put(self, name, data):
+        self.objects[name] = data
+        self.versions[name] = self.versions.get(name, 0) + 1
+
+    def etag(self, bucket, name):
+        return f"v{self.versions[name]}" if name in self.objects else None
+
+    def read_object(self, bucket, name):
+        if name not in self.objects:
+            raise S3Error(None, "NoSuchKey", "missing", name, None, None)
+        return self.objects[name]
+
+    def put_if_changed(self, bucket, name, data, content_type):
+        self.put(name, data)
+        return True
+
+    def list_objects(self, bucket, prefix="", recursive=False):
+        return [SimpleNamespace(object_name=name) for name in sorted(self.objects) if name.startswith(prefix)]
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    store = Bucket()
+    monkeypatch.setattr(manifest, "get_etag", store.etag)
+    monkeypatch.setattr(manifest, "read_object", store.read_object)
+    monkeypatch.setattr(manifest, "put_if_changed", store.put_if_changed)
+    monkeypatch.setattr(manifest, "get_minio_client", lambda: store)
+    return store
+
+
+def test_entries_are_one_object_per_dataset(bucket):
+    data = parquet_bytes(TABLE)
+    for name in ("achats.parquet", "clients.parquet"):
+        bucket.put(name, data)
+        record_object("silver", name, data, {"bronze/achats.csv": "e1"}, {"upload": 0.123456})
+
+    assert sorted(name for name in bucket.objects if name.startswith(manifest.MANIFEST_PREFIX)) == [
+        "_manifest/achats.parquet.json",
+        "_manifest/clients.parquet.json",
+    ]
+    objects = load_manifest("silver")["objects"]
+    assert sorted(objects) == ["achats.parquet", "clients.parquet"]
+    assert objects["achats.parquet"]["upstream"] == {"bronze/achats.csv": "e1"}
+    assert objects["achats.parquet"]["timings"] == {"upload": 0.1235}
+
+
+def test_stale_entries_are_ignored(bucket):
+    data = parquet_bytes(TABLE)
+    bucket.put("achats.parquet", data)
+    record_object("silver", "achats.parquet", data)
+
+    entry = object_entry("silver", "achats.parquet")
+    assert column_range(entry, "id_achat") == (1, 6)
+    assert column_range(entry, "produit") is None
+
+    # objet réécrit sans mise à jour du manifest
+    bucket.put("achats.parquet", data)
+    assert object_entry("silver", "achats.parquet") is None
+    assert object_entry("silver", "missing.parquet") is None
+
+
+def test_unchanged_object_keeps_its_entry(bucket):
+    data = parquet_bytes(TABLE)
+    bucket.put("achats.parquet", data)
+    first = record_object("silver", "achats.parquet", data)
+
+    again = record_object("silver", "achats.parquet", data, written=False)
+    assert again == first
+    assert bucket.versions["_manifest/achats.parquet.json"] == 1
+
+
+def test_empty_bucket_has_empty_manifest(bucket):
+    assert load_manifest("gold") == {"bucket": "gold", "objects": {}}
@@ -0,0 +1,67 @@
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from flows import microbatch
+from flows.microbatch import drop_known_achats, lot_id, stream_object
+
+
+def achats(ids):
+    return pd.DataFrame({
+        "id_achat": ids,
+        "id_client": [1] * len(ids),
+        "date_achat": pd.to_datetime(["2025-01-01"] * len(ids)),
+        "montant": [10.0] * len(ids),
+        "produit": ["a"] * len(ids),
+    })
+
+
+@pytest.fixture
+def silver(monkeypatch):
+    """Objets Silver (nom -> id_achat) vus par known_ids."""
+    objects = {}
+    monkeypatch.setattr(microbatch, "list_stream_objects", lambda: sorted(name for name in objects if name != "achats.parquet"))
+    monkeypatch.setattr(microbatch, "get_etag", lambda bucket, name: "etag" if name in objects else None)
+    monkeypatch.setattr(
+        microbatch, "read_table_cached",
+        lambda bucket, name, columns=None: pa.table({"id_achat": pa.array(objects[name], pa.int64())})
+    )
+    return objects
+
+
+def test_overlapping_file_counts_new_purchases_only(silver):
+    silver["achats.parquet"] = [1, 2, 3]
+    silver[stream_object("achats/20261019T100000.csv")] = [4, 5]
+
+    # fichier suivant qui recouvre Silver et le fichier précédent
+    batch = ["achats/20261019T100005.csv"]
+    silver[stream_object(batch[0])] = [3, 5, 6, 7]
+    new = drop_known_achats.fn(achats([3, 5, 6, 7]), batch)
+
+    assert new["id_achat"].tolist() == [6, 7]
+
+
+def test_resent_file_adds_nothing(silver):
+    silver[stream_object("achats/20261019T100000.csv")] = [4, 5]
+    batch = ["achats/20261019T100000_renvoi.csv"]
+    silver[stream_object(batch[0])] = [4, 5]
+
+    assert drop_known_achats.fn(achats([4, 5]), batch).empty
+
+
+def test_replayed_lot_keeps_its_purchases(silver):
+    batch = ["achats/20261019T100000.csv", "achats/20261019T100005.csv"]
+    # lot interrompu : ses fichiers Silver sont déjà écrits
+    silver[stream_object(batch[0])] = [4, 5]
+    silver[stream_object(batch[1])] = [5, 6]
+
+    new = drop_known_achats.fn(achats([4, 5, 5, 6]), batch)
+
+    # doublon entre les fichiers du lot compté une fois, rien d'exclu sinon
+    assert new["id_achat"].tolist() == [4, 5, 6]
+    assert lot_id(batch) == lot_id(list(batch))
+
+
+def test_first_batch_without_silver(silver):
+    new = drop_known_achats.fn(achats([1, 2]), ["achats/20261019T100000.csv"])
+    assert new["id_achat"].tolist() == [1, 2]
@@ -0,0 +1,91 @@
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+from minio.error import S3Error
+
+from flows import caching, object_cache
+
+
+class VersionedObjects:
+    """Objets en mémoire avec ETag (MD5) et GET conditionnel If-Match."""
+
+    def __init__(self):
+        self.objects = {}
+        self.before_get = None
+        self.gets = 0
+
+    def put(self, object_name, data):
+        self.objects[object_name] = data
+
+    def etag(self, object_name):
+        return hashlib.md5(self.objects[object_name]).hexdigest()
+
+    def stat_object(self, bucket, object_name):
+        if object_name not in self.objects:
+            raise S3Error(None, "NoSuchKey", "missing", object_name, None, None)
+        return SimpleNamespace(etag=self.etag(object_name), size=len(self.objects[object_name]))
+
+    def get_object(self, bucket, object_name, request_headers=None):
+        self.gets += 1
+        if self.before_get:
+            # réécriture de l'objet entre le HEAD et le GET
+            rewrite, self.before_get = self.before_get, None
+            rewrite()
+        expected = (request_headers or {}).get("If-Match")
+        if expected is not None and expected.strip('"') != self.etag(object_name):
+            raise S3Error(None, "PreconditionFailed", "etag changed", object_name, None, None)
+        data = self.objects[object_name]
+        return SimpleNamespace(
+            stream=lambda amt: iter([data[i:i + amt] for i in range(0, len(data), amt)]),
+            close=lambda: None,
+            release_conn=lambda: None,
+        )
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    client = VersionedObjects()
+    monkeypatch.setattr(caching, "get_minio_client", lambda: client)
+    monkeypatch.setattr(object_cache, "get_minio_client", lambda: client)
+    monkeypatch.setattr(object_cache, "OBJECT_CACHE_DIR", tmp_path)
+    return client
+
+
+def test_download_is_cached_under_its_etag(store):
+    store.put("achats.parquet", b"v1")
+
+    path = object_cache.cached_path("silver", "achats.parquet")
+
+    assert path.read_bytes() == b"v1"
+    assert path.stem == store.etag("achats.parquet")
+    assert object_cache.cached_path("silver", "achats.parquet") == path
+    assert store.gets == 1
+
+
+def test_body_rewritten_after_the_head_is_not_cached_under_the_old_etag(store):
+    store.put("achats.parquet", b"v1")
+    old_etag = store.etag("achats.parquet")
+    store.before_get = lambda: store.put("achats.parquet", b"v2")
+
+    path = object_cache.cached_path("silver", "achats.parquet")
+
+    assert path.read_bytes() == b"v2"
+    assert path.stem == store.etag("achats.parquet") != old_etag
+    assert [p.name for p in path.parent.iterdir()] == [path.name]
+
+
+def test_new_version_replaces_the_old_entry(store):
+    store.put("achats.parquet", b"v1")
+    old = object_cache.cached_path("silver", "achats.parquet")
+    store.put("achats.parquet", b"v2")
+
+    new = object_cache.cached_path("silver", "achats.parquet")
+
+    assert new.read_bytes() == b"v2"
+    assert not old.exists()
+
+
+def test_missing_object(store):
+    with pytest.raises(FileNotFoundError):
+        object_cache.cached_path("silver", "absent.parquet")
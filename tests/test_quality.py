@@ -0,0 +1,144 @@
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from flows.quality import (
+    build_report,
+    count_duplicates,
+    get_rules,
+    init_state,
+    iter_chunks,
+    merge_states,
+    update_state,
+)
+
+
+def achats(ids, montants=None, dates=None, clients=None):
+    n = len(ids)
+    return pd.DataFrame({
+        "id_achat": ids,
+        "id_client": clients if clients is not None else [1] * n,
+        "montant": montants if montants is not None else [10.0] * n,
+        "date_achat": pd.to_datetime(dates if dates is not None else ["2025-01-01"] * n),
+    })
+
+
+def quality_state(df, references=None, chunk_size=2):
+    """Même passe que Silver, avec des chunks de chunk_size lignes."""
+    rules = get_rules("achats")
+    state = init_state()
+    for chunk in iter_chunks(df, chunk_size):
+        state = update_state(state, chunk, rules, references)
+    return count_duplicates(state, df, rules)
+
+
+def report_of(df, references=None, chunk_size=2):
+    return build_report(quality_state(df, references, chunk_size), get_rules("achats"), "achats")
+
+
+def rule(report, name, column):
+    return next(r for r in report["rules"] if r["rule"] == name and r["column"] == column)
+
+
+def test_clean_dataset_passes():
+    report = report_of(achats([1, 2, 3, 4, 5]), references={"clients": np.array([1])})
+
+    assert report["passed"]
+    assert report["nb_rows"] == 5
+    assert report["min"]["montant"] == 10.0
+
+
+def test_duplicates_across_chunks_are_counted_exactly():
+    # doublons dans des chunks différents (chunks de 2 lignes)
+    report = report_of(achats([1, 2, 3, 1, 4, 2, 1]))
+
+    result = rule(report, "unique", "id_achat")
+    assert result["value"] == 3
+    assert result["threshold"] == 0
+    assert not result["passed"]
+    assert not report["passed"]
+
+
+def test_a_few_duplicates_in_a_large_dataset_fail():
+    ids = np.arange(200_000)
+    ids[:2_000] = ids[2_000:4_000]
+
+    result = rule(report_of(achats(ids), chunk_size=50_000), "unique", "id_achat")
+
+    assert result["value"] == 2_000
+    assert not result["passed"]
+
+
+def test_merged_key_partitions_equal_the_whole_dataset():
+    df = achats([1, 2, 3, 1, 4, 2, 1, 5, 8, 8], montants=[10.0, -1.0] * 5)
+    partitions = [part for _, part in df.groupby(df["id_achat"] % 3)]
+
+    merged = reduce(merge_states, [quality_state(part) for part in partitions])
+    whole = quality_state(df)
+
+    assert merged["duplicates"] == whole["duplicates"] == {"id_achat": 4}
+    assert merged["out_of_range"] == whole["out_of_range"] == {"montant": 5, "date_achat": 0}
+    assert merged["non_null"] == whole["non_null"]
+    assert merged["nb_rows"] == whole["nb_rows"]
+
+
+def test_not_null_ratio_threshold():
+    df = achats(list(range(200)))
+    df.loc[:1, "date_achat"] = pd.NaT
+
+    result = rule(report_of(df), "not_null", "date_achat")
+
+    assert result["value"] == 0.99
+    assert result["passed"]
+
+    df.loc[:2, "date_achat"] = pd.NaT
+    assert not rule(report_of(df), "not_null", "date_achat")["passed"]
+
+
+def test_range_and_date_bounds():
+    df = achats(
+        [1, 2, 3, 4],
+        montants=[10.0, -5.0, 20_000.0, 50.0],
+        dates=["2025-01-01", "1999-12-31", "2025-01-01", "2999-01-01"],
+    )
+
+    report = report_of(df)
+
+    assert rule(report, "range", "montant")["value"] == 2
+    assert rule(report, "range", "date_achat")["value"] == 2
+    assert report["min"]["montant"] == -5.0
+    assert report["max"]["date_achat"].startswith("2999-01-01")
+
+
+def test_orphan_references():
+    df = achats([1, 2, 3], clients=[1, 2, 9])
+
+    report = report_of(df, references={"clients": np.array([1, 2])})
+    result = rule(report, "references:clients", "id_client")
+
+    assert result["value"] == 1
+    assert not result["passed"]
+
+
+def test_references_skipped_without_keys():
+    report = report_of(achats([1, 2], clients=[1, 9]))
+
+    assert not any(r["rule"].startswith("references") for r in report["rules"])
+
+
+def test_all_null_column_is_reported():
+    df = achats([1, 2])
+    df["produit"] = None
+
+    assert report_of(df)["null_columns"] == ["produit"]
+
+
+def test_unknown_dataset_has_no_rule():
+    df = achats([1, 1])
+    state = count_duplicates(update_state(init_state(), df, get_rules("inconnu")), df, get_rules("inconnu"))
+
+    report = build_report(state, get_rules("inconnu"), "inconnu")
+
+    assert report["rules"] == []
+    assert report["passed"]
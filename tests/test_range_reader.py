@@ -0,0 +1,97 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pytest
+
+from flows import range_reader
+from flows.range_reader import MinioRangeFile, read_table_ranges
+
+from .conftest import parquet_bytes
+
+
+@pytest.fixture
+def remote(memory_objects, monkeypatch):
+    monkeypatch.setattr(range_reader, "get_minio_client", lambda: memory_objects)
+    monkeypatch.setattr(range_reader, "read_object", memory_objects.read_object)
+    return memory_objects
+
+
+def test_reads_match_the_object(remote):
+    data = bytes(range(256)) * 40
+    remote.objects["blob"] = data
+    f = MinioRangeFile("bucket", "blob", block_size=100)
+
+    f.seek(150)
+    assert f.read(300) == data[150:450]
+    f.seek(-10, 2)
+    assert f.read() == data[-10:]
+    assert f.read(5) == b""
+
+
+def test_cached_blocks_are_not_fetched_again(remote):
+    remote.objects["blob"] = b"x" * 1000
+    f = MinioRangeFile("bucket", "blob", block_size=100)
+
+    f.seek(200)
+    f.read(150)
+    f.seek(220)
+    f.read(50)
+    assert f.requests == 1
+    assert remote.reads == [(200, 200)]
+
+
+def test_sequential_reads_prefetch_the_next_block(remote):
+    remote.objects["blob"] = b"x" * 1000
+    f = MinioRangeFile("bucket", "blob", block_size=100)
+
+    f.read(100)
+    f.read(100)
+    assert remote.reads[-1] == (100, 200)
+    f.read(100)
+    assert f.requests == 2
+
+
+def test_read_larger_than_the_cache_keeps_its_blocks(remote, monkeypatch):
+    monkeypatch.setattr(range_reader, "MAX_CACHED_BLOCKS", 4)
+    data = bytes(range(256)) * 8
+    remote.objects["blob"] = data
+    f = MinioRangeFile("bucket", "blob", block_size=100)
+
+    f.seek(900)
+    f.read(10)
+    f.seek(0)
+    assert f.read(700) == data[:700]
+    assert 9 not in f.blocks
+    assert len(f.blocks) == 7
+
+
+def test_lru_eviction_bounds_the_cache(remote, monkeypatch):
+    monkeypatch.setattr(range_reader, "MAX_CACHED_BLOCKS", 3)
+    remote.objects["blob"] = b"x" * 1000
+    f = MinioRangeFile("bucket", "blob", block_size=100)
+
+    for position in (0, 500, 800, 300):
+        f.seek(position)
+        f.read(10)
+    assert list(f.blocks) == [5, 8, 3]
+
+
+def test_projected_filtered_parquet_read(remote):
+    # plusieurs Mo, plus grand que quelques blocs
+    rng = np.random.default_rng(0)
+    n = 400_000
+    table = pa.table({
+        "id_achat": pa.array(np.arange(n), pa.int64()),
+        "montant": rng.uniform(1, 500, n),
+        "quantite": rng.uniform(0, 1, n),
+    })
+    remote.objects["achats.parquet"] = parquet_bytes(table, row_group_size=50_000)
+
+    result = read_table_ranges(
+        "silver", "achats.parquet", columns=["id_achat", "montant"], filters=[("id_achat", ">=", 350_000)]
+    )
+
+    expected = table.filter(pc.field("id_achat") >= 350_000).select(["id_achat", "montant"])
+    assert result.equals(expected)
+    fetched = sum(length for _, length in remote.reads)
+    assert fetched < len(remote.objects["achats.parquet"]) / 2
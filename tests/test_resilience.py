@@ -0,0 +1,142 @@
+from types import SimpleNamespace
+
+import pytest
+from minio.error import S3Error
+
+from flows import resilience
+from flows.resilience import CircuitOpenError, breaker_state, io_call, is_transient
+
+
+@pytest.fixture(autouse=True)
+def breakers(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilience, "IO_BREAKER_THRESHOLD", 3)
+    monkeypatch.setattr(resilience, "IO_BREAKER_RESET", 60)
+    monkeypatch.setattr(resilience.time, "sleep", lambda seconds: None)
+
+
+class Flaky:
+    """Operation failing with error the first `failures` calls."""
+
+    def __init__(self, failures: int, error: Exception = ConnectionError("down")):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return "ok"
+
+
+def test_transient_errors_are_retried():
+    operation = Flaky(2)
+    assert io_call("minio", operation, retries=2) == "ok"
+    assert operation.calls == 3
+    assert breaker_state("minio")["state"] == "closed"
+    assert breaker_state("minio")["failures"] == 0
+
+
+def test_other_errors_are_raised_at_once():
+    operation = Flaky(1, KeyError("missing"))
+    with pytest.raises(KeyError):
+        io_call("minio", operation, retries=3)
+    assert operation.calls == 1
+    assert breaker_state("minio")["state"] == "closed"
+
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    with pytest.raises(ConnectionError):
+        io_call("mongo", Flaky(10), retries=5)
+    assert breaker_state("mongo")["state"] == "open"
+
+    operation = Flaky(0)
+    with pytest.raises(CircuitOpenError):
+        io_call("mongo", operation)
+    assert operation.calls == 0
+    # un disjoncteur par service
+    assert io_call("minio", Flaky(0)) == "ok"
+
+
+def test_half_open_trial_closes_on_success(monkeypatch):
+    with pytest.raises(ConnectionError):
+        io_call("mongo", Flaky(10), retries=2)
+    monkeypatch.setattr(resilience, "IO_BREAKER_RESET", 0)
+
+    assert io_call("mongo", Flaky(0)) == "ok"
+    state = breaker_state("mongo")
+    assert (state["state"], state["failures"]) == ("closed", 0)
+
+
+def test_half_open_trial_reopens_on_failure(monkeypatch):
+    with pytest.raises(ConnectionError):
+        io_call("mongo", Flaky(10), retries=2)
+    monkeypatch.setattr(resilience, "IO_BREAKER_RESET", 0)
+
+    # l'essai échoue : le disjoncteur se rouvre pour un nouveau délai
+    with pytest.raises(ConnectionError):
+        io_call("mongo", Flaky(10), retries=0)
+    assert breaker_state("mongo")["state"] == "open"
+
+    monkeypatch.setattr(resilience, "IO_BREAKER_RESET", 60)
+    with pytest.raises(CircuitOpenError):
+        io_call("mongo", Flaky(0))
+
+
+def test_open_circuit_is_not_transient():
+    assert is_transient(ConnectionError())
+    assert is_transient(TimeoutError())
+    assert not is_transient(CircuitOpenError())
+    assert not is_transient(ValueError())
+
+
+class PartStore:
+    """Client calls used by upload_file, objects kept in memory."""
+
+    def __init__(self):
+        self.objects = {}
+        self.puts = []
+
+    def put_object(self, bucket, object_name, data, length, content_type=None, metadata=None):
+        self.puts.append(object_name)
+        meta = {f"x-amz-meta-{key}": value for key, value in (metadata or {}).items()}
+        self.objects[object_name] = (data.read(), meta)
+
+    def stat_object(self, bucket, object_name):
+        if object_name not in self.objects:
+            raise S3Error(None, "NoSuchKey", "missing", object_name, None, None)
+        # ETag d'un upload multipart : pas le MD5 du contenu
+        return SimpleNamespace(etag="multipart-2", metadata=self.objects[object_name][1])
+
+    def compose_object(self, bucket, object_name, sources, metadata=None):
+        data = b"".join(self.objects[source.object_name][0] for source in sources)
+        self.objects[object_name] = (data, {})
+
+    def remove_object(self, bucket, object_name):
+        self.objects.pop(object_name, None)
+
+
+def test_resumed_upload_skips_stored_parts(tmp_path, monkeypatch):
+    store = PartStore()
+    monkeypatch.setattr(resilience, "get_minio_client", lambda: store)
+    path = tmp_path / "achats.csv"
+    path.write_bytes(bytes(range(256)) * 100)
+
+    # premier run interrompu avant l'assemblage
+    def fail(*args, **kwargs):
+        raise KeyError("interrompu")
+
+    compose = store.compose_object
+    store.compose_object = fail
+    with pytest.raises(KeyError):
+        resilience.upload_file("sources", "achats.csv", path, part_size=6000)
+    assert len(store.puts) == 5
+
+    store.compose_object = compose
+    store.puts.clear()
+    resilience.upload_file("sources", "achats.csv", path, part_size=6000)
+
+    assert store.puts == []
+    assert store.objects["achats.csv"][0] == path.read_bytes()
+    assert list(store.objects) == ["achats.csv"]
@@ -0,0 +1,118 @@
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from flows import schemas
+from flows.schemas import downcast_integers, read_csv_with_schema, to_pandas, to_parquet
+from flows.silver_ingestion import deduplicate
+
+ACHATS_CSV = b"""id_achat,id_client,date_achat,montant,produit
+1,10,2025-01-02 10:30:00,19.9,  livre
+2,11, 2025-01-03 08:00:00 ,5.5,jeu
+3,10,2025-13-40 99:00:00,7.0,livre
+4,,2025-01-04 12:00:00,,
+"""
+
+
+def test_csv_is_parsed_with_the_declared_schema():
+    table = read_csv_with_schema(io.BytesIO(ACHATS_CSV), "achats")
+
+    assert table.schema.field("date_achat").type == pa.timestamp("s")
+    assert table.schema.field("montant").type == pa.float64()
+    assert pa.types.is_dictionary(table.schema.field("produit").type)
+    # entiers réduits au plus petit type qui contient les valeurs
+    assert table.schema.field("id_achat").type == pa.int8()
+    assert table.schema.field("id_client").type == pa.int8()
+
+
+def test_dates_strings_and_nulls_are_normalised():
+    table = read_csv_with_schema(io.BytesIO(ACHATS_CSV), "achats")
+
+    # espaces retirés avant le parsing, date invalide -> null (errors="coerce")
+    assert table["date_achat"].to_pylist()[:3] == [
+        pd.Timestamp("2025-01-02 10:30:00"), pd.Timestamp("2025-01-03 08:00:00"), None,
+    ]
+    assert table["produit"].to_pylist() == ["livre", "jeu", "livre", None]
+    assert table["produit"].combine_chunks().dictionary.to_pylist() == ["livre", "jeu"]
+    assert table["id_client"].to_pylist()[3] is None
+    assert table["montant"].to_pylist()[3] is None
+
+
+def test_unknown_dataset_is_inferred():
+    table = read_csv_with_schema(io.BytesIO(b"a,b\n1,x\n"), "inconnu")
+
+    assert table.to_pylist() == [{"a": 1, "b": "x"}]
+
+
+def test_deduplicate_on_business_key_keeps_first_row():
+    df = pd.DataFrame({"id_achat": [1, 2, 1], "montant": [10.0, 20.0, 99.0]})
+
+    deduped = deduplicate(df, ["id_achat"])
+
+    assert deduped["montant"].tolist() == [10.0, 20.0]
+
+
+def test_deduplicate_without_key_drops_identical_rows():
+    df = pd.DataFrame({"a": [1, 1, 1, 2], "b": ["x", "x", "y", "x"]})
+
+    assert deduplicate(df).index.tolist() == [0, 2, 3]
+    # clé absente du DataFrame : repli sur le hash de ligne
+    assert deduplicate(df, ["id_achat"]).index.tolist() == [0, 2, 3]
+
+
+def frame(ids):
+    return pd.DataFrame({
+        "id_achat": pd.Series(ids, dtype="int64"),
+        "id_client": pd.Series(ids, dtype="int64"),
+        "montant": [19.991] * len(ids),
+        "produit": pd.Categorical(["livre"] * len(ids)),
+        "email": pd.array(["a@b.fr"] * len(ids), dtype=pd.StringDtype("pyarrow")),
+    })
+
+
+def read_back(data: bytes) -> pa.Table:
+    return pq.read_table(io.BytesIO(data))
+
+
+def test_parquet_schema_does_not_depend_on_values():
+    small = read_back(to_parquet(frame([1, 2])))
+    large = read_back(to_parquet(frame([1, 2_000_000])))
+
+    assert small.schema == large.schema
+    assert small.schema.field("id_achat").type == pa.int64()
+    assert small.schema.field("id_client").type == pa.int32()
+    assert pa.types.is_dictionary(small.schema.field("produit").type)
+
+
+def test_to_pandas_applies_the_memory_policy():
+    df = to_pandas(read_back(to_parquet(frame([1, 300]))))
+
+    assert df["id_achat"].dtype == "int16"
+    assert df["id_client"].dtype == "int16"
+    assert isinstance(df["produit"].dtype, pd.CategoricalDtype)
+    assert df["email"].dtype == pd.StringDtype("pyarrow")
+    assert df["montant"].dtype == "float64"
+
+
+def test_montant_decimal(monkeypatch):
+    monkeypatch.setattr(schemas, "MONTANT_DECIMAL", True)
+
+    table = read_back(to_parquet(frame([1])))
+
+    assert table.schema.field("montant").type == pa.decimal128(12, 2)
+    assert to_pandas(table)["montant"].tolist() == [19.99]
+
+
+def test_downcast_integers_keeps_nulls_and_wide_values():
+    table = pa.table({
+        "a": pa.array([1, None, 3], pa.int64()),
+        "b": pa.array([0, 40_000, 1], pa.int64()),
+        "c": pa.array([None, None, None], pa.int64()),
+    })
+
+    result = downcast_integers(table)
+
+    assert [field.type for field in result.schema] == [pa.int8(), pa.int32(), pa.int64()]
+    assert result["a"].to_pylist() == [1, None, 3]
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from flows import silver_ingestion
+from flows.quality import build_report, get_rules
+from flows.silver_ingestion import _clean, _quality_state, clean_bronze_parallel, load_bronze
+
+
+@pytest.fixture
+def achats_csv(tmp_path):
+    """CSV Bronze d'achats avec doublons éloignés, dates invalides et lignes vides."""
+    rng = np.random.default_rng(0)
+    n = 3_000
+    df = pd.DataFrame({
+        "id_achat": pd.array(rng.integers(0, 2_500, n), dtype="Int64"),
+        "id_client": pd.array(rng.integers(1, 200, n), dtype="Int64"),
+        "date_achat": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 10**7, n), unit="s"),
+        "montant": rng.uniform(-5, 500, n).round(2),
+        "produit": rng.choice([" livre", "jeu ", "film"], n),
+    })
+    df["date_achat"] = df["date_achat"].dt.strftime("%Y-%m-%d %H:%M:%S")
+    df.loc[::97, "date_achat"] = "pas une date"
+    df.loc[::211, :] = None
+    path = tmp_path / "achats.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_parallel_output_equals_sequential(monkeypatch, tmp_path, achats_csv):
+    monkeypatch.setattr(silver_ingestion, "MIN_BYTES_PER_PARTITION", 1)
+    monkeypatch.setattr(silver_ingestion, "SPILL_DIR", tmp_path)
+    references = {"clients": np.arange(1, 150)}
+
+    sequential = _clean(load_bronze(str(achats_csv), "achats"), "achats")
+    expected_report = build_report(_quality_state(sequential, "achats", references), get_rules("achats"), "achats")
+
+    parallel, report = clean_bronze_parallel.fn(str(achats_csv), "achats", n_workers=4, references=references)
+
+    pd.testing.assert_frame_equal(parallel, sequential.reset_index(drop=True), check_categorical=False)
+    assert report["rules"] == expected_report["rules"]
+    assert report["nb_rows"] == expected_report["nb_rows"] == len(parallel)
+
+
+def test_byte_ranges_cover_each_line_once(achats_csv):
+    size = achats_csv.stat().st_size
+    header = silver_ingestion.read_header(str(achats_csv), size)
+    edges = np.linspace(len(header), size, 8).astype(int)
+
+    body = b"".join(
+        silver_ingestion.read_lines(str(achats_csv), int(edges[i]), int(edges[i + 1]), size)
+        for i in range(len(edges) - 1)
+    )
+
+    assert header + body == achats_csv.read_bytes()
@@ -0,0 +1,107 @@
+import json
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from flows.gold_ingestion import kpi_distribution
+from flows.sketches import (
+    COMPRESSION,
+    init_sketch,
+    is_compressed,
+    merge_sketches,
+    quantile,
+    std,
+    update_sketch,
+)
+
+
+# un centroïde k1 couvre au plus pi / COMPRESSION des valeurs (près de la
+# médiane) : l'interpolation se trompe au plus de la moitié en rang
+RANK_TOLERANCE = math.pi / COMPRESSION / 2
+
+
+@pytest.fixture
+def montants():
+    # log-normaux, comme le profil production du générateur
+    return np.random.default_rng(0).lognormal(4.5, 0.8, 200_000).round(2)
+
+
+def rank_error(values: np.ndarray, estimate: float, q: float) -> float:
+    """Écart entre le rang de l'estimation et le rang visé (fraction des valeurs)."""
+    return abs(np.searchsorted(np.sort(values), estimate) / len(values) - q)
+
+
+def test_small_sketch_quantiles_are_exact():
+    values = np.random.default_rng(1).uniform(0, 500, COMPRESSION)
+    state = update_sketch(init_sketch(), values)
+
+    assert not is_compressed(state)
+    for q in (0.01, 0.5, 0.9, 0.99):
+        assert quantile(state, q) == pytest.approx(np.quantile(values, q))
+
+
+def test_quantile_accuracy(montants):
+    state = update_sketch(init_sketch(), montants)
+
+    assert is_compressed(state)
+    assert len(state["centroids"]["mean"]) <= COMPRESSION
+    for q in (0.5, 0.9, 0.95, 0.99):
+        assert rank_error(montants, quantile(state, q), q) < RANK_TOLERANCE
+    assert quantile(state, 0.5) == pytest.approx(np.median(montants), rel=0.005)
+
+
+def test_merged_partitions_match_a_single_pass(montants):
+    parts = np.array_split(montants, 7)
+    merged = init_sketch()
+    for part in parts:
+        merged = merge_sketches(merged, update_sketch(init_sketch(), part))
+    single = update_sketch(init_sketch(), montants)
+
+    assert merged["count"] == len(montants)
+    assert merged["mean"] == pytest.approx(montants.mean())
+    assert std(merged) == pytest.approx(np.std(montants, ddof=1))
+    assert (merged["min"], merged["max"]) == (montants.min(), montants.max())
+    assert merged["histogram"]["counts"] == single["histogram"]["counts"]
+    for q in (0.5, 0.9, 0.99):
+        assert rank_error(montants, quantile(merged, q), q) < RANK_TOLERANCE
+
+
+def test_incremental_updates_match_full(montants):
+    # delta du jour ajouté au sketch de l'historique
+    history, delta = montants[:-5000], montants[-5000:]
+    state = update_sketch(update_sketch(init_sketch(), history), delta)
+
+    assert state["count"] == len(montants)
+    assert rank_error(montants, quantile(state, 0.5), 0.5) < RANK_TOLERANCE
+
+
+def test_sketch_is_json_serializable_and_ignores_nan():
+    state = update_sketch(init_sketch(), [1.0, float("nan"), 3.0])
+    state = json.loads(json.dumps(state))
+
+    assert state["count"] == 2
+    assert quantile(state, 0.5) == 2.0
+    assert math.isnan(quantile(init_sketch(), 0.5))
+    assert math.isnan(std(update_sketch(init_sketch(), [5.0])))
+
+
+def test_histogram_edges_must_match():
+    with pytest.raises(ValueError):
+        merge_sketches(update_sketch(init_sketch(), [1.0]), update_sketch(init_sketch([0, 10]), [1.0]))
+
+
+def test_distribution_is_exact_with_all_amounts(montants):
+    state = update_sketch(init_sketch(), montants)
+    series = pd.Series(montants)
+
+    exact = kpi_distribution.fn(state, series).iloc[0]
+    estimate = kpi_distribution.fn(state).iloc[0]
+
+    assert exact["quantiles"] == "exact"
+    assert exact["montant_median"] == round(series.median(), 2)
+    assert exact["p99"] == round(series.quantile(0.99), 2)
+    assert estimate["quantiles"] == "t-digest"
+    assert estimate["montant_median"] == pytest.approx(exact["montant_median"], rel=0.005)
+    assert kpi_distribution.fn(update_sketch(init_sketch(), [1.0, 2.0, 4.0])).iloc[0]["quantiles"] == "exact"
@@ -0,0 +1,102 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from flows import snapshot
+from flows.snapshot import (
+    GOLD_DATASETS,
+    KEEP_VERSIONS,
+    current_version,
+    prune_versions,
+    read_manifest,
+    read_snapshot,
+    refresh_snapshot,
+    write_snapshot,
+)
+
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", tmp_path)
+    return tmp_path
+
+
+def publish(value: int) -> str:
+    return write_snapshot({"kpi": pd.DataFrame({"valeur": [value]})})
+
+
+def age(snapshot_dir, version: str, seconds: float) -> None:
+    """Date de publication d'une version reculée de seconds."""
+    past = time.time() - seconds
+    os.utime(snapshot_dir / version, (past, past))
+
+
+def test_pointer_swaps_to_the_new_version():
+    assert current_version() is None
+
+    first = publish(1)
+    assert current_version() == first
+    second = publish(2)
+
+    assert current_version() == second
+    assert read_snapshot("kpi", second)["valeur"].tolist() == [2]
+    # l'ancienne version reste lisible par les sessions qui l'ont déjà lue
+    assert read_snapshot("kpi", first)["valeur"].tolist() == [1]
+    assert read_manifest(second)["datasets"] == {"kpi": 1}
+
+
+def test_no_temporary_pointer_is_left(snapshot_dir):
+    publish(1)
+
+    assert sorted(path.name for path in snapshot_dir.iterdir() if path.is_file()) == ["CURRENT"]
+
+
+def test_prune_waits_for_the_grace_period(snapshot_dir):
+    versions = [publish(i) for i in range(KEEP_VERSIONS + 2)]
+
+    # remplacées à l'instant : rien n'est supprimé
+    assert prune_versions(grace_seconds=60) == []
+
+    # la première a été remplacée il y a longtemps, la deuxième à l'instant
+    age(snapshot_dir, versions[1], 3600)
+    assert prune_versions(grace_seconds=60) == [versions[0]]
+    assert not (snapshot_dir / versions[0]).exists()
+    assert (snapshot_dir / versions[1]).exists()
+
+
+def test_prune_keeps_the_latest_versions(snapshot_dir):
+    versions = [publish(i) for i in range(KEEP_VERSIONS + 2)]
+    for version in versions:
+        age(snapshot_dir, version, 3600)
+
+    assert prune_versions(grace_seconds=60) == versions[:2]
+    assert sorted(path.name for path in snapshot_dir.iterdir() if path.is_dir()) == versions[2:]
+    assert current_version() == versions[-1]
+
+
+def test_refresh_from_frames_in_memory():
+    frames = {
+        "kpi_ca_par_pays.parquet": pd.DataFrame({"pays": ["France", "Espagne"], "ca_total": [10.0, 30.0]}),
+        "kpi_volumes_jour.parquet": pd.DataFrame({
+            "jour": ["2024-12-31", "2025-01-02", "2025-01-01"], "nb_achats": [1, 2, 3], "ca_total": [1.0, 2.0, 3.0],
+        }),
+        "kpi_volumes_mois.parquet": pd.DataFrame({"mois": ["2025-01", "2024-12"], "nb_achats": [5, 1], "ca_total": [5.0, 1.0]}),
+        "kpi_croissance.parquet": pd.DataFrame({"mois": ["2025-01", "2024-12"], "ca_total": [5.0, 1.0]}),
+        "kpi_histogramme_montant.parquet": pd.DataFrame({"borne_min": [None, 0.0], "borne_max": [0.0, None], "nb_achats": [0, 6]}),
+    }
+    frames.update({
+        object_name: pd.DataFrame({"valeur": [1]})
+        for object_name in GOLD_DATASETS.values()
+        if object_name not in frames
+    })
+
+    version = refresh_snapshot(frames)
+
+    assert read_snapshot("ca_par_pays", version)["pays"].tolist() == ["Espagne", "France"]
+    assert read_snapshot("volumes_annee", version).to_dict("list") == {
+        "annee": [2024, 2025], "nb_achats": [1, 5], "ca_total": [1.0, 5.0],
+    }
+    assert read_snapshot("volumes_mois", version)["mois"].dt.month.tolist() == [12, 1]
+    assert read_snapshot("histogramme_montant", version)["tranche"].tolist() == ["-inf - 0.0", "0.0 - inf"]
@@ -0,0 +1,99 @@
+import math
+
+import mongomock
+import pandas as pd
+import pytest
+
+from flows.kpi_store import parse_window_range, read_windows
+from flows.windows import ALL_COUNTRIES, COLUMNS, WINDOWS_COLLECTION, compute_windows
+
+# deux pays, jours sans achat (France le 3, UK les 1 et 2), plusieurs
+# produits le même jour
+CUBE = pd.DataFrame({
+    "jour": pd.to_datetime(["2025-01-01", "2025-01-01", "2025-01-02", "2025-01-04", "2025-01-03", "2025-01-04", "2025-02-10"]),
+    "pays": ["France", "France", "France", "France", "UK", "UK", "UK"],
+    "produit": ["a", "b", "a", "a", "a", "b", "a"],
+    "nb_achats": [1, 2, 1, 4, 2, 1, 3],
+    "ca_total": [10.0, 20.0, 15.0, 40.0, 30.0, 12.0, 60.0],
+})
+
+
+def window(result, name, pays):
+    rows = result[(result["fenetre"] == name) & (result["pays"] == pays)]
+    return rows.set_index("periode")
+
+
+def test_rolling_mean_fills_missing_days():
+    result = compute_windows(CUBE, {"moyenne_2j": ("jour", "rolling", 2)})
+    france = window(result, "moyenne_2j", "France")
+
+    assert list(france.index[:5]) == ["2025-01-01", "2025-01-02", "2025-01-03", "2025-01-04", "2025-01-05"]
+    assert math.isnan(france.loc["2025-01-01", "ca_fenetre"])
+    assert france.loc["2025-01-02", "ca_fenetre"] == 22.5
+    # jour sans achat compté à 0
+    assert france.loc["2025-01-03", "ca_total"] == 0
+    assert france.loc["2025-01-04", "ca_fenetre"] == 20.0
+    assert france.loc["2025-01-04", "ecart_pct"] == 100.0
+
+
+def test_lag_and_total_per_month():
+    result = compute_windows(CUBE, {"mois_precedent": ("mois", "lag", 1)})
+
+    total = window(result, "mois_precedent", ALL_COUNTRIES)
+    assert list(total.index) == ["2025-01", "2025-02"]
+    assert total.loc["2025-01", "ca_total"] == 127.0
+    assert total.loc["2025-02", "ca_fenetre"] == 127.0
+    assert total.loc["2025-02", "ecart_pct"] == round((60 - 127) / 127 * 100, 2)
+
+    france = window(result, "mois_precedent", "France")
+    # pas d'achat en février : écart de -100 %
+    assert france.loc["2025-02", "ca_total"] == 0
+    assert france.loc["2025-02", "ecart_pct"] == -100.0
+
+
+def test_week_labels():
+    result = compute_windows(CUBE, {"semaine_precedente": ("semaine", "lag", 1)})
+    labels = window(result, "semaine_precedente", "UK").index
+
+    assert labels[0] == "2024-12-30/2025-01-05"
+    assert labels[-1] == "2025-02-10/2025-02-16"
+    assert len(labels) == 7
+
+
+def test_empty_cube():
+    result = compute_windows(CUBE.iloc[:0])
+    assert result.empty
+    assert list(result.columns) == COLUMNS
+
+
+@pytest.mark.parametrize("granularite, debut, fin, expected", [
+    ("jour", "2025-01-02", "2025-01-04", ("2025-01-02", "2025-01-04")),
+    ("semaine", "2025-01-01", "2025-01-08", ("2024-12-30/2025-01-05", "2025-01-06/2025-01-12")),
+    ("mois", "2025-01", "2025-02-15", ("2025-01", "2025-02")),
+    ("mois", None, "2025-02", (None, "2025-02")),
+])
+def test_parse_window_range(granularite, debut, fin, expected):
+    assert parse_window_range(granularite, debut, fin) == expected
+
+
+def test_parse_window_range_rejects_bad_bounds():
+    with pytest.raises(ValueError):
+        parse_window_range("semaine", "2025-13-01", None)
+    with pytest.raises(ValueError):
+        parse_window_range("jour", "2025-01", None)
+
+
+def test_read_windows_by_week():
+    db = mongomock.MongoClient()["datalake"]
+    result = compute_windows(CUBE)
+    db[WINDOWS_COLLECTION].insert_many(result.astype(object).where(result.notna(), None).to_dict(orient="records"))
+
+    rows = read_windows(db, "semaine_precedente", debut="2025-01-03", fin="2025-01-07")
+    assert [row["periode"] for row in rows] == ["2024-12-30/2025-01-05", "2025-01-06/2025-01-12"]
+    assert {row["pays"] for row in rows} == {ALL_COUNTRIES}
+
+    rows = read_windows(db, "moyenne_7j", ["France", "UK"], debut="2025-01-02", fin="2025-01-02")
+    assert [(row["pays"], row["ca_total"]) for row in rows] == [("France", 15.0), ("UK", 0.0)]
+
+    with pytest.raises(ValueError):
+        read_windows(db, "inconnue")